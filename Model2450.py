@@ -1,8 +1,31 @@
 import pyvisa as visa
 from typing import List
-import pandas as pd
-import io
 import time
+import numpy as np
+import ivAnalysis
+from deviceDiscovery import DiscoveryCache
+from measurementResult import MeasurementResult
+from bufferParser import ParseNumericResponse, ParseTextResponse, ToDatetime64
+from resultCache import ResultCache
+from triggerModel import TriggerModel
+from deviceLock import LockedDevice, AtomicDeviceAccess, HIGH
+from cancellation import CancellationToken, POLL_INTERVAL
+from eventLog import DRAIN_COMMAND, ParseEvents, MatchCommands, RaiseForEvents
+from throughputPlanner import MeasurementPlan, EstimateSecondsPerReading, PlanRangeSegments, CURRENT_RANGES, VOLTAGE_RANGES
+
+#Repeats smu.measure.read() count times and prints only the summary (Welford's running mean and variance).
+#Overflowed readings (9.91e37) are counted apart and left out of the statistics. TSP is Lua 5.0, so there is no math.huge.
+STATISTICS_ROUTINE = ('function KdmStatistics(count, buf) '
+                      'local n, overflows, mean, m2, lo, hi = 0, 0, 0, 0, 9.91e37, -9.91e37 '
+                      'for i = 1, count do '
+                      'local x = smu.measure.read(buf) '
+                      'if math.abs(x) >= 9.9e37 then overflows = overflows + 1 else '
+                      'n = n + 1 local d = x - mean mean = mean + d / n m2 = m2 + d * (x - mean) '
+                      'if x < lo then lo = x end if x > hi then hi = x end end '
+                      'end '
+                      'local std = 0 if n > 1 then std = math.sqrt(m2 / (n - 1)) end '
+                      'print(string.format("%d,%d,%.12e,%.12e,%.12e,%.12e", n, overflows, mean, std, lo, hi)) '
+                      'end')
 
 
 class KeithleyDeviceManager(object):
@@ -13,7 +36,7 @@ class KeithleyDeviceManager(object):
         • Measure voltage, current, resistance, or power
     """
         
-    def __init__(self, GPI_or_USB_Address:str=None, EstablishConnectionTest:bool=False):
+    def __init__(self, GPI_or_USB_Address:str=None, EstablishConnectionTest:bool=False, device=None):
         """
         Gets the Physical Address (GPI or USB Address) of the Specified Device and Make an Object With Active Connection to The Device.
         The Address Sample is like: 'GPIB0::12::INSTR' or 'USB0::0x05F3::0x2AE2::01234560::INSTR'
@@ -23,12 +46,13 @@ class KeithleyDeviceManager(object):
         Args:
             GPI_or_USB_Address (str, optional): Gets the Device Port Address and make a connection. Defaults to None.
             EstablishConnectionTest (bool, optional): Tests if the device is connected by sending 3 beep commands to the device. It is possible to test device manually using the fuction TestDeviceConnection(). Defaults to False.
+            device (optional): An already opened session used instead of the address, e.g. simulatedInstrument.SimulatedDevice or traceTransport.ReplayDevice; no VISA library is needed then. Defaults to None.
         """
 
         self.GPI_or_USB_Address = GPI_or_USB_Address
-        self.Device = None
+        self.Device = device
 
-        self.resourceManager = visa.ResourceManager()
+        self.resourceManager = visa.ResourceManager() if device is None else None
        
         #-----------------fields
         self.Source_VoltageRange:float = None
@@ -48,11 +72,16 @@ class KeithleyDeviceManager(object):
         self.isAutoZeroOnce:bool= None
         self.TurnAutoZeroOff:bool= None
         self.ActiveBuffer_Name:str=None
+        self.readBack:bool = True
+        self.sourceDelay:float = None
+        self.measurementPlan:MeasurementPlan = None
         self.ListOfAvailableBuffers = ['defbuffer1','defbuffer2']
+        self.__identity:str = None
+        self.__isStatisticsRoutineLoaded:bool = False
+        self.checkEventLog:bool = True #The event log is checked at the end of each measurement function, see CheckEventLog()
         #-----------------------
         if(EstablishConnectionTest):
             try:
-                self.Device = self.resourceManager.open_resource(self.GPI_or_USB_Address,send_end=False)
                 if (self.Device is None):
                     self.Device = self.resourceManager.open_resource(self.GPI_or_USB_Address,send_end=False)
 
@@ -64,12 +93,64 @@ class KeithleyDeviceManager(object):
             except Exception as ex:
                 print("Somthing went wrong during the connection's test process. The technical error is:\n", ex)
         
-    def PrintAllResources(self):
+    #Every session is used through the lock, so monitor threads can share it with the measurements
+    @property
+    def Device(self):
+        return self.__device
+    @Device.setter
+    def Device(self, device):
+        if((device is None) or isinstance(device, LockedDevice)):
+            self.__device = device
+        else:
+            self.__device = LockedDevice(device)
+    def Atomic(self, priority:int=HIGH, timeout:float=None):
+        """
+        Context manager: the commands sent inside the with statement are not interleaved with the commands of other threads.
+        The measurement functions are atomic by themselves.
+        """
+        if(self.Device is None):
+            raise Exception('There is no connection to the device.')
+        return self.Device.Atomic(priority, timeout)
+    def Poll(self, commandstring:str, timeout:float=None) -> str:
+        """
+        Low priority query for monitor threads, e.g. KDM.Poll('print(defbuffer1.n)'). It is sent between the measurement
+        functions and never inside one. Returns None if the device was not free within timeout seconds.
+        """
+        if(self.Device is None):
+            raise Exception('There is no connection to the device.')
+        return self.Device.Poll(commandstring, timeout)
+    def CheckEventLog(self, raiseErrors:bool=True) -> list:
+        """
+        Drains the errors and warnings of the event log of the device in one query and maps them to the commands sent
+        since the last check. It is called at the end of every measurement function (set checkEventLog to False to
+        turn this off); call it after own commands sent with Device.write().
+
+        Args:
+            raiseErrors (bool, optional): Raises the first error as an eventLog.InstrumentError (CommandError, ExecutionError,
+            DeviceError or QueryError) and reports the warnings with the warnings module. Defaults to True.
+
+        Returns:
+            list: the eventLog.InstrumentEvent objects, oldest first
+        """
+        if(self.Device is None):
+            raise Exception('There is no connection to the device.')
+        with self.Device.Atomic():
+            events = ParseEvents(self.Device.query(DRAIN_COMMAND))
+            #The last command of the journal is the drain itself
+            commands = list(self.Device.journal)[:-1]
+            self.Device.journal.clear()
+        MatchCommands(events, commands)
+        if(raiseErrors):
+            RaiseForEvents(events, batchSize=len(commands))
+        return events
+    def PrintAllResources(self, refresh:bool=False):
         """
         Prints all a list of all the devices which are connected to the running system.
+        The list comes from the discovery cache; set refresh to True to scan the bus again.
         """
-        print(self.resourceManager.list_resources())
+        print(DiscoveryCache(resourceManager=self.resourceManager).ListResources(refresh=refresh))
     #Test Function
+    @AtomicDeviceAccess
     def TestDeviceConnection(self):
         """
         Its a manual test to see if the connection between the device and pyVisa is established or not. Makes the device to beep 3 times.
@@ -88,6 +169,7 @@ class KeithleyDeviceManager(object):
         except Exception as ex:
             print("Error occured during the test of Connecntion to the Device. The technical information is: ",ex)
     #Global Settings    
+    @AtomicDeviceAccess
     def Initialize(self,
                    Source_VoltageRange:float,
                    Source_CurrentRange:float,
@@ -183,7 +265,10 @@ class KeithleyDeviceManager(object):
             self.isAutoZeroOnce=isAutoZeroOnce
             self.TurnAutoZeroOff=TurnAutoZeroOff
             self.ActiveBuffer_Name=None
-            self.readBack:bool=True
+            self.readBack = readBack
+            #A plan applied before (see ApplyMeasurementPlan()) does not hold for the new settings
+            self.measurementPlan = None
+            self.sourceDelay = None
             if(self.Device is None):
                 self.Device = self.resourceManager.open_resource(self.GPI_or_USB_Address,send_end=False)
             if(userDefinedBufferName is not None):
@@ -264,7 +349,8 @@ class KeithleyDeviceManager(object):
                 smu.source.userdelay[N] (on page 8-172
         """
         
-    def ReturnBufferValues(self,bufferName:str=None,return_type:int=2):
+    @AtomicDeviceAccess
+    def ReturnBufferValues(self,bufferName:str=None,return_type:int=2,absoluteTimestamps:bool=False,cache:ResultCache=None):
         """
         Reading buffers capture measurements, ranges, the output state of the instrument, and instrument 
         status. The Model 2450 has two default reading buffers. You can also create user-defined reading 
@@ -279,7 +365,16 @@ class KeithleyDeviceManager(object):
         Args:
             bufferName (str, optional): Gets the name of user-defined reading buffers 
             Defaults to None.
+            absoluteTimestamps (bool, optional): Only for return_type 2. Also reads bufferName.seconds and bufferName.fractionalseconds in one query
+            and adds them as the 'datetimes' column (datetime64[ns], UTC). Use it to merge runs or to correlate with other equipment; it is much
+            smaller and faster than the text columns bufferName.dates and bufferName.times. Defaults to False.
             return_type (str, optional): has different types. 1. AW: means as a whole 2. S: means separated. type 1 returns 1 string full of all datas separated by comma however type 2 returns a disctionary includes each column as a separated data. it is recommended that using the type 2.
+            Type 2 is a MeasurementResult: it is used like the dictionary (result['readings'], result.update(...)) but each column is a NumPy array
+            and the units are categorical. Use result.to_pandas() for a DataFrame and result.to_dict() for the old dictionary of lists.
+            cache (ResultCache, optional): Only for return_type 2. The result is looked up in this cache with a key made of the serial number of
+            the device, a short fingerprint of the buffer (number of readings, first and last time stamp, last reading; one small query) and
+            the settings of Initialize(). If the buffer did not change since the last readout, the cached result is returned without reading
+            and parsing the buffer again. Defaults to None.
         Note: In case you want to modify this method, please add an elif block into this method and make a dictionarz out of your requirements and return it as a return value. 
         Section 8: TSP command reference Model 2450 Interactive SourceMeter® Instrument Reference Manual
         8-96 2450-901-01 Rev. D / May 2015
@@ -318,27 +413,46 @@ class KeithleyDeviceManager(object):
                 result = self.Device.query(commandstringSimple)
                 return result
             elif(return_type == 2):
-                
+                if(cache is not None):
+                    cacheKey = cache.MakeKey('ReturnBufferValues', self.__InstrumentIdentity(), bufferName,
+                                             self.__BufferFingerprint(bufferName), self.__ConfigurationSettings(), absoluteTimestamps)
+                    cachedResult = cache.Get(cacheKey)
+                    if(cachedResult is not None):
+                        return cachedResult
                 commandstring = f'printbuffer({bufferName}.startindex, {bufferName}.endindex, {bufferName}.units)'
-                result_units_readings = pd.read_csv(io.StringIO(self.Device.query(commandstring)),sep=',',header=None)
+                result_units_readings = ParseTextResponse(self.Device.query(commandstring))
                 commandstring2 = f'printbuffer({bufferName}.startindex, {bufferName}.endindex, {bufferName}.readings)'
-                result_readings = pd.read_csv(io.StringIO(self.Device.query(commandstring2)),sep=',',header=None)
+                result_readings = ParseNumericResponse(self.Device.query(commandstring2))
                 commandstring3 = f'printbuffer({bufferName}.startindex, {bufferName}.endindex, {bufferName}.relativetimestamps)'
-                result_timestamp = pd.read_csv(io.StringIO(self.Device.query(commandstring3)),sep=',',header=None)
+                result_timestamp = ParseNumericResponse(self.Device.query(commandstring3))
                 commandstring4 = f'printbuffer({bufferName}.startindex, {bufferName}.endindex, {bufferName}.sourcevalues)'
-                result_sourcevalues = pd.read_csv(io.StringIO(self.Device.query(commandstring4)),sep=',',header=None)
+                result_sourcevalues = ParseNumericResponse(self.Device.query(commandstring4))
                 commandstring5 = f'printbuffer({bufferName}.startindex, {bufferName}.endindex, {bufferName}.sourceunits)'
-                result_sourceunits = pd.read_csv(io.StringIO(self.Device.query(commandstring5)),sep=',',header=None)
-
-                result = {'sourcevalues':result_sourcevalues.values[0].tolist(),
-                          'sourceunits':result_sourceunits.values[0].tolist(),
-                          'readings':result_readings.values[0].tolist(),
-                          'units':result_units_readings.values[0].tolist(),
-                          'timestamps':result_timestamp.values[0].tolist()}
+                result_sourceunits = ParseTextResponse(self.Device.query(commandstring5))
+
+                if(absoluteTimestamps):
+                    #The seconds since 1970 need 10 digits, so the precision is raised for this query only
+                    self.Device.write(f'format.asciiprecision = {max(int(self.ASCII_Percision or 0), 12)}')
+                    commandstring6 = f'printbuffer({bufferName}.startindex, {bufferName}.endindex, {bufferName}.seconds, {bufferName}.fractionalseconds)'
+                    result_seconds = ParseNumericResponse(self.Device.query(commandstring6), numberOfColumns=2)
+                    self.Device.write(f'format.asciiprecision = {str(self.ASCII_Percision)}')
+
+                result = MeasurementResult({'sourcevalues':result_sourcevalues,
+                                            'sourceunits':result_sourceunits,
+                                            'readings':result_readings,
+                                            'units':result_units_readings,
+                                            'timestamps':result_timestamp},
+                                           metadata={'bufferName':bufferName,
+                                                     'address':self.GPI_or_USB_Address,
+                                                     'readoutTime':time.time()})
+                if(absoluteTimestamps):
+                    result['datetimes'] = ToDatetime64(result_seconds[:, 0], result_seconds[:, 1])
                 """
                 result = {'sourcevalues':result_readings.values[0].tolist()}
                 
                 """
+                if(cache is not None):
+                    cache.Put(cacheKey, result)
                 return result
         
         """
@@ -368,6 +482,28 @@ class KeithleyDeviceManager(object):
             
 
         """
+    def __InstrumentIdentity(self) -> str:
+        #*IDN? answers with 'KEITHLEY INSTRUMENTS,MODEL 2450,<serial number>,<firmware>'; asked once per session
+        if(self.__identity is None):
+            self.__identity = self.Device.query('*IDN?').strip()
+        return self.__identity
+    def __BufferFingerprint(self, bufferName:str) -> str:
+        #Changes whenever readings are added or the buffer is cleared, without transferring the buffer
+        commandstring = (f'if {bufferName}.n > 0 then '
+                         f'print(string.format("%d,%d,%.9f,%d,%.9f,%.12e", {bufferName}.n, '
+                         f'{bufferName}.seconds[1], {bufferName}.fractionalseconds[1], '
+                         f'{bufferName}.seconds[{bufferName}.n], {bufferName}.fractionalseconds[{bufferName}.n], '
+                         f'{bufferName}.readings[{bufferName}.n])) '
+                         f'else print("0") end')
+        return self.Device.query(commandstring).strip()
+    def __ConfigurationSettings(self) -> dict:
+        return {'Source_VoltageRange':self.Source_VoltageRange, 'Source_CurrentRange':self.Source_CurrentRange,
+                'Measure_VoltageRange':self.Measure_VoltageRange, 'Measure_CurrentRange':self.Measure_CurrentRange,
+                'Measure_ResistanceRange':self.Measure_ResistanceRange, 'Current_Limit':self.Current_Limit,
+                'Voltage_Limit':self.Voltage_Limit, 'nplc':self.nplc, 'fourWireSensing':self.fourWireSensing,
+                'isFrontTerminalsActive':self.isFrontTerminalsActive, 'isAutoZeroOnce':self.isAutoZeroOnce,
+                'TurnAutoZeroOff':self.TurnAutoZeroOff, 'ASCII_Percision':self.ASCII_Percision,
+                'readBack':self.readBack, 'sourceDelay':self.sourceDelay}
     def SaveDirectlyFromDevice(self, validAddressToSaveFile:str):
         #buffer.save()
         #buffer.saveappend()
@@ -378,6 +514,8 @@ class KeithleyDeviceManager(object):
         try:
             #Only Reset the Device In this Step
             self.Device.write('reset()')
+            #Events of earlier sessions are not errors of this one
+            self.Device.write('eventlog.clear()')
             self.Device.write('display.changescreen(display.SCREEN_USER_SWIPE)')
             self.Device.write('display.clear()')
             self.Device.write('display.settext(display.TEXT1, "Connection is OK!")')
@@ -386,12 +524,26 @@ class KeithleyDeviceManager(object):
             self.__ActivateSpecificBuffer(BufferName_ToActivate)
             #This reset function, removes all user-defined buffers. So, the list should be regenerated.
             self.ListOfAvailableBuffers = ['defbuffer1','defbuffer2']
+            self.__isStatisticsRoutineLoaded = False
         except Exception as ex:
             raise Exception(ex)
-    def __ResetTheConfigurations(self,):
+    def __ResetTheConfigurations(self, measureFunction:str='smu.FUNC_DC_CURRENT', sourceFunction:str='smu.FUNC_DC_VOLTAGE'):
+        #measureFunction and sourceFunction are the functions the caller measures and sources with; the defaults are the functions after smu.reset()
         try:
             #Only Reset the Device In this Step
             self.Device.write('smu.reset()')
+            #Readback and source delay are stored for each source function, so they are set for the function that is used
+            self.Device.write(f'smu.source.func = {sourceFunction}')
+            if(self.readBack):
+                self.Device.write('smu.source.readback = smu.ON') # determines if the instrument records the measured source value or the configured source value when making a measurement
+            else:
+                self.Device.write('smu.source.readback = smu.OFF')
+            if(self.sourceDelay is not None):
+                self.Device.write('smu.source.autodelay = smu.OFF')
+                self.Device.write(f'smu.source.delay = {self.sourceDelay}')
+            #NPLC and autozero are stored for each measure function, so they are set for the function that is used
+            self.Device.write(f'smu.measure.func = {measureFunction}')
+            self.Device.write(f'smu.measure.nplc = {self.nplc if self.nplc is not None else 1}')
             #Automatic reference measurements
             if(self.TurnAutoZeroOff):
                 self.Device.write('smu.measure.autozero.enable = smu.OFF')
@@ -401,14 +553,79 @@ class KeithleyDeviceManager(object):
                 self.Device.write('smu.measure.terminals = smu.TERMINALS_FRONT')
             else:
                 self.Device.write('smu.measure.terminals = smu.TERMINALS_REAR')
+            #One reference measurement, after the measure function is selected
             if(self.isAutoZeroOnce):
                 self.Device.write('smu.measure.autozero.once()')
-            if(self.readBack):
-                self.Device.write('smu.source.readback = smu.ON') # determines if the instrument records the measured source value or the configured source value when making a measurement
-            self.Device.write('smu.measure.nplc=1')
             self.Device.write('tspnet.reset()')
         except Exception as ex:
             raise Exception(ex)
+    def __SourceDelay(self, delayTime:float, defaultDelay:float) -> float:
+        #An explicit delay of the caller wins, then the delay of the measurement plan, then the default of the function
+        if(delayTime is not None):
+            return delayTime
+        if(self.sourceDelay is not None):
+            return self.sourceDelay
+        return defaultDelay
+    def __WaitForTriggerModel(self, cancellationToken:CancellationToken) -> bool:
+        #Without a token the device waits by itself; with a token the state is polled, so the run can be aborted
+        if(cancellationToken is None):
+            self.Device.write('waitcomplete()')
+            return True
+        while True:
+            #e.g. 'trigger.STATE_RUNNING	trigger.STATE_RUNNING	5' (state, state of the last block, block number)
+            state = self.Device.query('print(trigger.model.state())').split()[0]
+            if(state in ('trigger.STATE_IDLE', 'trigger.STATE_ABORTED', 'trigger.STATE_FAILED', 'trigger.STATE_EMPTY')):
+                return True
+            if(cancellationToken.Wait(POLL_INTERVAL)):
+                self.__CancelRun(cancellationToken)
+                return False
+    def __CancelRun(self, cancellationToken:CancellationToken):
+        #Leaves the session usable: nothing runs, the output is off and the partial readings are read back
+        self.Device.write('trigger.model.abort()')
+        self.Device.write('smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
+        self.Device.write('display.clear()')
+        self.Device.write('display.settext(display.TEXT2, "Process Cancelled!")')
+        readingsCount = int(float(self.Device.query(f'print({self.ActiveBuffer_Name}.n)')))
+        cancellationToken.partialResult = self.ReturnBufferValues(bufferName=self.ActiveBuffer_Name) if readingsCount > 0 else None
+        return cancellationToken.partialResult
+    def __ConfigureBurst(self, burstCount:int, filterCount:int):
+        #Set after smu.measure.func, both are stored for each measure function; smu.reset() sets them back
+        if(burstCount is not None):
+            if(not 1 <= burstCount <= 300000):
+                raise Exception(f'The burstCount can be 1 to 300000. The current value is {burstCount} and is not Valid.')
+            self.Device.write(f'smu.measure.count = {int(burstCount)}')
+        if(filterCount is not None):
+            if(not 1 <= filterCount <= 100):
+                raise Exception(f'The filterCount can be 1 to 100. The current value is {filterCount} and is not Valid.')
+            self.Device.write('smu.measure.filter.type = smu.FILTER_REPEAT_AVG')
+            self.Device.write(f'smu.measure.filter.count = {int(filterCount)}')
+            self.Device.write('smu.measure.filter.enable = smu.ON')
+    def __ReadBurst(self, levelsCount:int, burstCount:int) -> np.ndarray:
+        #The buffer was cleared before the first level, so the readings are 1 to levelsCount*burstCount
+        readingsCount = levelsCount * burstCount
+        capacity = int(float(self.Device.query(f'print({self.ActiveBuffer_Name}.capacity)')))
+        if(readingsCount > capacity):
+            raise Exception(f'{readingsCount} readings do not fit in the buffer <{self.ActiveBuffer_Name}> ({capacity} readings); the first ones were overwritten.')
+        readings = ParseNumericResponse(self.Device.query(f'printbuffer(1, {readingsCount}, {self.ActiveBuffer_Name}.readings)'))
+        return readings.reshape(levelsCount, burstCount)
+    def UploadStatisticsRoutine(self):
+        """
+        Uploads the TSP function used by the repeatCount option of the Send* functions (once per session). It is uploaded
+        by the first such measurement anyway; call it beforehand to keep the upload out of a timed run.
+        """
+        if(not self.__isStatisticsRoutineLoaded):
+            self.Device.write(STATISTICS_ROUTINE)
+            self.__isStatisticsRoutineLoaded = True
+    def __MeasureStatistics(self, repeatCount:int) -> dict:
+        #Measures repeatCount times on the device; only count, mean, std, min and max are sent back
+        if(repeatCount < 1):
+            raise Exception(f'The repeatCount must be at least 1. The current value is {repeatCount} and is not Valid.')
+        self.UploadStatisticsRoutine()
+        values = self.Device.query(f'KdmStatistics({int(repeatCount)}, {self.ActiveBuffer_Name})').strip().split(',')
+        count, overflows = int(values[0]), int(values[1])
+        mean, std, minimum, maximum = (float(value) if count > 0 else float('nan') for value in values[2:6])
+        return {'count':count, 'overflows':overflows, 'mean':mean, 'std':std if count > 1 else float('nan'),
+                'min':minimum, 'max':maximum}
     #To Store the measurements inside a user-defined buffer
     def __MakeUserDefinedBuffer(self, bufferName:str='testBuffer1', bufferCapacity:int=100):
         """
@@ -446,6 +663,7 @@ class KeithleyDeviceManager(object):
         except Exception as ex:
             raise Exception(ex)
     #In case it is required to toggle between 4wire measurement and 2wire measurement
+    @AtomicDeviceAccess
     def ChangeTerminals(self, 
                         ActiveRearChannels:bool = False,
                         ) ->None:
@@ -460,6 +678,65 @@ class KeithleyDeviceManager(object):
         except Exception as ex:
             raise Exception(ex)
     
+    @AtomicDeviceAccess
+    def RunTriggerModel(self, model:TriggerModel, waitComplete:bool=True, cancellationToken:CancellationToken=None) -> bool:
+        """
+        Uploads a trigger model built with triggerModel.TriggerModel in one write and starts it. The model is
+        validated before anything is sent. Configure the source and measure functions (and the configuration lists
+        the model uses) before calling this function.
+
+        Args:
+            model (TriggerModel): The blocks to run.
+            waitComplete (bool, optional): Waits until the trigger model is finished. Defaults to True.
+            cancellationToken (CancellationToken, optional): Waits by polling the trigger model state; cancelling it aborts the model and switches
+            the output off. The readings of the active buffer are kept in cancellationToken.partialResult. Defaults to None.
+
+        Returns:
+            bool: False if the run was cancelled
+        """
+        try:
+            self.Device.write(model.Compile())
+            self.Device.write('trigger.model.initiate()')
+            if(waitComplete):
+                return self.__WaitForTriggerModel(cancellationToken)
+            return True
+        except Exception as ex:
+            raise Exception(ex)
+    @AtomicDeviceAccess
+    def ApplyMeasurementPlan(self, plan:MeasurementPlan) -> float:
+        """
+        Applies the settings chosen by throughputPlanner.PlanThroughput() (NPLC, autozero, readback, source delay and fixed ranges).
+        They are stored like the settings of Initialize(), so every Send* and Sweep_* function uses them from now on.
+        The delay of the plan replaces the default delay of the sweeps; a delay passed to a function explicitly is still used.
+
+        Args:
+            plan (MeasurementPlan): The settings to apply.
+
+        Returns:
+            float: the expected readings per second
+        """
+        self.nplc = plan.nplc
+        self.TurnAutoZeroOff = plan.autoZero != 'on'
+        self.isAutoZeroOnce = plan.autoZero == 'once'
+        self.readBack = plan.readBack
+        self.sourceDelay = plan.sourceDelay
+        for rangeName in ('Source_VoltageRange', 'Source_CurrentRange', 'Measure_VoltageRange', 'Measure_CurrentRange', 'Measure_ResistanceRange'):
+            if(getattr(plan, rangeName) is not None):
+                setattr(self, rangeName, getattr(plan, rangeName))
+        self.measurementPlan = plan
+        if(self.Device is not None):
+            self.__ResetTheConfigurations()
+        return plan.expectedReadingsPerSecond
+    def ExpectedReadingsPerSecond(self, lineFrequency:float=50) -> float:
+        """
+        Estimates the reading rate of the present settings (see throughputPlanner for the time model).
+        """
+        autoZero = 'on' if not self.TurnAutoZeroOff else ('once' if self.isAutoZeroOnce else 'off')
+        fixedRanges = (self.Measure_CurrentRange is not None or self.Measure_VoltageRange is not None
+                       or self.Measure_ResistanceRange is not None)
+        return 1 / EstimateSecondsPerReading(self.nplc if self.nplc is not None else 1, autoZero, self.readBack,
+                                             self.sourceDelay, fixedRanges, lineFrequency)
+
     #----------------Configuration-------------------------------
     """
     Instrument configuration:
@@ -488,6 +765,7 @@ class KeithleyDeviceManager(object):
 
     #----------------Mesurement Functions------------------------
     #Measurement Function -> Send Voltage, Gets Current  
+    @AtomicDeviceAccess
     def SendVoltage_MeasureCurrent(self,
                                    MaxVoltageProtectionLimit:int = None,
                                    Voltage_Range:float=None,
@@ -500,11 +778,19 @@ class KeithleyDeviceManager(object):
                                    measure_Limit_beep_On_Limit_high_Exceeds:bool=False,
                                    bufferName:str=None,
                                    showOutputasPrint:bool=False,
+                                   repeatCount:int=None,
+                                   burstCount:int=None,
+                                   filterCount:int=None,
                                    ) -> List[float]:
         """
         Args:
             SourceLevel_Voltage (float): _description_
             MaxVoltageProtectionLimit (int, optional): _description_. Defaults to None.
+            repeatCount (int, optional): Measures repeatCount times and returns only the statistics computed on the device
+                                         ({'count','overflows','mean','std','min','max'}). Defaults to None.
+            burstCount (int, optional): Takes burstCount readings back to back at each level (smu.measure.count) and returns
+                                        them as a 2-D array (levels x burstCount). Defaults to None.
+            filterCount (int, optional): Each reading is the repeat average of filterCount measurements (smu.measure.filter). Defaults to None.
 
         Returns:
             List[float]: _description_
@@ -566,7 +852,7 @@ class KeithleyDeviceManager(object):
             if(bufferName is not None):
                 self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
             self.Device.write('trigger.model.delay()')
             #Measurement Conditions
             if(measure_Range is None):
@@ -598,11 +884,27 @@ class KeithleyDeviceManager(object):
                 self.Device.write(f'smu.source.level = {VoltageLevel}')
             if(sourceLimit_i is not None):
                 self.Device.write(f'smu.source.ilimit.level = {sourceLimit_i}')
+            if((repeatCount is not None) and (burstCount is not None)):
+                raise Exception('repeatCount and burstCount cannot be used together.')
+            self.__ConfigureBurst(burstCount, filterCount)
             self.Device.write(f'smu.source.output = smu.ON') #Enables the Source Output. Beginnig of the Measurement.
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
-            self.Device.write(f'smu.measure.read({self.ActiveBuffer_Name})')
+            if(repeatCount is not None):
+                #Only the summary is read back, however large repeatCount is
+                statistics = self.__MeasureStatistics(repeatCount)
+            else:
+                self.Device.write(f'smu.measure.read({self.ActiveBuffer_Name})')
             self.Device.write(f'smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
             #---------------------------------------------------Show in the output------------------------------
+            if(burstCount is not None):
+                burst = self.__ReadBurst(1, burstCount)
+                if(showOutputasPrint):
+                    print(burst)
+                return burst
+            if(repeatCount is not None):
+                if(showOutputasPrint):
+                    print(statistics)
+                return statistics
             if(showOutputasPrint):
                 print(f"source voltage Range: {Voltage_Range}")
                 print(f"Measured Current:")
@@ -612,6 +914,7 @@ class KeithleyDeviceManager(object):
 
         except Exception as ex:
             raise Exception(ex)
+    @AtomicDeviceAccess
     def SendVoltageList_MeasureCurrents(self,
                                    MaxVoltageProtectionLimit:int = None,
                                    Voltage_Range:float=None,
@@ -625,11 +928,16 @@ class KeithleyDeviceManager(object):
                                    bufferName:str=None,
                                    showOutputasPrint:bool=False,
                                    delay:float=0.01,
+                                   burstCount:int=None,
+                                   filterCount:int=None,
                                    ) -> List[float]:
         """
         Args:
             SourceLevel_Voltage (float): _description_
             MaxVoltageProtectionLimit (int, optional): _description_. Defaults to None.
+            burstCount (int, optional): Takes burstCount readings back to back at each level (smu.measure.count) and returns
+                                        them as a 2-D array (levels x burstCount). Defaults to None.
+            filterCount (int, optional): Each reading is the repeat average of filterCount measurements (smu.measure.filter). Defaults to None.
 
         Returns:
             List[float]: _description_
@@ -691,7 +999,7 @@ class KeithleyDeviceManager(object):
             if(bufferName is not None):
                 self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
             self.Device.write('trigger.model.delay()')
             #Measurement Conditions
             if(measure_Range is None):
@@ -722,6 +1030,7 @@ class KeithleyDeviceManager(object):
                 self.Device.write(f'smu.source.ilimit.level = {sourceLimit_i}')
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
             
+            self.__ConfigureBurst(burstCount, filterCount)
             self.Device.write(f'smu.source.output = smu.ON') #Enables the Source Output. Beginnig of the Measurement.
             if(len(VoltageLevelList) > 0):
                 for VoltageLevel in VoltageLevelList:
@@ -731,6 +1040,11 @@ class KeithleyDeviceManager(object):
             self.Device.write(f'smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
             
             #---------------------------------------------------Show in the output------------------------------
+            if(burstCount is not None):
+                burst = self.__ReadBurst(len(VoltageLevelList), burstCount)
+                if(showOutputasPrint):
+                    print(burst)
+                return burst
             if(showOutputasPrint):
                 print(f"source voltage Range: {Voltage_Range}")
                 print(f"Measured Current:")
@@ -741,6 +1055,7 @@ class KeithleyDeviceManager(object):
         except Exception as ex:
             raise Exception(ex)
     #Measurement Function -> Send Current, Gets Voltage 
+    @AtomicDeviceAccess
     def SendCurrent_MeasureVoltage(self,
                                    MaxVoltageProtectionLimit:int = None,
                                    Current_Range:float=None,
@@ -753,11 +1068,19 @@ class KeithleyDeviceManager(object):
                                    measure_Limit_beep_On_Limit_high_Exceeds:bool=False,
                                    bufferName:str=None,
                                    showOutputasPrint:bool=False,
+                                   repeatCount:int=None,
+                                   burstCount:int=None,
+                                   filterCount:int=None,
                                    ) -> List[float]:
         """
         Args:
             SourceLevel_Voltage (float): _description_
             MaxVoltageProtectionLimit (int, optional): _description_. Defaults to None.
+            repeatCount (int, optional): Measures repeatCount times and returns only the statistics computed on the device
+                                         ({'count','overflows','mean','std','min','max'}). Defaults to None.
+            burstCount (int, optional): Takes burstCount readings back to back at each level (smu.measure.count) and returns
+                                        them as a 2-D array (levels x burstCount). Defaults to None.
+            filterCount (int, optional): Each reading is the repeat average of filterCount measurements (smu.measure.filter). Defaults to None.
 
         Returns:
             List[float]: _description_
@@ -819,7 +1142,7 @@ class KeithleyDeviceManager(object):
             if(bufferName is not None):
                 self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_VOLTAGE', 'smu.FUNC_DC_CURRENT')
             self.Device.write('trigger.model.delay()')
             #Measurement Conditions
             if(measure_Range is None):
@@ -851,10 +1174,26 @@ class KeithleyDeviceManager(object):
             if(sourceLimit_v is not None):
                 self.Device.write(f'smu.source.vlimit.level = {sourceLimit_v}')
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
+            if((repeatCount is not None) and (burstCount is not None)):
+                raise Exception('repeatCount and burstCount cannot be used together.')
+            self.__ConfigureBurst(burstCount, filterCount)
             self.Device.write(f'smu.source.output = smu.ON') #Enables the Source Output. Beginnig of the Measurement.
-            self.Device.write(f'smu.measure.read({self.ActiveBuffer_Name})')
+            if(repeatCount is not None):
+                #Only the summary is read back, however large repeatCount is
+                statistics = self.__MeasureStatistics(repeatCount)
+            else:
+                self.Device.write(f'smu.measure.read({self.ActiveBuffer_Name})')
             self.Device.write(f'smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
             #---------------------------------------------------Show in the output------------------------------
+            if(burstCount is not None):
+                burst = self.__ReadBurst(1, burstCount)
+                if(showOutputasPrint):
+                    print(burst)
+                return burst
+            if(repeatCount is not None):
+                if(showOutputasPrint):
+                    print(statistics)
+                return statistics
             if(showOutputasPrint):
                 print(f"source current Range: {Current_Range}")
                 print(f"Measured Voltage:")
@@ -864,6 +1203,7 @@ class KeithleyDeviceManager(object):
 
         except Exception as ex:
             raise Exception(ex)
+    @AtomicDeviceAccess
     def SendCurrentList_MeasureVoltages(self,
                                    MaxVoltageProtectionLimit:int = None,
                                    Current_Range:float=None,
@@ -877,11 +1217,16 @@ class KeithleyDeviceManager(object):
                                    bufferName:str=None,
                                    showOutputasPrint:bool=False,
                                    delay:float = 0.01,
+                                   burstCount:int=None,
+                                   filterCount:int=None,
                                    ) -> List[float]:
         """
         Args:
             SourceLevel_Voltage (float): _description_
             MaxVoltageProtectionLimit (int, optional): _description_. Defaults to None.
+            burstCount (int, optional): Takes burstCount readings back to back at each level (smu.measure.count) and returns
+                                        them as a 2-D array (levels x burstCount). Defaults to None.
+            filterCount (int, optional): Each reading is the repeat average of filterCount measurements (smu.measure.filter). Defaults to None.
 
         Returns:
             List[float]: _description_
@@ -943,7 +1288,7 @@ class KeithleyDeviceManager(object):
             if(bufferName is not None):
                 self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_VOLTAGE', 'smu.FUNC_DC_CURRENT')
             #self.Device.write('trigger.model.delay()')
             #Measurement Conditions
             if(measure_Range is None):
@@ -975,6 +1320,7 @@ class KeithleyDeviceManager(object):
                 self.Device.write(f'smu.source.vlimit.level = {sourceLimit_v}')
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
             
+            self.__ConfigureBurst(burstCount, filterCount)
             self.Device.write(f'smu.source.output = smu.ON') #Enables the Source Output. Beginnig of the Measurement.
             if(len(CurrentLevelList) > 0):
                 for CurrentLevel in CurrentLevelList:
@@ -983,6 +1329,11 @@ class KeithleyDeviceManager(object):
                     self.Device.write(f'delay({str(delay)})')
             self.Device.write(f'smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
             #---------------------------------------------------Show in the output------------------------------
+            if(burstCount is not None):
+                burst = self.__ReadBurst(len(CurrentLevelList), burstCount)
+                if(showOutputasPrint):
+                    print(burst)
+                return burst
             if(showOutputasPrint):
                 print(f"source current Range: {Current_Range}")
                 print(f"Measured Voltage:")
@@ -993,6 +1344,7 @@ class KeithleyDeviceManager(object):
         except Exception as ex:
             raise Exception(ex)
     #Measurement Function -> Send Current, Gets Resitance
+    @AtomicDeviceAccess
     def SendCurrent_MeasureResistance(self,
                                    MaxVoltageProtectionLimit:int = None,
                                    Current_Range:float=None,
@@ -1005,6 +1357,7 @@ class KeithleyDeviceManager(object):
                                    measure_Limit_beep_On_Limit_high_Exceeds:bool=False,
                                    bufferName:str=None,
                                    showOutputasPrint:bool=False,
+                                   repeatCount:int=None,
                                    ):
         try:
             #Check if the Protection Limit is Valid.
@@ -1020,7 +1373,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Send C - Measure R")')
             self.Device.write('display.settext(display.TEXT2, "OneTime Measurement")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_RESISTANCE', 'smu.FUNC_DC_CURRENT')
             #Measurement Conditions
             if(measure_Range is None):
                 measure_Range = self.Measure_ResistanceRange
@@ -1058,9 +1411,17 @@ class KeithleyDeviceManager(object):
                 self.Device.write(f'smu.source.vlimit.level = {sourceLimit_v}')
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
             self.Device.write(f'smu.source.output = smu.ON') #Enables the Source Output. Beginnig of the Measurement.
-            self.Device.write(f'smu.measure.read({self.ActiveBuffer_Name})')
+            if(repeatCount is not None):
+                #Only the summary is read back, however large repeatCount is
+                statistics = self.__MeasureStatistics(repeatCount)
+            else:
+                self.Device.write(f'smu.measure.read({self.ActiveBuffer_Name})')
             self.Device.write(f'smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
             #---------------------------------------------------Show in the output------------------------------
+            if(repeatCount is not None):
+                if(showOutputasPrint):
+                    print(statistics)
+                return statistics
             if(showOutputasPrint):
                 print(f"source current Range: {Current_Range}")
                 print(f"Measured Resitance:")
@@ -1070,6 +1431,7 @@ class KeithleyDeviceManager(object):
 
         except Exception as ex:
             raise Exception(ex)
+    @AtomicDeviceAccess
     def SendCurrent_MeasureVoltage_CalculateResistance(self,
                                    MaxVoltageProtectionLimit:int = None,
                                    Current_Range:float=None,
@@ -1082,6 +1444,7 @@ class KeithleyDeviceManager(object):
                                    measure_Limit_beep_On_Limit_high_Exceeds:bool=False,
                                    bufferName:str=None,
                                    showOutputasPrint:bool=False,
+                                   repeatCount:int=None,
                                    ):
         try:
             #Check if the Protection Limit is Valid.
@@ -1097,7 +1460,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Send C - Measure V")')
             self.Device.write('display.settext(display.TEXT2, "Calculate R")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_VOLTAGE', 'smu.FUNC_DC_CURRENT')
             self.Device.write('trigger.model.delay()')
             #Measurement Conditions
             if(measure_Range is None):
@@ -1136,9 +1499,17 @@ class KeithleyDeviceManager(object):
                 self.Device.write(f'smu.source.vlimit.level = {sourceLimit_v}')
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
             self.Device.write(f'smu.source.output = smu.ON') #Enables the Source Output. Beginnig of the Measurement.
-            self.Device.write(f'smu.measure.read({self.ActiveBuffer_Name})')
+            if(repeatCount is not None):
+                #Only the summary is read back, however large repeatCount is
+                statistics = self.__MeasureStatistics(repeatCount)
+            else:
+                self.Device.write(f'smu.measure.read({self.ActiveBuffer_Name})')
             self.Device.write(f'smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
             #---------------------------------------------------Show in the output------------------------------
+            if(repeatCount is not None):
+                if(showOutputasPrint):
+                    print(statistics)
+                return statistics
             if(showOutputasPrint):
                 print(f"source current Range: {Current_Range}")
                 print(f"Calculated Resitance:")
@@ -1148,6 +1519,7 @@ class KeithleyDeviceManager(object):
 
         except Exception as ex:
             raise Exception(ex)
+    @AtomicDeviceAccess
     def SendVoltage_MeasureCurrent_CalculateResistance(self,
                                    MaxVoltageProtectionLimit:int = None,
                                    Voltage_Range:float=None,
@@ -1160,6 +1532,7 @@ class KeithleyDeviceManager(object):
                                    measure_Limit_beep_On_Limit_high_Exceeds:bool=False,
                                    bufferName:str=None,
                                    showOutputasPrint:bool=False,
+                                   repeatCount:int=None,
                                    ):
         try:
             #Check if the Protection Limit is Valid.
@@ -1175,7 +1548,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Send C - Measure V")')
             self.Device.write('display.settext(display.TEXT2, "Calculate R")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
             #Measurement Conditions
             if(measure_Range is None):
                 measure_Range = self.Measure_CurrentRange
@@ -1214,9 +1587,17 @@ class KeithleyDeviceManager(object):
                 self.Device.write(f'smu.source.ilimit.level = {sourceLimit_i}')
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
             self.Device.write(f'smu.source.output = smu.ON') #Enables the Source Output. Beginnig of the Measurement.
-            self.Device.write(f'smu.measure.read({self.ActiveBuffer_Name})')
+            if(repeatCount is not None):
+                #Only the summary is read back, however large repeatCount is
+                statistics = self.__MeasureStatistics(repeatCount)
+            else:
+                self.Device.write(f'smu.measure.read({self.ActiveBuffer_Name})')
             self.Device.write(f'smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
             #---------------------------------------------------Show in the output------------------------------
+            if(repeatCount is not None):
+                if(showOutputasPrint):
+                    print(statistics)
+                return statistics
             if(showOutputasPrint):
                 print(f"source current Range: {Voltage_Range}")
                 print(f"Calculated Resitance:")
@@ -1226,19 +1607,87 @@ class KeithleyDeviceManager(object):
             
         except Exception as ex:
             raise Exception(ex)
+    #Measurement Function -> Measures only, in bursts (digitizing)
+    @AtomicDeviceAccess
+    def MeasureOnly_Burst(self,
+                          measureFunction:str='VOLTAGE',
+                          burstCount:int=100,
+                          burstsNumber:int=1,
+                          measure_Range:float=None,
+                          filterCount:int=None,
+                          bufferName:str=None,
+                          showOutputasPrint:bool=False,
+                          ) -> np.ndarray:
+        """
+        Measures without changing the source: as a voltmeter (0 A is sourced) or as an ammeter (0 V is sourced).
+        The readings of each burst are taken back to back by the device with the timing of the device.
+
+        Args:
+            measureFunction (str, optional): 'VOLTAGE' or 'CURRENT'. Defaults to 'VOLTAGE'.
+            burstCount (int, optional): Readings of each burst (smu.measure.count). Defaults to 100.
+            burstsNumber (int, optional): Number of bursts. Defaults to 1.
+            measure_Range (float, optional): Measure range; also used as the limit of the 0 A / 0 V source. Defaults to the range given to Initialize().
+            filterCount (int, optional): Each reading is the repeat average of filterCount measurements. Defaults to None.
+            bufferName (str, optional): Defaults to the active buffer.
+            showOutputasPrint (bool, optional): Defaults to False.
+
+        Returns:
+            np.ndarray: the readings, burstsNumber x burstCount. Use a low nplc in Initialize() for fast digitizing.
+        """
+        try:
+            measureFunction = measureFunction.upper()
+            if(measureFunction not in ('VOLTAGE', 'CURRENT')):
+                raise Exception(f'The measureFunction can be VOLTAGE or CURRENT. The current value is {measureFunction} and is not Valid.')
+            if(burstsNumber < 1):
+                raise Exception(f'The burstsNumber must be at least 1. The current value is {burstsNumber} and is not Valid.')
+            if(bufferName is not None):
+                self.__ActivateSpecificBuffer(bufferName=bufferName)
+            if(measureFunction == 'VOLTAGE'):
+                if(measure_Range is None):
+                    measure_Range = self.Measure_VoltageRange
+                self.__ResetTheConfigurations('smu.FUNC_DC_VOLTAGE', 'smu.FUNC_DC_CURRENT')
+                self.Device.write('smu.measure.func = smu.FUNC_DC_VOLTAGE')
+                self.Device.write('smu.source.func = smu.FUNC_DC_CURRENT')
+                limitName = 'vlimit'
+            else:
+                if(measure_Range is None):
+                    measure_Range = self.Measure_CurrentRange
+                self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
+                self.Device.write('smu.measure.func = smu.FUNC_DC_CURRENT')
+                self.Device.write('smu.source.func = smu.FUNC_DC_VOLTAGE')
+                limitName = 'ilimit'
+            #---> measure.range will always set after source.func is set
+            if(measure_Range is not None):
+                self.Device.write(f'smu.measure.range = {measure_Range}')
+                self.Device.write(f'smu.source.{limitName}.level = {measure_Range}')
+            self.Device.write('smu.source.level = 0')
+            self.__ConfigureBurst(burstCount, filterCount)
+            self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
+            self.Device.write(f'smu.source.output = smu.ON') #Enables the Source Output. Beginnig of the Measurement.
+            self.Device.write(f'for i = 1, {int(burstsNumber)} do smu.measure.read({self.ActiveBuffer_Name}) end')
+            self.Device.write(f'smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
+            bursts = self.__ReadBurst(burstsNumber, burstCount)
+            if(showOutputasPrint):
+                print(f"Measured {measureFunction.lower()} ({burstsNumber} x {burstCount}):")
+                print(bursts)
+            return bursts
+        except Exception as ex:
+            raise Exception(ex)
     #------------------------------------------------------------
 
     #----------------SweepLinear Functions------------------------
     #Swepp logarithmic - Sweep Voltage, Measures Current
+    @AtomicDeviceAccess
     def logarithmic_sweepcaseByPoints_Voltage(self,
                    ArbitraryConfigurationName:str,
                    startValue:float,
                    stopValue:float,
                    pointsToMeasure:int=10,
-                   delayTime:float=0.00005,
+                   delayTime:float=None,
                    Iterations:int=1,
                    dual:bool=False,
-                   bufferName:str=None):
+                   bufferName:str=None,
+                   cancellationToken:CancellationToken=None):
        
         try:
             if(bufferName is not None):
@@ -1248,7 +1697,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Pulse V - Measure C")')
             self.Device.write('display.settext(display.TEXT2, "SweepLinearByPoints")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
             self.__ActivateSpecificBuffer(bufferName=bufferName)
             self.Device.write('smu.source.func = smu.FUNC_DC_VOLTAGE')
             self.Device.write('smu.source.range = 20')
@@ -1258,12 +1707,13 @@ class KeithleyDeviceManager(object):
             self.Device.write('trigger.model.initiate()')
           
            
-            commandString = f'smu.source.sweeplinear("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {delayTime}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual}, {self.ActiveBuffer_Name})'
+            commandString = f'smu.source.sweeplinear("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {self.__SourceDelay(delayTime, 0.00005)}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual}, {self.ActiveBuffer_Name})'
             
             self.Device.write(commandString)
             
             self.Device.write('trigger.model.initiate()')
-            self.Device.write('waitcomplete()')
+            if(not self.__WaitForTriggerModel(cancellationToken)):
+                return cancellationToken.partialResult
             self.Device.write('trigger.model.delay(0.00001)')
             #Notification
             self.Device.write('display.clear()')
@@ -1301,16 +1751,18 @@ class KeithleyDeviceManager(object):
             biasVoltage (float): _description_
         """
     
+    @AtomicDeviceAccess
     def Sweep_LinearcaseByPoints_Voltage(self,
                    ArbitraryConfigurationName:str,
                    startValue:float,
                    stopValue:float,
                    pointsToMeasure:int=10,
-                   delayTime:float=0.00005,
+                   delayTime:float=None,
                    Iterations:int=1,
                    failAbort:bool=False,
                    dual:bool=False,
-                   bufferName:str=None):
+                   bufferName:str=None,
+                   cancellationToken:CancellationToken=None):
         """
         
         When the sweep is started, the instrument sources a specific voltage or current value to the device 
@@ -1367,7 +1819,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Pulse V - Measure C")')
             self.Device.write('display.settext(display.TEXT2, "SweepLinearByPoints")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
             self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Measurement Conditions
             self.Device.write(f'smu.measure.func = smu.FUNC_DC_CURRENT')
@@ -1387,7 +1839,7 @@ class KeithleyDeviceManager(object):
                 failAbortCommand = "smu.ON"
             else:
                 failAbortCommand = "smu.OFF"
-            commandString = f'smu.source.sweeplinear("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {delayTime}, {Iterations}, smu.RANGE_FIXED, {failAbortCommand}, {dual}, {self.ActiveBuffer_Name})'
+            commandString = f'smu.source.sweeplinear("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {self.__SourceDelay(delayTime, 0.00005)}, {Iterations}, smu.RANGE_FIXED, {failAbortCommand}, {dual}, {self.ActiveBuffer_Name})'
             #Send the Ccommand
             #time.sleep(1)
             self.Device.write(commandString)
@@ -1395,7 +1847,8 @@ class KeithleyDeviceManager(object):
             #Instead it uses triggers.
             #Run the sweep command
             self.Device.write('trigger.model.initiate()')
-            self.Device.write('waitcomplete()')
+            if(not self.__WaitForTriggerModel(cancellationToken)):
+                return cancellationToken.partialResult
             self.Device.write('trigger.model.delay(0.00001)')
             #Notification
             self.Device.write('display.clear()')
@@ -1434,16 +1887,18 @@ class KeithleyDeviceManager(object):
             biasVoltage (float): _description_
         """
     
+    @AtomicDeviceAccess
     def Sweep_LinearcaseByStep_Voltage(self,
                 ArbitraryConfigurationName:str,
                 startValue:float,
                 stopValue:float,
                 stepValue:int,
-                delayTime:float=0,
+                delayTime:float=None,
                 Iterations:int=1,
                 failAbort:bool=False,
                 dual:bool=False,
-                bufferName:str=None):
+                bufferName:str=None,
+                cancellationToken:CancellationToken=None):
         if(bufferName is not None):
             self.ActiveBuffer_Name = bufferName
         """
@@ -1499,7 +1954,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Pulse V - Measure C")')
             self.Device.write('display.settext(display.TEXT2, "SweepLinearByStep")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
             self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Measurement Conditions
             self.Device.write(f'smu.measure.func = smu.FUNC_DC_CURRENT')
@@ -1518,30 +1973,33 @@ class KeithleyDeviceManager(object):
                 failAbortCommand = "smu.ON"
             else:
                 failAbortCommand = "smu.OFF"
-            commandString = f'smu.source.sweeplinearstep("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {stepValue}, {delayTime}, {Iterations}, smu.RANGE_FIXED, {failAbortCommand}, {dual},{self.ActiveBuffer_Name})'
+            commandString = f'smu.source.sweeplinearstep("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {stepValue}, {self.__SourceDelay(delayTime, 0)}, {Iterations}, smu.RANGE_FIXED, {failAbortCommand}, {dual},{self.ActiveBuffer_Name})'
             #Send the commands
             self.Device.write(commandString)
             #Sweep mechanism does not require smu.source.output = smu.ON command.
             #Instead it uses triggers.
             #Run the sweep command
             self.Device.write('trigger.model.initiate()')
-            self.Device.write('waitcomplete()')
+            if(not self.__WaitForTriggerModel(cancellationToken)):
+                return cancellationToken.partialResult
             self.Device.write('trigger.model.delay()')
             #Notification
             self.Device.write('display.clear()')
             self.Device.write('display.settext(display.TEXT2, "Process Successful!")')
         except Exception as ex:
             raise Exception(ex)
+    @AtomicDeviceAccess
     def Sweeplog_ByPoints_Voltage(self,
                 ArbitraryConfigurationName:str,
                 startValue:float,
                 stopValue:float,
                 pointsToMeasure:int,
-                delayTime:float=0,
+                delayTime:float=None,
                 Iterations:int=1,
                 failAbort:bool=False,
                 dual:bool=False,
-                bufferName:str=None):
+                bufferName:str=None,
+                cancellationToken:CancellationToken=None):
         if(bufferName is not None):
             self.ActiveBuffer_Name = bufferName
         """
@@ -1600,7 +2058,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Pulse V - Measure C")')
             self.Device.write('display.settext(display.TEXT2, "SweepLogByPoints")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
             self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Measurement Conditions
             self.Device.write(f'smu.measure.func = smu.FUNC_DC_CURRENT')
@@ -1619,14 +2077,15 @@ class KeithleyDeviceManager(object):
                 failAbortCommand = "smu.ON"
             else:
                 failAbortCommand = "smu.OFF"
-            commandString = f'smu.source.sweeplog("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {delayTime}, {Iterations}, smu.RANGE_FIXED, {failAbortCommand}, {dual},{self.ActiveBuffer_Name})'
+            commandString = f'smu.source.sweeplog("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {self.__SourceDelay(delayTime, 0)}, {Iterations}, smu.RANGE_FIXED, {failAbortCommand}, {dual},{self.ActiveBuffer_Name})'
             #Send the commands
             self.Device.write(commandString)
             #Sweep mechanism does not require smu.source.output = smu.ON command.
             #Instead it uses triggers.
             #Run the sweep command
             self.Device.write('trigger.model.initiate()')
-            self.Device.write('waitcomplete()')
+            if(not self.__WaitForTriggerModel(cancellationToken)):
+                return cancellationToken.partialResult
             self.Device.write('trigger.model.delay()')
             #Notification
             self.Device.write('display.clear()')
@@ -1635,15 +2094,17 @@ class KeithleyDeviceManager(object):
             raise Exception(ex)
     
     #Swepp Linear - Sweep Current, Measures Voltage
+    @AtomicDeviceAccess
     def Sweep_LinearcaseByPoints_Current(self,
                    ArbitraryConfigurationName:str,
                    startValue:float,
                    stopValue:float,
                    pointsToMeasure:int=10,
-                   delayTime:float=0,
+                   delayTime:float=None,
                    Iterations:int=1,
                    dual:bool=False,
-                   bufferName:str=None):
+                   bufferName:str=None,
+                   cancellationToken:CancellationToken=None):
         """
         
         When the sweep is started, the instrument sources a specific voltage or current value to the device 
@@ -1700,7 +2161,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Pulse V - Measure C")')
             self.Device.write('display.settext(display.TEXT2, "SweepLinearByPoints")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_VOLTAGE', 'smu.FUNC_DC_CURRENT')
             self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Measurement Conditions
             self.Device.write(f'smu.measure.func = smu.FUNC_DC_VOLTAGE')
@@ -1715,14 +2176,15 @@ class KeithleyDeviceManager(object):
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
             #Sweep Function
             #sample: smu.source.sweeplinear(configListName, start, stop, points, delay, count, rangeType, failAbort, dual, bufferName)
-            commandString = f'smu.source.sweeplinear("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {delayTime}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual}, {self.ActiveBuffer_Name})'
+            commandString = f'smu.source.sweeplinear("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {self.__SourceDelay(delayTime, 0)}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual}, {self.ActiveBuffer_Name})'
             #Send the Ccommand
             self.Device.write(commandString)
             #Sweep mechanism does not require smu.source.output = smu.ON command.
             #Instead it uses triggers.
             #Run the sweep command
             self.Device.write('trigger.model.initiate()')
-            self.Device.write('waitcomplete()')
+            if(not self.__WaitForTriggerModel(cancellationToken)):
+                return cancellationToken.partialResult
             self.Device.write('trigger.model.delay()')
             #Notification
             self.Device.write('display.clear()')
@@ -1760,15 +2222,17 @@ class KeithleyDeviceManager(object):
         
             biasVoltage (float): _description_
         """
+    @AtomicDeviceAccess
     def Sweep_LinearcaseByStep_Current(self,
                 ArbitraryConfigurationName:str,
                 startValue:float,
                 stopValue:float,
                 stepValue:int,
-                delayTime:float=0,
+                delayTime:float=None,
                 Iterations:int=1,
                 dual:bool=False,
-                bufferName:str=None):
+                bufferName:str=None,
+                cancellationToken:CancellationToken=None):
         if(bufferName is not None):
             self.ActiveBuffer_Name = bufferName
         """
@@ -1824,7 +2288,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Pulse V - Measure C")')
             self.Device.write('display.settext(display.TEXT2, "SweepLinearByStep")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_VOLTAGE', 'smu.FUNC_DC_CURRENT')
             self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Measurement Conditions
             self.Device.write(f'smu.measure.func = smu.FUNC_DC_VOLTAGE')
@@ -1839,14 +2303,15 @@ class KeithleyDeviceManager(object):
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
             #Sweep Function:
             #sample: smu.source.sweeplinearstep(configListName, start, stop, step, delay, count, rangeType, failAbort, dual, bufferName)
-            commandString = f'smu.source.sweeplinearstep("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {stepValue}, {delayTime}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual},{self.ActiveBuffer_Name})'
+            commandString = f'smu.source.sweeplinearstep("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {stepValue}, {self.__SourceDelay(delayTime, 0)}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual},{self.ActiveBuffer_Name})'
             #Send the commands
             self.Device.write(commandString)
             #Sweep mechanism does not require smu.source.output = smu.ON command.
             #Instead it uses triggers.
             #Run the sweep command
             self.Device.write('trigger.model.initiate()')
-            self.Device.write('waitcomplete()')
+            if(not self.__WaitForTriggerModel(cancellationToken)):
+                return cancellationToken.partialResult
             self.Device.write('trigger.model.delay()')
             #Notification
             self.Device.write('display.clear()')
@@ -1854,15 +2319,17 @@ class KeithleyDeviceManager(object):
         except Exception as ex:
             raise Exception(ex)
     #Sweep Linear - Measure Resistance ??????????????????????????????????
+    @AtomicDeviceAccess
     def Sweep_LinearcaseByPoints_SourceCurrent_MeasureResistance(self,
                    ArbitraryConfigurationName:str,
                    startValue:float,
                    stopValue:float,
                    pointsToMeasure:int=10,
-                   delayTime:float=0,
+                   delayTime:float=None,
                    Iterations:int=1,
                    dual:bool=False,
-                   bufferName:str=None):
+                   bufferName:str=None,
+                   cancellationToken:CancellationToken=None):
         """
         .Measure resistance using the resistance function:
             Resistance function => smu.measure.func = smu.FUNC_RESISTANCE
@@ -1897,7 +2364,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Pulse C - Measure R")')
             self.Device.write('display.settext(display.TEXT2, "SweepLinearByPoint")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_RESISTANCE', 'smu.FUNC_DC_CURRENT')
             self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Measurement Conditions
             self.Device.write(f'smu.measure.func = smu.FUNC_RESISTANCE')
@@ -1916,14 +2383,15 @@ class KeithleyDeviceManager(object):
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
             #Sweep Function:
             #sample: smu.source.sweeplinearstep(configListName, start, stop, step, delay, count, rangeType, failAbort, dual, bufferName)
-            commandString = f'smu.source.sweeplinearstep("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {delayTime}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual},{self.ActiveBuffer_Name})'
+            commandString = f'smu.source.sweeplinearstep("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {self.__SourceDelay(delayTime, 0)}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual},{self.ActiveBuffer_Name})'
             #Send the commands
             self.Device.write(commandString)
             #Sweep mechanism does not require smu.source.output = smu.ON command.
             #Instead it uses triggers.
             #Run the sweep command
             self.Device.write('trigger.model.initiate()')
-            self.Device.write('waitcomplete()')
+            if(not self.__WaitForTriggerModel(cancellationToken)):
+                return cancellationToken.partialResult
             self.Device.write('trigger.model.delay()')
             #Notification
             self.Device.write('display.clear()')
@@ -1931,15 +2399,17 @@ class KeithleyDeviceManager(object):
         except Exception as ex:
             raise Exception(ex)
     
+    @AtomicDeviceAccess
     def Sweep_LinearcaseByPoints_SourceCurrent_MeasureVoltage_CalculateResistance(self,
                    ArbitraryConfigurationName:str,
                    startValue:float,
                    stopValue:float,
                    pointsToMeasure:int=10,
-                   delayTime:float=0,
+                   delayTime:float=None,
                    Iterations:int=1,
                    dual:bool=False,
-                   bufferName:str=None):
+                   bufferName:str=None,
+                   cancellationToken:CancellationToken=None):
         """
         NOTE:   (General Note when using the resistance measurement functions)
                 When you make resistance measurements, the resistance is calculated by either sourcing current 
@@ -1967,7 +2437,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Pulse C - Measure R")')
             self.Device.write('display.settext(display.TEXT2, "SweepLinearByPoint")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_VOLTAGE', 'smu.FUNC_DC_CURRENT')
             self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Measurement Conditions
             self.Device.write(f'smu.measure.func = smu.FUNC_DC_VOLTAGE')
@@ -1983,29 +2453,32 @@ class KeithleyDeviceManager(object):
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
             #Sweep Function:
             #sample: smu.source.sweeplinearstep(configListName, start, stop, step, delay, count, rangeType, failAbort, dual, bufferName)
-            commandString = f'smu.source.sweeplinear("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {delayTime}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual},{self.ActiveBuffer_Name})'
+            commandString = f'smu.source.sweeplinear("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {self.__SourceDelay(delayTime, 0)}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual},{self.ActiveBuffer_Name})'
             #Send the commands
             self.Device.write(commandString)
             #Sweep mechanism does not require smu.source.output = smu.ON command.
             #Instead it uses triggers.
             #Run the sweep command
             self.Device.write('trigger.model.initiate()')
-            self.Device.write('waitcomplete()')
+            if(not self.__WaitForTriggerModel(cancellationToken)):
+                return cancellationToken.partialResult
             self.Device.write('trigger.model.delay()')
             #Notification
             self.Device.write('display.clear()')
             self.Device.write('display.settext(display.TEXT2, "Process Successful!")')
         except Exception as ex:
             raise Exception(ex)
+    @AtomicDeviceAccess
     def Sweep_LinearcaseByPoints_SourceVoltage_MeasureCurrent_CalculateResistance(self,
                    ArbitraryConfigurationName:str,
                    startValue:float,
                    stopValue:float,
                    pointsToMeasure:int=10,
-                   delayTime:float=0,
+                   delayTime:float=None,
                    Iterations:int=1,
                    dual:bool=False,
-                   bufferName:str=None):
+                   bufferName:str=None,
+                   cancellationToken:CancellationToken=None):
         """
         NOTE:   (General Note when using the resistance measurement functions)
                 When you make resistance measurements, the resistance is calculated by either sourcing current 
@@ -2033,7 +2506,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.settext(display.TEXT1, "Pulse V - Measure R")')
             self.Device.write('display.settext(display.TEXT2, "SweepLinearByPoint")')
             #Setting Up the Device ///// Configuration settings
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
             self.__ActivateSpecificBuffer(bufferName=bufferName)
             #Measurement Conditions
             self.Device.write(f'smu.measure.func = smu.FUNC_DC_CURRENT')
@@ -2049,14 +2522,15 @@ class KeithleyDeviceManager(object):
             self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
             #Sweep Function:
             #sample: smu.source.sweeplinearstep(configListName, start, stop, step, delay, count, rangeType, failAbort, dual, bufferName)
-            commandString = f'smu.source.sweeplinear("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {delayTime}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual},{self.ActiveBuffer_Name})'
+            commandString = f'smu.source.sweeplinear("{ArbitraryConfigurationName}", {startValue}, {stopValue}, {pointsToMeasure}, {self.__SourceDelay(delayTime, 0)}, {Iterations}, smu.RANGE_FIXED, smu.ON, {dual},{self.ActiveBuffer_Name})'
             #Send the commands
             self.Device.write(commandString)
             #Sweep mechanism does not require smu.source.output = smu.ON command.
             #Instead it uses triggers.
             #Run the sweep command
             self.Device.write('trigger.model.initiate()')
-            self.Device.write('waitcomplete()')
+            if(not self.__WaitForTriggerModel(cancellationToken)):
+                return cancellationToken.partialResult
             self.Device.write('trigger.model.delay()')
             #Notification
             self.Device.write('display.clear()')
@@ -2065,14 +2539,16 @@ class KeithleyDeviceManager(object):
             raise Exception(ex)
     #-------------------------------------------------------------------------------------
     #----------------Custom Sweep---------------------------------------------------------
+    @AtomicDeviceAccess
     def Sweep_Custom_SourceVoltage_MeasureCurrent(self,source_Range:float=None,
                                                   measure_range:float=None,
                                                   Source_ListOfLevels:List[float]=[0.00,0.01],
                                                   AribtraryConfigName:str="SweepList1",
                                                   startIndex:int=1,
-                                                  delay:float=0.001,
+                                                  delay:float=None,
                                                   count:int=1,
-                                                  bufferName:str=None):
+                                                  bufferName:str=None,
+                                                  cancellationToken:CancellationToken=None):
         try:
             if(source_Range is None):
                 source_Range = self.Source_VoltageRange
@@ -2085,7 +2561,7 @@ class KeithleyDeviceManager(object):
             self.Device.write('display.clear()')
             self.Device.write('display.settext(display.TEXT1, "Pulse V - Measure C")')
             self.Device.write('display.settext(display.TEXT2, "Custom Sweep")')
-            self.__ResetTheConfigurations()
+            self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
             #Set the Source
             self.Device.write(f'smu.source.configlist.create("{AribtraryConfigName}")')
             self.Device.write(f'smu.source.func = smu.FUNC_DC_VOLTAGE')
@@ -2094,67 +2570,381 @@ class KeithleyDeviceManager(object):
                 self.Device.write(f'smu.source.range = {value}')
                 self.Device.write(f'smu.source.configlist.store("{AribtraryConfigName}")')
             #sample: smu.source.sweeplist(configListName, index, delay, count, failAbort, bufferName)
-            self.Device.write(f'smu.source.sweeplist("{AribtraryConfigName}", {startIndex}, {delay},{count}, smu.ON, {self.ActiveBuffer_Name})')
+            self.Device.write(f'smu.source.sweeplist("{AribtraryConfigName}", {startIndex}, {self.__SourceDelay(delay, 0.001)},{count}, smu.ON, {self.ActiveBuffer_Name})')
             #Set the Measure
             self.Device.write(f'smu.measure.func = smu.FUNC_DC_CURRENT')
             self.Device.write(f'smu.measure.range = {measure_range}')
             #Run the sweep command
             self.Device.write('trigger.model.initiate()')
-            self.Device.write('waitcomplete()')
+            if(not self.__WaitForTriggerModel(cancellationToken)):
+                return cancellationToken.partialResult
             self.Device.write('trigger.model.delay()')
             #Notification
             self.Device.write('display.clear()')
             self.Device.write('display.settext(display.TEXT2, "Process Successful!")')
         except Exception as ex:
             raise Exception(ex)
-    #------------------------------------------------------------------------------------- 
-
-
-
-
-
-def pulseCurrentMeasureVoltage(sourceVoltageLevel, 
-                               biasCurrent, 
-                               startVoltage_1, 
-                               stopVoltage_1, 
-                               startVoltage_2, 
-                               stopVoltage_2, 
-                               currentlimit, 
-                               timeON, 
-                               timeOFF, 
-                               points1, 
-                               points2, 
-                               tag1, 
-                               tag2, 
-                               cycleCounter):
-    pass
-
-
-
-
-
-
-
-
-
-
+    #-------------------------------------------------------------------------------------
+    #----------------Range-Segmented Sweep------------------------------------------------
+    @AtomicDeviceAccess
+    def Sweep_RangeSegmented_SourceVoltage_MeasureCurrent(self,
+                                                          levels:List[float],
+                                                          expectedCurrent=None,
+                                                          sourceLimit_i:float=None,
+                                                          headroom:float=1.2,
+                                                          minPointsPerSegment:int=5,
+                                                          delayTime:float=None,
+                                                          bufferName:str=None,
+                                                          cancellationToken:CancellationToken=None) -> list:
+        """
+        Sweeps a wide dynamic range (e.g. the forward I-V curve of a diode from pA to mA) with fixed ranges.
+        A single fixed range measures the low currents with a poor resolution and autorange checks (and often
+        changes) the range at every point. Here the levels are split into a few segments, each with the best
+        fixed source and measure range for the expected current (see throughputPlanner.PlanRangeSegments()), and
+        all the segments run back to back on the device without waiting for the PC between them.
 
+        Args:
+            levels (List[float]): The source voltages in the order they are sourced.
+            expectedCurrent (callable | List[float], optional): The expected current at each level, as a list or as a function of the levels
+            array, e.g. lambda v: 1e-12 * (np.exp(v / 0.026) - 1). None uses Measure_CurrentRange for all the points. Defaults to None.
+            sourceLimit_i (float, optional): The current limit; in each segment it is reduced to the measure range if it is larger. Defaults to None.
+            headroom (float, optional): See PlanRangeSegments(). Defaults to 1.2.
+            minPointsPerSegment (int, optional): See PlanRangeSegments(). Defaults to 5.
+            delayTime (float, optional): Delay between setting a level and measuring, in seconds. None uses the source delay of the device (autodelay or the measurement plan). Defaults to None.
+            bufferName (str, optional): The buffer of the readings. Defaults to None (the active buffer).
+            cancellationToken (CancellationToken, optional): Checked after each segment. When it is cancelled, the output is switched off and the
+            readings taken so far are returned instead of the segments. Defaults to None.
 
+        Returns:
+            list: the segments that were run (start, stop, levels, sourceRange, measureRange).
+        """
+        return self.__RunSegmentedSweep(levels, expectedCurrent, True, sourceLimit_i, headroom, minPointsPerSegment, delayTime, bufferName, cancellationToken)
+    @AtomicDeviceAccess
+    def Sweep_RangeSegmented_SourceCurrent_MeasureVoltage(self,
+                                                          levels:List[float],
+                                                          expectedVoltage=None,
+                                                          sourceLimit_v:float=None,
+                                                          headroom:float=1.2,
+                                                          minPointsPerSegment:int=5,
+                                                          delayTime:float=None,
+                                                          bufferName:str=None,
+                                                          cancellationToken:CancellationToken=None) -> list:
+        """
+        The same as Sweep_RangeSegmented_SourceVoltage_MeasureCurrent() for sourcing current over several decades and measuring voltage.
+        """
+        return self.__RunSegmentedSweep(levels, expectedVoltage, False, sourceLimit_v, headroom, minPointsPerSegment, delayTime, bufferName, cancellationToken)
+    def __RunSegmentedSweep(self, levels, expectedResponse, sourceVoltage:bool, sourceLimit:float,
+                            headroom:float, minPointsPerSegment:int, delayTime:float, bufferName:str,
+                            cancellationToken:CancellationToken) -> list:
+        try:
+            if(sourceVoltage):
+                sourceFunction, measureFunction, limitName = 'smu.FUNC_DC_VOLTAGE', 'smu.FUNC_DC_CURRENT', 'ilimit'
+                sourceRanges, measureRanges, measureRange = VOLTAGE_RANGES, CURRENT_RANGES, self.Measure_CurrentRange
+            else:
+                sourceFunction, measureFunction, limitName = 'smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE', 'vlimit'
+                sourceRanges, measureRanges, measureRange = CURRENT_RANGES, VOLTAGE_RANGES, self.Measure_VoltageRange
+            segments = PlanRangeSegments(levels, expectedResponse, sourceRanges, measureRanges, measureRange, headroom, minPointsPerSegment)
+            if(bufferName is not None):
+                self.__ActivateSpecificBuffer(bufferName=bufferName)
+            self.Device.write('display.changescreen(display.SCREEN_USER_SWIPE)')
+            self.Device.write('display.clear()')
+            self.Device.write(f'display.settext(display.TEXT1, "{len(segments)} Range Segments")')
+            self.Device.write('display.settext(display.TEXT2, "Segmented Sweep")')
+            #Setting Up the Device ///// Configuration settings
+            self.__ResetTheConfigurations(measureFunction, sourceFunction)
+            self.Device.write(f'smu.measure.func = {measureFunction}')
+            self.Device.write(f'smu.source.func = {sourceFunction}')
+            self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
+            self.Device.write(f'smu.source.range = {segments[0]["sourceRange"]}')
+            if(segments[0]['measureRange'] is not None):
+                self.Device.write(f'smu.measure.range = {segments[0]["measureRange"]}')
+            self.Device.write(f'smu.source.output = smu.ON') #Enables the Source Output. Beginnig of the Measurement.
+            delayCommand = f'delay({delayTime}) ' if delayTime is not None else ''
+            for segment in segments:
+                #One chunk per segment: the device runs it without a round trip to the PC
+                commandString = f'smu.source.range = {segment["sourceRange"]} '
+                if(segment['measureRange'] is not None):
+                    commandString += f'smu.measure.range = {segment["measureRange"]} '
+                if(sourceLimit is not None):
+                    limit = sourceLimit if segment['measureRange'] is None else min(sourceLimit, segment['measureRange'])
+                    commandString += f'smu.source.{limitName}.level = {limit} '
+                levelsText = ', '.join(f'{level:.9g}' for level in segment['levels'])
+                commandString += (f'for _, level in ipairs({{{levelsText}}}) do '
+                                  f'smu.source.level = level {delayCommand}smu.measure.read({self.ActiveBuffer_Name}) end')
+                self.Device.write(commandString)
+                if(cancellationToken is not None):
+                    #Waits for the segment, so the run can stop between two segments
+                    self.Device.query('waitcomplete() print(1)')
+                    if(cancellationToken.isCancelled):
+                        return self.__CancelRun(cancellationToken)
+            self.Device.write('waitcomplete()')
+            self.Device.write(f'smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
+            #Notification
+            self.Device.write('display.clear()')
+            self.Device.write('display.settext(display.TEXT2, "Process Successful!")')
+            return segments
+        except Exception as ex:
+            raise Exception(ex)
+    #-------------------------------------------------------------------------------------
+    #----------------Adaptive Sweep-------------------------------------------------------
+    @AtomicDeviceAccess
+    def Sweep_Adaptive_SourceVoltage_MeasureCurrent(self,
+                                                    startValue:float,
+                                                    stopValue:float,
+                                                    coarsePoints:int=21,
+                                                    tolerance:float=0.02,
+                                                    logScale:bool=False,
+                                                    maxPasses:int=5,
+                                                    maxPoints:int=1000,
+                                                    sourceLimit_i:float=None,
+                                                    measure_Range:float=None,
+                                                    delayTime:float=None,
+                                                    bufferName:str=None,
+                                                    cancellationToken:CancellationToken=None,
+                                                    noiseFloor:float=None) -> MeasurementResult:
+        """
+        Measures an I-V curve with dense points only where it changes. A coarse linear pass is measured first;
+        then, pass after pass, new points are measured only in the middle of the intervals where the current
+        changes by more than the tolerance (see ivAnalysis.RefinementLevels()), until the tolerance is met,
+        maxPasses refinement passes were run or maxPoints were measured. For diodes and transistors this gives the
+        same curve as a fine uniform sweep with far fewer points.
+        The source output stays on during all the passes; only the new readings of each pass are read back.
 
+        Args:
+            startValue (float): The first voltage of the coarse pass.
+            stopValue (float): The last voltage of the coarse pass.
+            coarsePoints (int, optional): Number of points of the coarse pass. Defaults to 21.
+            tolerance (float, optional): The largest allowed change of the current between two neighbouring points, as a fraction of the span of all the currents. Defaults to 0.02.
+            logScale (bool, optional): Applies the tolerance to a logarithmic scale of the current that stays continuous through 0 A (for curves over many decades). Defaults to False.
+            maxPasses (int, optional): The largest number of refinement passes. Defaults to 5.
+            maxPoints (int, optional): The largest total number of points. Defaults to 1000.
+            sourceLimit_i (float, optional): The current limit. Defaults to None.
+            measure_Range (float, optional): The fixed current range; None uses Measure_CurrentRange, or autorange if that is not set either. Defaults to None.
+            delayTime (float, optional): Delay between setting a level and measuring, in seconds. None uses the source delay of the device. Defaults to None.
+            bufferName (str, optional): The buffer of the readings. Defaults to None (the active buffer).
+            cancellationToken (CancellationToken, optional): Checked before each refinement pass. When it is cancelled, the output is switched off
+            and the readings taken so far are returned (in the order they were measured). Defaults to None.
+            noiseFloor (float, optional): Changes of the current up to this value in A are taken as noise and never refined, so a flat, noisy part
+            of the curve is not split again and again. None uses 1e-4 of the measure range of each reading (the fixed range, or the range autorange
+            chose for it). Defaults to None.
 
+        Returns:
+            MeasurementResult: the buffer columns sorted by source level, plus a 'refinementPass' column (0 for the coarse pass).
+        """
+        try:
+            if(measure_Range is None):
+                measure_Range = self.Measure_CurrentRange
+            if(bufferName is not None):
+                self.__ActivateSpecificBuffer(bufferName=bufferName)
+            self.Device.write('display.changescreen(display.SCREEN_USER_SWIPE)')
+            self.Device.write('display.clear()')
+            self.Device.write('display.settext(display.TEXT1, "Pulse V - Measure C")')
+            self.Device.write('display.settext(display.TEXT2, "Adaptive Sweep")')
+            #Setting Up the Device ///// Configuration settings
+            self.__ResetTheConfigurations('smu.FUNC_DC_CURRENT', 'smu.FUNC_DC_VOLTAGE')
+            self.Device.write(f'smu.measure.func = smu.FUNC_DC_CURRENT')
+            self.Device.write(f'smu.source.func = smu.FUNC_DC_VOLTAGE')
+            #---> measure.range will always set after source.func is set
+            if(measure_Range is not None):
+                self.Device.write(f'smu.measure.range = {measure_Range}')
+            else:
+                self.Device.write('smu.measure.autorange = smu.ON')
+            self.Device.write(f'smu.source.range = {max(abs(startValue), abs(stopValue))}')
+            if(sourceLimit_i is not None):
+                self.Device.write(f'smu.source.ilimit.level = {sourceLimit_i}')
+            self.Device.write(f'{self.ActiveBuffer_Name}.clear()')
 
+            self.Device.write(f'smu.source.output = smu.ON') #Enables the Source Output. Beginnig of the Measurement.
+            levels = np.linspace(startValue, stopValue, coarsePoints)
+            readings = self.__MeasureLevels(levels, delayTime, firstIndex=1)
+            passes = np.zeros(levels.size)
+            for refinementPass in range(1, maxPasses + 1):
+                if((cancellationToken is not None) and cancellationToken.isCancelled):
+                    return self.__CancelRun(cancellationToken)
+                newLevels = ivAnalysis.RefinementLevels(levels, readings, tolerance=tolerance, logScale=logScale,
+                                                        noiseFloor=self.__NoiseFloor(readings, measure_Range, noiseFloor))
+                newLevels = newLevels[:max(0, maxPoints - levels.size)]
+                if(newLevels.size == 0):
+                    break
+                self.Device.write(f'display.settext(display.TEXT1, "Refinement {refinementPass}: +{newLevels.size}")')
+                newReadings = self.__MeasureLevels(newLevels, delayTime, firstIndex=levels.size + 1)
+                levels = np.concatenate((levels, newLevels))
+                readings = np.concatenate((readings, newReadings))
+                passes = np.concatenate((passes, np.full(newLevels.size, refinementPass)))
+            self.Device.write(f'smu.source.output = smu.OFF') #Disables the Source Output. End Of the Measurement.
 
+            bufferValues = self.ReturnBufferValues(bufferName=self.ActiveBuffer_Name)
+            order = np.argsort(levels, kind='stable')
+            result = MeasurementResult({name:bufferValues[name][order] for name in bufferValues}, metadata=bufferValues.metadata)
+            result['refinementPass'] = passes[order]
+            #Notification
+            self.Device.write('display.clear()')
+            self.Device.write('display.settext(display.TEXT2, "Process Successful!")')
+            return result
+        except Exception as ex:
+            raise Exception(ex)
+    def __NoiseFloor(self, readings:np.ndarray, measureRange:float, noiseFloor:float):
+        #The noise of each current reading: about 100 ppm of the range it was measured in, enough also for a small NPLC
+        if(noiseFloor is not None):
+            return noiseFloor
+        if(measureRange is not None):
+            return 1e-4 * measureRange
+        ranges = np.asarray(CURRENT_RANGES)
+        rangeIndexes = np.minimum(np.searchsorted(ranges * 1.05, np.abs(readings)), len(ranges) - 1)
+        return 1e-4 * ranges[rangeIndexes]
+    def __MeasureLevels(self, levels, delayTime:float, firstIndex:int) -> np.ndarray:
+        #Measures all the levels in one chunk on the device and reads back only these readings
+        delayCommand = f'delay({delayTime}) ' if delayTime is not None else ''
+        levelsText = ', '.join(f'{level:.9g}' for level in levels)
+        self.Device.write(f'for _, level in ipairs({{{levelsText}}}) do '
+                          f'smu.source.level = level {delayCommand}smu.measure.read({self.ActiveBuffer_Name}) end')
+        return ParseNumericResponse(self.Device.query(f'printbuffer({firstIndex}, {firstIndex + len(levels) - 1}, {self.ActiveBuffer_Name}.readings)'))
+    #-------------------------------------------------------------------------------------
+    #----------------Pulse Train----------------------------------------------------------
+    @AtomicDeviceAccess
+    def PulseCurrent_MeasureVoltage(self,
+                                    biasCurrent:float,
+                                    startCurrent_1:float,
+                                    stopCurrent_1:float,
+                                    points1:int,
+                                    voltageLimit:float,
+                                    timeON:float,
+                                    timeOFF:float,
+                                    startCurrent_2:float=None,
+                                    stopCurrent_2:float=None,
+                                    points2:int=0,
+                                    tag1:str='train1',
+                                    tag2:str='train2',
+                                    cycleCounter:int=1,
+                                    measure_Range:float=None) -> dict:
+        """
+        Sources a train of current pulses from a bias level and measures the voltage at the end of each pulse.
+        The pulse amplitudes sweep linearly from startCurrent_1 to stopCurrent_1 (points1 pulses) and then, optionally,
+        from startCurrent_2 to stopCurrent_2 (points2 pulses); the whole sequence is repeated cycleCounter times.
+
+        The sequence runs in the trigger model of the device: the pulse and bias levels are stored in source configuration
+        lists and the on and off times are trigger-model delay blocks, so the timing does not depend on the PC or the bus
+        and the shortest pulse is limited only by the device:
+            pulse width = timeON + measurement time (NPLC / line frequency; use a small NPLC for short pulses)
+            time at bias = timeOFF
+
+        Trigger model (see triggerModel.TriggerModel; the second train repeats the inner loop with its own list and buffer):
+            clear the buffers, recall the bias, output on
+            repeat cycleCounter times:
+                recall the bias entry of the list of the train
+                repeat once per pulse: delay timeOFF, next entry (pulse), delay timeON, measure, next entry (bias)
+            output off
 
+        Args:
+            biasCurrent (float): The current between the pulses in A.
+            startCurrent_1 (float): The amplitude of the first pulse of the first train in A.
+            stopCurrent_1 (float): The amplitude of the last pulse of the first train in A.
+            points1 (int): Number of pulses of the first train.
+            voltageLimit (float): The voltage limit (compliance) during the whole sequence in V.
+            timeON (float): Delay between the start of a pulse and its measurement in s.
+            timeOFF (float): Time at the bias current before each pulse in s.
+            startCurrent_2 (float, optional): The amplitude of the first pulse of the second train in A. Defaults to None.
+            stopCurrent_2 (float, optional): The amplitude of the last pulse of the second train in A. Defaults to None.
+            points2 (int, optional): Number of pulses of the second train; 0 runs only the first train. Defaults to 0.
+            tag1 (str, optional): The key of the readings of the first train in the returned dict. Defaults to 'train1'.
+            tag2 (str, optional): The key of the readings of the second train in the returned dict. Defaults to 'train2'.
+            cycleCounter (int, optional): Number of times the whole sequence is repeated. Defaults to 1.
+            measure_Range (float, optional): The fixed voltage range; None uses Measure_VoltageRange, or the voltage limit if that is not set either. Defaults to None.
 
+        Returns:
+            dict: {tag1: MeasurementResult, tag2: MeasurementResult} with the readings of each train (tag2 only with points2 > 0)
+        """
+        try:
+            if(points1 < 1 or cycleCounter < 1 or points2 < 0):
+                raise Exception(f'The number of pulses and cycles must be positive. The current values are points1={points1}, points2={points2}, cycleCounter={cycleCounter}.')
+            if(points2 > 0 and (startCurrent_2 is None or stopCurrent_2 is None)):
+                raise Exception('Error on not inserting adequate inputs. Please Insert startCurrent_2 and stopCurrent_2 for the second train and run the function again.')
+            if(timeON < 0 or timeOFF < 0):
+                raise Exception(f'The on and off times cannot be negative. The current values are timeON={timeON} and timeOFF={timeOFF}.')
+            trains = [(tag1, np.linspace(startCurrent_1, stopCurrent_1, points1), 'pulseBuffer1', 'PulseList1')]
+            if(points2 > 0):
+                trains.append((tag2, np.linspace(startCurrent_2, stopCurrent_2, points2), 'pulseBuffer2', 'PulseList2'))
+            if(measure_Range is None):
+                measure_Range = self.Measure_VoltageRange if self.Measure_VoltageRange is not None else voltageLimit
+            allLevels = np.concatenate([levels for _, levels, _, _ in trains] + [[biasCurrent]])
 
+            self.Device.write('display.changescreen(display.SCREEN_USER_SWIPE)')
+            self.Device.write('display.clear()')
+            self.Device.write('display.settext(display.TEXT1, "Pulse C - Measure V")')
+            self.Device.write('display.settext(display.TEXT2, "Pulse Train")')
+            #Setting Up the Device ///// Configuration settings
+            self.__ResetTheConfigurations('smu.FUNC_DC_VOLTAGE', 'smu.FUNC_DC_CURRENT')
+            self.Device.write(f'smu.measure.func = smu.FUNC_DC_VOLTAGE')
+            self.Device.write(f'smu.source.func = smu.FUNC_DC_CURRENT')
+            #---> measure.range will always set after source.func is set
+            self.Device.write(f'smu.measure.range = {measure_Range}')
+            #One fixed range for all the levels, so no range change happens inside a pulse
+            self.Device.write(f'smu.source.range = {np.max(np.abs(allLevels))}')
+            self.Device.write(f'smu.source.vlimit.level = {voltageLimit}')
+            #The timing comes only from the delay blocks
+            self.Device.write('smu.source.autodelay = smu.OFF')
+            self.Device.write('smu.source.delay = 0')
+            #Each list alternates bias and pulse levels: bias, pulse 1, bias, pulse 2, ..., bias
+            for _, levels, bufferName, listName in trains:
+                #The buffer and the list of a previous call keep their names, so they are deleted before the new train is built
+                #(pcall: deleting a list that does not exist yet raises an error on the device)
+                self.Device.write(f'if {bufferName} ~= nil then buffer.delete({bufferName}) {bufferName} = nil end')
+                self.Device.write(f'pcall(smu.source.configlist.delete, "{listName}")')
+                self.Device.write(f'{bufferName} = buffer.make({len(levels) * cycleCounter})')
+                if(self.ListOfAvailableBuffers.count(bufferName) == 0):
+                    self.ListOfAvailableBuffers.append(bufferName)
+                self.Device.write(f'smu.source.configlist.create("{listName}")')
+                entries = [biasCurrent]
+                for level in levels:
+                    entries += [level, biasCurrent]
+                for level in entries:
+                    self.Device.write(f'smu.source.level = {level:.9g}')
+                    self.Device.write(f'smu.source.configlist.store("{listName}")')
+
+            model = TriggerModel()
+            for _, _, bufferName, _ in trains:
+                model.BufferClear(bufferName)
+            model.ConfigRecall(trains[0][3], 1)
+            model.SourceOutput(True)
+            with model.Loop(cycleCounter):
+                for _, levels, bufferName, listName in trains:
+                    model.ConfigRecall(listName, 1)
+                    with model.Loop(len(levels)):
+                        model.Delay(timeOFF)
+                        model.ConfigNext(listName)
+                        model.Delay(timeON)
+                        model.Measure(bufferName)
+                        model.ConfigNext(listName)
+            model.SourceOutput(False)
+            #Run the pulse train
+            self.RunTriggerModel(model)
+            results = {}
+            for tag, levels, bufferName, _ in trains:
+                result = self.ReturnBufferValues(bufferName=bufferName)
+                result.metadata.update({'tag':tag, 'biasCurrent':biasCurrent, 'timeON':timeON, 'timeOFF':timeOFF,
+                                        'cycleCounter':cycleCounter, 'voltageLimit':voltageLimit})
+                result['pulseLevels'] = np.tile(levels, cycleCounter)[:result.NumberOfReadings]
+                results[tag] = result
+            #Notification
+            self.Device.write('display.clear()')
+            self.Device.write('display.settext(display.TEXT2, "Process Successful!")')
+            return results
+        except Exception as ex:
+            raise Exception(ex)
+    #------------------------------------------------------------------------------------- 
 
 
 
 
 
 #General Purpose Functions. Please Do not Manipulate these Functions
-def __getAllResources__():
-    return visa.ResourceManager().list_resources()
+def __getAllResources__(refresh:bool=False, cacheFilePath:str=None, timeToLive:float=3600):
+    """
+    Returns the addresses of all the connected devices. The bus is scanned only once per process (or once
+    per timeToLive seconds if a cache file is used); pass refresh=True to force a new scan.
+    See deviceDiscovery.DiscoveryCache for resolving a device by its serial number.
+    """
+    return DiscoveryCache(cacheFilePath=cacheFilePath, timeToLive=timeToLive).ListResources(refresh=refresh)
 
 
 
@@ -2369,4 +3159,4 @@ The limit refers to a safety threshold or boundary that you set to protect the d
 
 
 
-"""
\ No newline at end of file
+"""
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Analysis of many result files (as saved by fileManagement.SaveToDrive) in a pool of processes.
+Each file is analysed by a worker (derived quantities, a linear fit and summary metrics) and gives one row of a
+summary table. The table is saved in the output directory together with the size and the modification time of
+each file and a hash of the settings and the analysis function, so a new run only analyses the files that are new
+or changed since the last run, or all of them if the settings changed.
+
+Sample:
+    if __name__ == '__main__':      #required on Windows, the worker processes import the calling script
+        analyzer = BatchAnalyzer(outputDirectory='D:\\HiWi\\analysis', area_cm2=0.1)
+        summary = analyzer.Run(BatchAnalyzer.FindResultFiles('D:\\HiWi'))
+        print(summary.sort_values('resistance_fit').head())
+
+A custom analysis is any module-level function that takes the DataFrame of one file and the settings dict and
+returns a dict of metrics (it must be importable by the worker processes):
+    analyzer = BatchAnalyzer(outputDirectory, analysisFunction=mymodule.MyMetrics)
+"""
+
+import concurrent.futures
+import hashlib
+import json
+import os
+import numpy as np
+from batchRendering import BatchRenderer
+
+
+SUMMARY_FILE_NAME = 'summary.csv'
+
+
+class BatchAnalyzer(object):
+
+    def __init__(self, outputDirectory:str, xColumn:str='sourcevalues', yColumn:str='readings',
+                 sourceIsVoltage:bool=True, area_cm2:float=None, saveDerived:bool=False,
+                 analysisFunction=None, processes:int=None, checkpointEvery:int=200):
+        """
+        Args:
+            outputDirectory (str): Directory of the summary table (and of the derived files). It is created if it does not exist.
+            xColumn (str, optional): Column of the source values. Defaults to 'sourcevalues'.
+            yColumn (str, optional): Column of the readings. Defaults to 'readings'.
+            sourceIsVoltage (bool, optional): True if the runs sourced voltage and measured current. Defaults to True.
+            area_cm2 (float, optional): Area of the device under test; adds the current density metrics. Defaults to None.
+            saveDerived (bool, optional): Also saves the derived quantities of each file as <name>_derived.csv. Defaults to False.
+            analysisFunction (callable, optional): Replaces SummarizeCurve() (see the sample at the top of the file). Defaults to None.
+            processes (int, optional): Number of worker processes. None uses one per CPU. Defaults to None.
+            checkpointEvery (int, optional): The summary table is saved after this many new results, so an interrupted run can resume. Defaults to 200.
+        """
+        self.outputDirectory = outputDirectory
+        self.processes = processes
+        self.checkpointEvery = checkpointEvery
+        self.analysisFunction = analysisFunction if analysisFunction is not None else SummarizeCurve
+        self.settings = {'xColumn':xColumn, 'yColumn':yColumn, 'sourceIsVoltage':sourceIsVoltage,
+                         'area_cm2':area_cm2, 'saveDerived':saveDerived, 'outputDirectory':outputDirectory}
+        self.summaryPath = os.path.join(outputDirectory, SUMMARY_FILE_NAME)
+
+    FindResultFiles = staticmethod(BatchRenderer.FindResultFiles)
+
+    def Run(self, resultFiles:list, force:bool=False):
+        """
+        Analyses the new and changed files in parallel and returns the summary table of all the given files.
+
+        Args:
+            resultFiles (list): Paths of the result files.
+            force (bool, optional): Analyses all the files, even the unchanged ones. Defaults to False.
+
+        Returns:
+            pandas.DataFrame: one row per file; 'file', 'size', 'mtime_ns', 'settings', 'error' and the metrics of the analysis function
+        """
+        import pandas as pd
+
+        os.makedirs(self.outputDirectory, exist_ok=True)
+        rows = {} if force else self.__LoadSummary()
+        #The summary table and the derived files are not results themselves
+        outputDirectory = os.path.join(os.path.abspath(self.outputDirectory), '')
+        paths = [os.path.abspath(path) for path in resultFiles if not os.path.abspath(path).startswith(outputDirectory)]
+        #A row of other settings or of another analysis function is stale, even if the file did not change
+        function = f'{self.analysisFunction.__module__}.{self.analysisFunction.__qualname__}'
+        settingsHash = hashlib.sha1(json.dumps({'settings':self.settings, 'analysisFunction':function}, sort_keys=True).encode()).hexdigest()
+        tasks = []
+        for path in paths:
+            status = os.stat(path)
+            row = rows.get(path)
+            if(row is not None and row['size'] == status.st_size and row['mtime_ns'] == status.st_mtime_ns
+               and row.get('settings') == settingsHash and not row.get('error')):
+                continue
+            tasks.append((path, self.analysisFunction, self.settings))
+        if(len(tasks) > 0):
+            workers = self.processes or os.cpu_count() or 1
+            #Several files per task, so thousands of small files do not cost one inter-process round trip each
+            chunkSize = max(1, len(tasks) // (4 * workers))
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                for count, row in enumerate(executor.map(_AnalyseFile, tasks, chunksize=chunkSize), start=1):
+                    row['settings'] = settingsHash
+                    rows[row['file']] = row
+                    if(count % self.checkpointEvery == 0):
+                        self.__SaveSummary(rows)
+            self.__SaveSummary(rows)
+        requested = set(paths)
+        return pd.DataFrame([row for path, row in rows.items() if path in requested])
+
+    def __LoadSummary(self) -> dict:
+        import pandas as pd
+
+        if(not os.path.exists(self.summaryPath)):
+            return {}
+        try:
+            table = pd.read_csv(self.summaryPath, keep_default_na=False, na_values=[''])
+        except (OSError, ValueError):
+            return {}
+        rows = {}
+        for row in table.to_dict('records'):
+            if(isinstance(row.get('error'), float)):
+                row['error'] = None      #an empty cell is read as NaN
+            rows[row['file']] = row
+        return rows
+
+    def __SaveSummary(self, rows:dict):
+        import pandas as pd
+
+        temporaryPath = self.summaryPath + '.tmp'
+        pd.DataFrame(list(rows.values())).to_csv(temporaryPath, index=False)
+        os.replace(temporaryPath, self.summaryPath)
+
+
+#----------------Worker Functions (module level, so they can be sent to the worker processes)----------
+def _AnalyseFile(task) -> dict:
+    path, analysisFunction, settings = task
+    status = os.stat(path)
+    row = {'file':path, 'size':status.st_size, 'mtime_ns':status.st_mtime_ns, 'error':None}
+    try:
+        import pandas as pd
+
+        if(path.lower().endswith('.xlsx')):
+            dataFrame = pd.read_excel(path)
+        else:
+            dataFrame = pd.read_csv(path)
+        dataFrame.attrs['path'] = path
+        row.update(analysisFunction(dataFrame, settings))
+    except Exception as ex:
+        row['error'] = f'{type(ex).__name__}: {ex}'
+    return row
+
+def SummarizeCurve(dataFrame, settings:dict) -> dict:
+    """
+    The default analysis of one I-V file: the derived quantities of ivAnalysis.DerivedQuantities() and these metrics:
+    points, overflowed points, range of source values and readings, resistance of a linear fit (with its R²),
+    current at the largest source value, maximum power and, with an area, the largest current density.
+    """
+    import ivAnalysis
+
+    sourceValues = ivAnalysis.MaskOverflow(dataFrame[settings['xColumn']].to_numpy())
+    readings = ivAnalysis.MaskOverflow(dataFrame[settings['yColumn']].to_numpy())
+    derived = ivAnalysis.DerivedQuantities(sourceValues, readings, sourceIsVoltage=settings['sourceIsVoltage'], area_cm2=settings['area_cm2'])
+    valid = np.isfinite(sourceValues) & np.isfinite(readings)
+    voltages, currents = (sourceValues, readings) if settings['sourceIsVoltage'] else (readings, sourceValues)
+    metrics = {'points':int(sourceValues.size), 'overflowed_points':int(np.count_nonzero(~valid)),
+               'source_min':_NanReduce(np.nanmin, sourceValues), 'source_max':_NanReduce(np.nanmax, sourceValues),
+               'reading_min':_NanReduce(np.nanmin, readings), 'reading_max':_NanReduce(np.nanmax, readings),
+               'power_max':_NanReduce(np.nanmax, np.abs(derived['power']))}
+    if(np.count_nonzero(valid) >= 2 and np.ptp(currents[valid]) > 0):
+        #V = R*I + V0
+        (slope, intercept), residuals = np.polyfit(currents[valid], voltages[valid], 1, full=True)[0:2]
+        totalSquares = np.sum((voltages[valid] - voltages[valid].mean()) ** 2)
+        metrics['resistance_fit'] = float(slope)
+        metrics['offset_fit'] = float(intercept)
+        metrics['r_squared_fit'] = float(1 - residuals[0] / totalSquares) if residuals.size and totalSquares > 0 else np.nan
+    else:
+        metrics['resistance_fit'] = metrics['offset_fit'] = metrics['r_squared_fit'] = np.nan
+    metrics['reading_at_source_max'] = float(readings[np.nanargmax(sourceValues)]) if np.any(np.isfinite(sourceValues)) else np.nan
+    if('jvalues' in derived):
+        metrics['j_max'] = _NanReduce(np.nanmax, np.abs(derived['jvalues']))
+    if(settings['saveDerived']):
+        import pandas as pd
+
+        fileName = os.path.splitext(os.path.basename(dataFrame.attrs.get('path', 'result')))[0]
+        derivedFrame = pd.DataFrame({settings['xColumn']:sourceValues, settings['yColumn']:readings, **derived})
+        derivedPath = os.path.join(settings['outputDirectory'], fileName + '_derived.csv')
+        derivedFrame.to_csv(derivedPath, index=False)
+        metrics['derived_file'] = derivedPath
+    return metrics
+
+def _NanReduce(function, values:np.ndarray) -> float:
+    if(values.size == 0 or np.all(np.isnan(values))):
+        return np.nan
+    return float(function(values))
@@ -0,0 +1,189 @@
+"""
+Headless rendering of many result files (as saved by fileManagement.SaveToDrive) into PNG/SVG figures.
+The figures are drawn with the Agg backend in a pool of processes, and a manifest in the output directory
+remembers what each figure was made from, so figures whose source file has not changed are not drawn again.
+
+Sample:
+    if __name__ == '__main__':      #required on Windows, the worker processes import the calling script
+        renderer = BatchRenderer(outputDirectory='D:\\HiWi\\figures', layout='iv', fileTypes=('png', 'svg'))
+        summary = renderer.Render(BatchRenderer.FindResultFiles('D:\\HiWi'))
+        print(summary['rendered'], summary['failed'])
+"""
+
+import concurrent.futures
+import glob
+import hashlib
+import json
+import os
+import matplotlib
+
+
+MANIFEST_FILE_NAME = '.render_manifest.json'
+
+
+class BatchRenderer(object):
+    """
+    Layouts:
+        • 'iv':   Plots.Plot(): yColumn over xColumn on the left and its signed log10 on the right.
+        • 'twin': Plots.TwinAxisPlot(): xColumn and yColumn over timeColumn with two y axes.
+    """
+
+    def __init__(self, outputDirectory:str, layout:str='iv', fileTypes=('png',),
+                 xColumn:str='sourcevalues', yColumn:str='readings', timeColumn:str='timestamps',
+                 X_AxisCaption:str='Source Voltage', Y_AxixCaption:str='current',
+                 maxPlottedPoints:int=2000, processes:int=None):
+        """
+        Args:
+            outputDirectory (str): Directory of the figures and of the manifest. It is created if it does not exist.
+            layout (str, optional): 'iv' or 'twin'. Defaults to 'iv'.
+            fileTypes (tuple, optional): Formats of the saved figures. Defaults to ('png',).
+            xColumn (str, optional): Column plotted on the x axis ('iv') or on the left y axis ('twin'). Defaults to 'sourcevalues'.
+            yColumn (str, optional): Column plotted on the y axis ('iv') or on the right y axis ('twin'). Defaults to 'readings'.
+            timeColumn (str, optional): Common x axis of the 'twin' layout. Defaults to 'timestamps'.
+            X_AxisCaption (str, optional): Caption of xColumn. Defaults to 'Source Voltage'.
+            Y_AxixCaption (str, optional): Caption of yColumn. Defaults to 'current'.
+            maxPlottedPoints (int, optional): See Plots.Plot(). Defaults to 2000.
+            processes (int, optional): Number of worker processes. None uses one per CPU. Defaults to None.
+        """
+        if(layout not in ('iv', 'twin')):
+            raise Exception(f"The layout can be 'iv' or 'twin'. The current value is {layout} and is not Valid.")
+        self.outputDirectory = outputDirectory
+        self.processes = processes
+        self.settings = {'layout':layout, 'fileTypes':list(fileTypes), 'xColumn':xColumn, 'yColumn':yColumn,
+                         'timeColumn':timeColumn, 'X_AxisCaption':X_AxisCaption, 'Y_AxixCaption':Y_AxixCaption,
+                         'maxPlottedPoints':maxPlottedPoints}
+        self.manifestPath = os.path.join(outputDirectory, MANIFEST_FILE_NAME)
+
+    @staticmethod
+    def FindResultFiles(directoryPath:str, patterns=('*.csv', '*.xlsx'), recursive:bool=False) -> list:
+        """
+        Returns the sorted list of the result files in a directory.
+        """
+        files = []
+        for pattern in patterns:
+            if(recursive):
+                files += glob.glob(os.path.join(directoryPath, '**', pattern), recursive=True)
+            else:
+                files += glob.glob(os.path.join(directoryPath, pattern))
+        return sorted(set(files))
+
+    def Render(self, resultFiles:list, force:bool=False) -> dict:
+        """
+        Renders the figures of the given result files in parallel.
+
+        Args:
+            resultFiles (list): Paths of the result files.
+            force (bool, optional): Renders all the files, even the unchanged ones. Defaults to False.
+
+        Returns:
+            dict: {'rendered': [paths], 'skipped': [paths], 'failed': {path: error message}}
+        """
+        os.makedirs(self.outputDirectory, exist_ok=True)
+        manifest = self.__LoadManifest()
+        settingsHash = _Hash(json.dumps(self.settings, sort_keys=True).encode())
+        summary = {'rendered':[], 'skipped':[], 'failed':{}}
+        tasks = []
+        for path in resultFiles:
+            path = os.path.abspath(path)
+            entry = manifest.get(self.__ManifestKey(path))
+            status = os.stat(path)
+            hasOutputs = (not force and entry is not None and entry['settings'] == settingsHash
+                          and all(os.path.exists(output) for output in entry['outputs']))
+            if(hasOutputs and entry['size'] == status.st_size and entry['mtime_ns'] == status.st_mtime_ns):
+                summary['skipped'].append(path)
+                continue
+            #If only the time stamp changed, the worker compares the content with this hash and does not draw
+            previousHash = entry['sha1'] if hasOutputs else None
+            tasks.append((path, self.outputDirectory, self.settings, previousHash))
+        if(len(tasks) > 0):
+            workers = self.processes or os.cpu_count() or 1
+            chunkSize = max(1, len(tasks) // (4 * workers))
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_UseHeadlessBackend) as executor:
+                for path, result, error in executor.map(_RenderFile, tasks, chunksize=chunkSize):
+                    if(error is not None):
+                        summary['failed'][path] = error
+                        continue
+                    result['settings'] = settingsHash
+                    if(result['rendered']):
+                        summary['rendered'].append(path)
+                    else:
+                        #Only the time stamp of the file changed, the content is the same
+                        result['outputs'] = manifest[self.__ManifestKey(path)]['outputs']
+                        summary['skipped'].append(path)
+                    del result['rendered']
+                    manifest[self.__ManifestKey(path)] = result
+            self.__SaveManifest(manifest)
+        return summary
+
+    def __ManifestKey(self, path:str) -> str:
+        #Both layouts can share one output directory
+        return path + '|' + self.settings['layout']
+
+    def __LoadManifest(self) -> dict:
+        if(not os.path.exists(self.manifestPath)):
+            return {}
+        try:
+            with open(self.manifestPath, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def __SaveManifest(self, manifest:dict):
+        temporaryPath = self.manifestPath + '.tmp'
+        with open(temporaryPath, 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(temporaryPath, self.manifestPath)
+
+
+#----------------Worker Functions (module level, so they can be sent to the worker processes)----------
+def _UseHeadlessBackend():
+    matplotlib.use('Agg', force=True)
+
+def _Hash(content:bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
+
+def _RenderFile(task):
+    path, outputDirectory, settings, previousHash = task
+    try:
+        status = os.stat(path)
+        with open(path, 'rb') as f:
+            content = f.read()
+        contentHash = _Hash(content)
+        result = {'size':status.st_size, 'mtime_ns':status.st_mtime_ns, 'sha1':contentHash, 'outputs':[], 'rendered':False}
+        if(contentHash == previousHash):
+            return path, result, None
+        result['outputs'] = _DrawFigure(path, outputDirectory, settings)
+        result['rendered'] = True
+        return path, result, None
+    except Exception as ex:
+        return path, None, f'{type(ex).__name__}: {ex}'
+
+def _DrawFigure(path:str, outputDirectory:str, settings:dict) -> list:
+    #Imported here, so the parent process does not need pyplot to schedule the work
+    import pandas as pd
+    import ivAnalysis
+    from suplemenaryFunctions import Plots
+
+    if(path.lower().endswith('.xlsx')):
+        dataFrame = pd.read_excel(path)
+    else:
+        dataFrame = pd.read_csv(path)
+    fileName = os.path.splitext(os.path.basename(path))[0] + '_' + settings['layout']
+    directory = os.path.join(outputDirectory, '')
+    x = ivAnalysis.MaskOverflow(dataFrame[settings['xColumn']].to_numpy())
+    y = ivAnalysis.MaskOverflow(dataFrame[settings['yColumn']].to_numpy())
+    plots = Plots()
+    if(settings['layout'] == 'twin'):
+        return plots.TwinAxisPlot(commonAxisData=dataFrame[settings['timeColumn']].to_numpy(), commonAxisCaption=settings['timeColumn'],
+                                  leftAxisData=x, leftAxixCaption=settings['X_AxisCaption'],
+                                  rightAxisData=y, rightAxisCaption=settings['Y_AxixCaption'],
+                                  title=fileName, _plotType='line', _isPlotShown=False,
+                                  _isSaveToDirectory=True, _fileType=settings['fileTypes'], _directory=directory, _fileName=fileName,
+                                  maxPlottedPoints=settings['maxPlottedPoints'])
+    return plots.Plot(X_AxisData=x, X_AxisCaption=settings['X_AxisCaption'],
+                      Y_AxisData=y, Y_AxixCaption=settings['Y_AxixCaption'],
+                      X_AxisData1=x, X_AxisCaption1=settings['X_AxisCaption'],
+                      Y_AxisData1=ivAnalysis.SignedLog10(y), Y_AxixCaption1=settings['Y_AxixCaption'] + ' - Log10',
+                      title=fileName, _isPlotShown=False,
+                      _isSaveToDirectory=True, _fileType=settings['fileTypes'], _directory=directory, _fileName=fileName,
+                      maxPlottedPoints=settings['maxPlottedPoints'])
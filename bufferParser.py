@@ -0,0 +1,99 @@
+"""
+Parsers for the ASCII answers of printbuffer().
+
+printbuffer() answers with one comma-separated line. Sending it through io.StringIO and pandas.read_csv
+builds a whole DataFrame (type inference, index, one column per value) only to take its first row.
+The functions here parse the line directly into a NumPy array.
+
+Run this file to compare the speed with the pandas path:
+    python bufferParser.py
+"""
+
+import warnings
+import numpy as np
+from ivAnalysis import OVERFLOW_SENTINEL
+
+
+def ParseNumericResponse(response:str, maskOverflow:bool=True, numberOfColumns:int=1) -> np.ndarray:
+    """
+    Parses a comma-separated numeric answer of the device.
+
+    Args:
+        response (str): The answer of the device, e.g. '1.0e-03, 2.0e-03, 9.91e+37\\n'.
+        maskOverflow (bool, optional): Replaces the 9.91e37 overflow value with NaN. Defaults to True.
+        numberOfColumns (int, optional): printbuffer() with several buffer attributes prints them row by row
+        (r1, u1, r2, u2, ...); with numberOfColumns > 1 the result is reshaped to (readings x columns). Defaults to 1.
+
+    Returns:
+        np.ndarray: float64 array
+    """
+    response = response.strip()
+    if(response == ''):
+        values = np.empty(0, dtype=np.float64)
+    else:
+        try:
+            with warnings.catch_warnings():
+                #Older NumPy versions only warn and stop at a value they cannot read, newer ones raise
+                warnings.simplefilter('ignore', DeprecationWarning)
+                values = np.fromstring(response, dtype=np.float64, sep=',')
+        except ValueError:
+            values = None
+        if(values is None or values.size != response.count(',') + 1):
+            #The slower split reports which value could not be read
+            values = np.array(response.split(','), dtype=np.float64)
+    if(maskOverflow):
+        values[np.abs(values) >= OVERFLOW_SENTINEL * (1 - 1e-3)] = np.nan
+    if(numberOfColumns > 1):
+        if(values.size % numberOfColumns != 0):
+            raise Exception(f'The answer has {values.size} values, which is not a multiple of {numberOfColumns} columns.')
+        values = values.reshape(-1, numberOfColumns)
+    return values
+
+def ParseTextResponse(response:str) -> np.ndarray:
+    """
+    Parses a comma-separated text answer of the device (e.g. the units) into an array of stripped strings.
+    """
+    response = response.strip()
+    if(response == ''):
+        return np.empty(0, dtype=str)
+    return np.char.strip(np.array(response.split(',')))
+
+def ToDatetime64(seconds, fractionalSeconds) -> np.ndarray:
+    """
+    Combines the bufferVar.seconds and bufferVar.fractionalseconds columns into absolute UTC time stamps.
+    Readings whose seconds are NaN (masked overflow values) become NaT.
+
+    Args:
+        seconds (np.ndarray): the non-fractional UTC seconds of each reading.
+        fractionalSeconds (np.ndarray): the fractional part of the seconds of each reading.
+
+    Returns:
+        np.ndarray: datetime64[ns] array
+    """
+    seconds = np.asarray(seconds, dtype=np.float64)
+    fractionalSeconds = np.asarray(fractionalSeconds, dtype=np.float64)
+    valid = np.isfinite(seconds) & np.isfinite(fractionalSeconds)
+    nanoseconds = np.zeros(seconds.shape, dtype=np.int64)
+    nanoseconds[valid] = np.rint(seconds[valid]).astype(np.int64) * 1_000_000_000 + np.rint(fractionalSeconds[valid] * 1e9).astype(np.int64)
+    result = nanoseconds.view('datetime64[ns]').copy()
+    result[~valid] = np.datetime64('NaT')
+    return result
+
+def _ParseWithPandas(response:str) -> np.ndarray:
+    #The path ReturnBufferValues() used before; kept only for the comparison below
+    import io
+    import pandas as pd
+    return pd.read_csv(io.StringIO(response), sep=',', header=None).values[0]
+
+
+if __name__ == '__main__':
+    import timeit
+
+    for count in (1_000, 10_000, 100_000, 1_000_000):
+        values = np.random.randn(count) * 1e-3
+        values[::97] = OVERFLOW_SENTINEL
+        response = ', '.join(f'{value:.10e}' for value in values) + '\n'
+        repeats = max(1, 100_000 // count)
+        numpyTime = timeit.timeit(lambda: ParseNumericResponse(response), number=repeats) / repeats
+        pandasTime = timeit.timeit(lambda: _ParseWithPandas(response), number=repeats) / repeats
+        print(f'{count:>9} values: numpy {numpyTime * 1e3:9.3f} ms   pandas.read_csv {pandasTime * 1e3:9.3f} ms   ({pandasTime / numpyTime:5.1f}x)')
@@ -0,0 +1,58 @@
+"""
+Cancellation tokens for long runs of KeithleyDeviceManager.
+
+A token is passed to a Sweep_* function and cancelled from another thread (a GUI button, a watchdog, a monitor
+that sees a shorted DUT). With a token the function does not block in waitcomplete(); it checks the state of the
+trigger model every POLL_INTERVAL seconds. When the token is cancelled the trigger model is aborted, the output is
+switched off and the readings taken so far are returned (and kept in token.partialResult). The session stays usable,
+so the next DUT can be measured without a new Initialize().
+
+Sample:
+    token = CancellationToken(timeoutSeconds=600)       #also cancels itself after 10 minutes
+    threading.Timer(5, token.Cancel).start()            #or token.Cancel() from a button callback
+    result = KDM.Sweep_LinearcaseByPoints_Voltage('Sweep1', 0, 5, 1000, cancellationToken=token)
+    if(token.isCancelled):
+        print(token.reason, token.partialResult)
+"""
+
+import threading
+import time
+
+#Seconds between two checks of the trigger model state
+POLL_INTERVAL:float = 0.05
+
+
+class CancellationToken(object):
+
+    def __init__(self, timeoutSeconds:float=None):
+        """
+        Args:
+            timeoutSeconds (float, optional): The token cancels itself this many seconds after it was created. Defaults to None.
+        """
+        self.__event = threading.Event()
+        self.deadline = time.monotonic() + timeoutSeconds if timeoutSeconds is not None else None
+        self.reason:str = None
+        self.partialResult = None
+
+    def Cancel(self, reason:str='Cancelled by the user'):
+        """
+        Cancels the run; it can be called from any thread.
+        """
+        if(not self.__event.is_set()):
+            self.reason = reason
+            self.__event.set()
+
+    @property
+    def isCancelled(self) -> bool:
+        if(not self.__event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline):
+            self.Cancel('Timeout')
+        return self.__event.is_set()
+
+    def Wait(self, seconds:float) -> bool:
+        """
+        Sleeps up to seconds, but returns at once when the token is cancelled. Returns isCancelled.
+        """
+        if(self.deadline is not None):
+            seconds = max(0.0, min(seconds, self.deadline - time.monotonic()))
+        self.__event.wait(seconds)
+        return self.isCancelled
@@ -0,0 +1,211 @@
+import pyvisa as visa
+import json
+import os
+import time
+
+
+class DiscoveryCache(object):
+    """
+    Remembers the result of the VISA bus enumeration and the '*IDN?' identity of every address, so that
+    the slow list_resources() call (seconds on systems with GPIB and USB controllers) is not repeated on
+    every start.
+
+    The cache has two levels:
+        • An in-process memo that is shared by all the objects using the same cache file (or no file).
+        • An optional JSON file on disk, so the next run of a script can reuse the last scan.
+    Every entry has a time stamp; entries older than timeToLive seconds are ignored and re-read from the
+    bus the next time they are requested. Use Refresh() to force a new scan.
+
+    Sample:
+        cache = DiscoveryCache(cacheFilePath='D:\\\\HiWi\\\\visa_cache.json', timeToLive=3600)
+        address = cache.ResolveBySerial('04586850')
+        KDM = KeithleyDeviceManager(GPI_or_USB_Address=address)
+    """
+    #key: cache file path (None for the memory-only cache), value: the cached state
+    __memo:dict = {}
+
+    def __init__(self, cacheFilePath:str=None, timeToLive:float=3600, resourceManager=None,
+                 identityQueryTimeout:int=2000):
+        """
+        Args:
+            cacheFilePath (str, optional): Path of the JSON file that keeps the cache between runs. None keeps the cache only in memory. Defaults to None.
+            timeToLive (float, optional): How many seconds a cached resource list or identity stays valid. None means the entries never expire. Defaults to 3600.
+            resourceManager (optional): An already opened pyvisa ResourceManager. If it is None, one is created the first time the bus has to be accessed. Defaults to None.
+            identityQueryTimeout (int, optional): VISA timeout in ms used for the '*IDN?' query of each address. Defaults to 2000.
+        """
+        self.cacheFilePath = cacheFilePath
+        self.timeToLive = timeToLive
+        self.resourceManager = resourceManager
+        self.identityQueryTimeout = identityQueryTimeout
+        if(self.cacheFilePath not in DiscoveryCache.__memo):
+            DiscoveryCache.__memo[self.cacheFilePath] = self.__LoadFromDisk()
+
+    #----------------Public Functions----------------------------
+    def ListResources(self, refresh:bool=False, queryString:str='?*::INSTR'):
+        """
+        Returns the addresses of the devices connected to the system. The bus is only scanned if the cached
+        list is missing, expired, was made with another query string or refresh is True.
+
+        Args:
+            refresh (bool, optional): Ignores the cache and scans the bus again. Defaults to False.
+            queryString (str, optional): The pyvisa list_resources() query. Defaults to '?*::INSTR'.
+
+        Returns:
+            tuple: the addresses of the connected devices
+        """
+        state = self.__State()
+        if(refresh or state['resources'] is None or state['query'] != queryString or self.__IsExpired(state['resourcesTime'])):
+            state['resources'] = list(self.__ResourceManager().list_resources(queryString))
+            state['resourcesTime'] = time.time()
+            state['query'] = queryString
+            self.__SaveToDisk()
+        return tuple(state['resources'])
+
+    def Identify(self, address:str, refresh:bool=False) -> dict:
+        """
+        Returns the identity of the device at the given address by sending '*IDN?' to it. The answer is
+        cached per address.
+
+        Args:
+            address (str): The GPIB/USB address of the device.
+            refresh (bool, optional): Ignores the cached identity and asks the device again. Defaults to False.
+
+        Returns:
+            dict: {'manufacturer', 'model', 'serial', 'firmware', 'raw'}. If the device did not answer, only the 'error' key is filled and nothing is cached.
+        """
+        state = self.__State()
+        identity = state['identities'].get(address)
+        if(refresh or identity is None or self.__IsExpired(identity['time'])):
+            identity = self.__QueryIdentity(address)
+            if('error' in identity):
+                #A device that did not answer (switched off, busy, ...) is not cached, so it is asked again next time
+                return identity
+            identity['time'] = time.time()
+            state['identities'][address] = identity
+            self.__SaveToDisk()
+        return {key:value for key, value in identity.items() if key != 'time'}
+
+    def IdentifyAll(self, refresh:bool=False) -> dict:
+        """
+        Returns the identity of every listed device. Only the addresses without a valid cached identity are
+        queried.
+
+        Args:
+            refresh (bool, optional): Scans the bus and queries all the devices again. Defaults to False.
+
+        Returns:
+            dict: address -> identity (see Identify())
+        """
+        return {address:self.Identify(address, refresh=refresh) for address in self.ListResources(refresh=refresh)}
+
+    def ResolveBySerial(self, serialNumber:str, model:str=None, allowBusScan:bool=True) -> str:
+        """
+        Finds the address of the device with the given serial number. The search goes from the cheapest to
+        the most expensive source and stops as soon as the device is found:
+            1. The cached identities.
+            2. The cached addresses which already contain the serial number (USB addresses do).
+            3. The cached addresses that have not been identified yet.
+            4. A new scan of the bus (only if allowBusScan is True).
+
+        Args:
+            serialNumber (str): The serial number as reported by '*IDN?' (e.g. '04586850').
+            model (str, optional): Also requires the model to match, e.g. '2450'. Defaults to None.
+            allowBusScan (bool, optional): Allows a new bus scan if the device is not found in the cache. Defaults to True.
+
+        Returns:
+            str: The address of the device or None if it was not found.
+        """
+        serialNumber = str(serialNumber).strip()
+        state = self.__State()
+        for address, identity in state['identities'].items():
+            if(not self.__IsExpired(identity['time']) and self.__IsMatch(identity, serialNumber, model)):
+                return address
+        cachedAddresses = state['resources'] if state['resources'] is not None else []
+        candidates = [address for address in cachedAddresses if serialNumber in address]
+        candidates += [address for address in cachedAddresses if address not in candidates and address not in state['identities']]
+        for address in candidates:
+            if(self.__IsMatch(self.Identify(address), serialNumber, model)):
+                return address
+        if(allowBusScan):
+            for address in self.ListResources(refresh=True):
+                if(self.__IsMatch(self.Identify(address), serialNumber, model)):
+                    return address
+        return None
+
+    def Refresh(self):
+        """
+        Drops all cached identities and scans the bus again.
+        """
+        self.__State()['identities'] = {}
+        self.ListResources(refresh=True)
+
+    def Clear(self):
+        """
+        Removes the cached data from memory and deletes the cache file.
+        """
+        DiscoveryCache.__memo[self.cacheFilePath] = self.__EmptyState()
+        if(self.cacheFilePath is not None and os.path.exists(self.cacheFilePath)):
+            os.remove(self.cacheFilePath)
+
+    #----------------Private Functions---------------------------
+    def __ResourceManager(self):
+        if(self.resourceManager is None):
+            self.resourceManager = visa.ResourceManager()
+        return self.resourceManager
+
+    def __State(self) -> dict:
+        return DiscoveryCache.__memo[self.cacheFilePath]
+
+    def __IsExpired(self, timestamp:float) -> bool:
+        if(timestamp is None):
+            return True
+        if(self.timeToLive is None):
+            return False
+        return (time.time() - timestamp) > self.timeToLive
+
+    def __QueryIdentity(self, address:str) -> dict:
+        device = None
+        try:
+            device = self.__ResourceManager().open_resource(address)
+            device.timeout = self.identityQueryTimeout
+            raw = device.query('*IDN?').strip()
+            fields = [field.strip() for field in raw.split(',')] + ['', '', '', '']
+            return {'manufacturer':fields[0], 'model':fields[1], 'serial':fields[2], 'firmware':fields[3], 'raw':raw}
+        except Exception as ex:
+            return {'error':str(ex)}
+        finally:
+            if(device is not None):
+                try:
+                    device.close()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def __IsMatch(identity:dict, serialNumber:str, model:str) -> bool:
+        if(identity.get('serial') != serialNumber):
+            return False
+        return (model is None) or (str(model) in identity.get('model', ''))
+
+    @staticmethod
+    def __EmptyState() -> dict:
+        return {'resources':None, 'resourcesTime':None, 'query':None, 'identities':{}}
+
+    def __LoadFromDisk(self) -> dict:
+        state = self.__EmptyState()
+        if(self.cacheFilePath is None or not os.path.exists(self.cacheFilePath)):
+            return state
+        try:
+            with open(self.cacheFilePath, 'r') as f:
+                state.update(json.load(f))
+        except (OSError, ValueError) as ex:
+            print(f"The discovery cache file <{self.cacheFilePath}> could not be read and is ignored. The technical error is:\n", ex)
+        return state
+
+    def __SaveToDisk(self):
+        if(self.cacheFilePath is None):
+            return
+        #Write to a temporary file first, so an interrupted run never leaves a broken cache file behind
+        temporaryPath = self.cacheFilePath + '.tmp'
+        with open(temporaryPath, 'w') as f:
+            json.dump(self.__State(), f, indent=1)
+        os.replace(temporaryPath, self.cacheFilePath)
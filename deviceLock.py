@@ -0,0 +1,173 @@
+"""
+Thread-safe access to the VISA session of the device.
+
+LockedDevice wraps the session (KeithleyDeviceManager wraps it by itself) and serializes write(), read() and query().
+A group of commands that must not be interleaved with the commands of other threads (e.g. a write and the query of
+its answer, or a whole measurement) runs in Atomic(). The lock has two priorities: a waiting HIGH priority group
+(the measurements) always goes first, LOW priority requests (the pollers of a monitor) only get the device when no
+measurement is waiting, i.e. between the measurement batches.
+
+Sample (a monitor thread next to a running sweep):
+    def Monitor():
+        while running:
+            print('readings:', KDM.Poll('print(defbuffer1.n)', timeout=1))
+            time.sleep(0.5)
+    threading.Thread(target=Monitor, daemon=True).start()
+    KDM.Sweep_LinearcaseByPoints_Voltage(...)           #each measurement function is one atomic group
+
+    with KDM.Atomic():                                  #own groups of commands
+        KDM.Device.write('smu.measure.read(defbuffer1)')
+        reading = KDM.Device.query('print(defbuffer1.readings[defbuffer1.n])')
+"""
+
+import collections
+import contextlib
+import functools
+import threading
+from eventLog import JOURNAL_LENGTH, InstrumentError
+
+HIGH:int = 0
+LOW:int = 1
+
+
+class PriorityLock(object):
+    """
+    Reentrant lock with two priorities. The owning thread can acquire it again (a group inside a group).
+    """
+
+    def __init__(self):
+        self.__condition = threading.Condition()
+        self.__owner = None
+        self.__depth = 0
+        self.__waitingHigh = 0
+
+    def Acquire(self, priority:int=HIGH, timeout:float=None) -> bool:
+        thread = threading.get_ident()
+        with self.__condition:
+            if(self.__owner == thread):
+                self.__depth += 1
+                return True
+            if(priority == HIGH):
+                self.__waitingHigh += 1
+            try:
+                isFree = lambda: self.__owner is None and (priority == HIGH or self.__waitingHigh == 0)
+                if(not self.__condition.wait_for(isFree, timeout)):
+                    return False
+                self.__owner = thread
+                self.__depth = 1
+                return True
+            finally:
+                if(priority == HIGH):
+                    self.__waitingHigh -= 1
+                    #A HIGH request that timed out may be the last one the LOW requests were waiting for
+                    self.__condition.notify_all()
+
+    @property
+    def depth(self) -> int:
+        #How many times the current thread holds the lock (0 if it does not hold it)
+        return self.__depth if self.__owner == threading.get_ident() else 0
+
+    def Release(self):
+        with self.__condition:
+            if(self.__owner != threading.get_ident()):
+                raise Exception('The device lock is released by a thread that does not hold it.')
+            self.__depth -= 1
+            if(self.__depth == 0):
+                self.__owner = None
+                self.__condition.notify_all()
+
+    @contextlib.contextmanager
+    def Hold(self, priority:int=HIGH, timeout:float=None):
+        if(not self.Acquire(priority, timeout)):
+            raise Exception(f'The device was not free within {timeout} s.')
+        try:
+            yield
+        finally:
+            self.Release()
+
+
+class LockedDevice(object):
+
+    def __init__(self, device):
+        """
+        Args:
+            device: The VISA session (or any object with write(), read() and query()).
+        """
+        self.device = device
+        self.lock = PriorityLock()
+        #The commands since the last check of the event log, to map its events back to them
+        self.journal = collections.deque(maxlen=JOURNAL_LENGTH)
+
+    def write(self, command:str):
+        with self.lock.Hold(HIGH):
+            self.journal.append(command)
+            return self.device.write(command)
+
+    def read(self) -> str:
+        with self.lock.Hold(HIGH):
+            return self.device.read()
+
+    def query(self, command:str) -> str:
+        with self.lock.Hold(HIGH):
+            self.journal.append(command)
+            return self.device.query(command)
+
+    def Atomic(self, priority:int=HIGH, timeout:float=None):
+        """
+        Context manager: the commands of the with statement are not interleaved with the commands of other threads.
+        """
+        return self.lock.Hold(priority, timeout)
+
+    def Poll(self, command:str, timeout:float=None) -> str:
+        """
+        Low priority query for monitors: waits until no measurement holds or waits for the device.
+        Returns None if the device was not free within timeout seconds.
+        """
+        if(not self.lock.Acquire(LOW, timeout)):
+            return None
+        try:
+            return self.device.query(command)
+        finally:
+            self.lock.Release()
+
+    def __getattr__(self, name:str):
+        #timeout, close(), read_termination, ... of the session
+        return getattr(self.device, name)
+
+    def __setattr__(self, name:str, value):
+        #e.g. Device.timeout = None must reach the session
+        if(name in ('device', 'lock', 'journal')):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.device, name, value)
+
+
+def AtomicDeviceAccess(method):
+    """
+    Decorator of the measurement functions of KeithleyDeviceManager: the whole function is one atomic group.
+    At the end of the outermost group (a batch) the event log of the device is checked, see eventLog.py.
+    """
+    @functools.wraps(method)
+    def Wrapper(self, *args, **kwargs):
+        device = self.Device
+        if(not isinstance(device, LockedDevice)):
+            return method(self, *args, **kwargs)
+        with device.Atomic(HIGH):
+            isBatch = device.lock.depth == 1
+            try:
+                result = method(self, *args, **kwargs)
+            except Exception as ex:
+                if(isBatch and self.checkEventLog and isinstance(self.Device, LockedDevice)):
+                    #The errors of the device usually explain the failure, so they are raised instead
+                    try:
+                        self.CheckEventLog()
+                    except InstrumentError as instrumentError:
+                        raise instrumentError from ex
+                    except Exception:
+                        #The event log could not be read (e.g. the session is broken); the original error is raised
+                        pass
+                raise
+            if(isBatch and self.checkEventLog and isinstance(self.Device, LockedDevice)):
+                self.CheckEventLog()
+            return result
+    return Wrapper
@@ -0,0 +1,187 @@
+"""
+Physical models of devices under test for the simulated instrument (see simulatedInstrument.py).
+
+Every model computes whole arrays at once: Respond() gets all the source levels of a sweep (and the time of each
+reading) and returns all the readings, so a simulated sweep of a million points costs a few NumPy operations.
+Models can be wrapped: SettlingModel and NoisyModel take another model and change its readings.
+
+Sample:
+    diode = DiodeModel(saturationCurrent=1e-12, idealityFactor=1.8, seriesResistance=2.0)
+    dut = NoisyModel(SettlingModel(diode, timeConstant=2e-3), noise=1e-9, relativeNoise=1e-4, drift=1e-8)
+    currents = dut.Respond(np.linspace(0, 0.8, 801), sourceIsVoltage=True, times=np.arange(801) * 0.02, settleTimes=0.001)
+
+Model                                   Current I(V)
+    ResistorModel(resistance)           V / R
+    DiodeModel(Is, n, Rs, T)            Shockley diode with series resistance (V(I) is explicit, I(V) is solved)
+    SolarCellModel(Iph, Is, n, Rs, Rsh) single-diode solar cell: I = -Iph + Is(exp((V - I Rs)/(n Vt)) - 1) + (V - I Rs)/Rsh
+    SettlingModel(model, tau)           the reading has not settled after a short source delay (RC settling)
+    NoisyModel(model, ...)              white noise, relative noise and a linear drift with time
+"""
+
+import numpy as np
+from ivFitting import ThermalVoltage
+
+
+class DutModel(object):
+    """
+    Base class. A model implements Current() and, if it has an explicit form, Voltage(); otherwise Voltage() is
+    found by bisection of Current(), which must rise with the voltage.
+    """
+
+    def Current(self, voltages:np.ndarray, times:np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def Voltage(self, currents:np.ndarray, times:np.ndarray, voltageLimit:float=210.0) -> np.ndarray:
+        low = np.full(np.shape(currents), -voltageLimit)
+        high = np.full(np.shape(currents), voltageLimit)
+        #60 halvings of 420 V give a resolution far below the 6.5 digits of the device
+        for _ in range(60):
+            middle = 0.5 * (low + high)
+            isBelow = self.Current(middle, times) < currents
+            low = np.where(isBelow, middle, low)
+            high = np.where(isBelow, high, middle)
+        return 0.5 * (low + high)
+
+    def Respond(self, levels, sourceIsVoltage:bool, times=None, settleTimes=None) -> np.ndarray:
+        """
+        The readings for the source levels, in the order they are sourced.
+
+        Args:
+            levels (array): Source levels (V if sourceIsVoltage, else A).
+            sourceIsVoltage (bool): True returns currents, False returns voltages.
+            times (array, optional): Time of each reading in s (for drifting models). Defaults to 0.
+            settleTimes (float | array, optional): Time between setting each level and its reading in s (for settling models). Defaults to None (settled).
+        """
+        levels = np.asarray(levels, dtype=float)
+        times = np.zeros(levels.shape) if times is None else np.broadcast_to(np.asarray(times, dtype=float), levels.shape)
+        if(sourceIsVoltage):
+            return self.Current(levels, times)
+        return self.Voltage(levels, times)
+
+
+class ResistorModel(DutModel):
+
+    def __init__(self, resistance:float=1e3):
+        self.resistance = resistance
+
+    def Current(self, voltages, times):
+        return np.asarray(voltages) / self.resistance
+
+    def Voltage(self, currents, times, voltageLimit:float=210.0):
+        return np.asarray(currents) * self.resistance
+
+
+class DiodeModel(DutModel):
+
+    def __init__(self, saturationCurrent:float=1e-12, idealityFactor:float=1.5, seriesResistance:float=1.0,
+                 temperature:float=300):
+        self.saturationCurrent = saturationCurrent
+        self.idealityFactor = idealityFactor
+        self.seriesResistance = seriesResistance
+        self.temperature = temperature
+
+    def Voltage(self, currents, times, voltageLimit:float=210.0):
+        currents = np.asarray(currents, dtype=float)
+        nVt = self.idealityFactor * ThermalVoltage(self.temperature)
+        #Below -Is the diode cannot conduct; the reverse current saturates and the voltage runs to the limit
+        ratio = np.maximum(currents / self.saturationCurrent + 1, np.finfo(float).tiny)
+        voltages = nVt * np.log(ratio) + currents * self.seriesResistance
+        return np.where(currents <= -self.saturationCurrent, -voltageLimit, voltages)
+
+    def Current(self, voltages, times):
+        return _JunctionCurrent(voltages, 0.0, self.saturationCurrent, self.idealityFactor * ThermalVoltage(self.temperature),
+                                self.seriesResistance, np.inf)
+
+
+class SolarCellModel(DutModel):
+
+    def __init__(self, photoCurrent:float=30e-3, saturationCurrent:float=1e-10, idealityFactor:float=1.3,
+                 seriesResistance:float=0.5, shuntResistance:float=1e4, temperature:float=300):
+        self.photoCurrent = photoCurrent
+        self.saturationCurrent = saturationCurrent
+        self.idealityFactor = idealityFactor
+        self.seriesResistance = seriesResistance
+        self.shuntResistance = shuntResistance
+        self.temperature = temperature
+
+    def Current(self, voltages, times):
+        #The current flowing into the cell (the sign convention of the SMU): negative under light at 0 V
+        return _JunctionCurrent(voltages, self.photoCurrent, self.saturationCurrent,
+                                self.idealityFactor * ThermalVoltage(self.temperature), self.seriesResistance, self.shuntResistance)
+
+
+class SettlingModel(DutModel):
+    """
+    The device is charged through an RC time constant: a reading taken settleTime after a level change still holds
+    exp(-settleTime / timeConstant) of the step from the previous reading.
+    """
+
+    def __init__(self, model:DutModel, timeConstant:float=1e-3):
+        self.model = model
+        self.timeConstant = timeConstant
+
+    def Current(self, voltages, times):
+        return self.model.Current(voltages, times)
+
+    def Voltage(self, currents, times, voltageLimit:float=210.0):
+        return self.model.Voltage(currents, times, voltageLimit)
+
+    def Respond(self, levels, sourceIsVoltage:bool, times=None, settleTimes=None) -> np.ndarray:
+        final = self.model.Respond(levels, sourceIsVoltage, times, settleTimes)
+        if(settleTimes is None or final.size < 2):
+            return final
+        remaining = np.exp(-np.broadcast_to(np.asarray(settleTimes, dtype=float), final.shape) / self.timeConstant)
+        readings = final.copy()
+        readings[1:] = final[1:] + (final[:-1] - final[1:]) * remaining[1:]
+        return readings
+
+
+class NoisyModel(DutModel):
+    """
+    Adds white noise (noise, in A or V), noise relative to the reading (relativeNoise) and a drift of drift per second.
+    seed makes the noise repeatable.
+    """
+
+    def __init__(self, model:DutModel, noise:float=0.0, relativeNoise:float=0.0, drift:float=0.0, seed:int=None):
+        self.model = model
+        self.noise = noise
+        self.relativeNoise = relativeNoise
+        self.drift = drift
+        self.random = np.random.default_rng(seed)
+
+    def Current(self, voltages, times):
+        return self.model.Current(voltages, times)
+
+    def Voltage(self, currents, times, voltageLimit:float=210.0):
+        return self.model.Voltage(currents, times, voltageLimit)
+
+    def Respond(self, levels, sourceIsVoltage:bool, times=None, settleTimes=None) -> np.ndarray:
+        readings = self.model.Respond(levels, sourceIsVoltage, times, settleTimes)
+        times = np.zeros(readings.shape) if times is None else np.broadcast_to(np.asarray(times, dtype=float), readings.shape)
+        scale = np.sqrt(self.noise ** 2 + (self.relativeNoise * readings) ** 2)
+        return readings + self.drift * times + scale * self.random.standard_normal(readings.shape)
+
+
+def _JunctionCurrent(voltages, photoCurrent:float, saturationCurrent:float, nVt:float, seriesResistance:float,
+                     shuntResistance:float) -> np.ndarray:
+    #Current into a single-diode junction at the terminal voltages V, with I = -Iph + Is(exp(Vj/nVt) - 1) + Vj/Rsh and Vj = V - I Rs.
+    #Newton's method on the junction voltage: h(Vj) = -Iph + Is(exp(Vj/nVt) - 1) + Vj/Rsh - (V - Vj)/Rs is convex and rising,
+    #so started above the root it converges from above without overshooting (and without overflow at high voltages).
+    voltages = np.asarray(voltages, dtype=float)
+    if(seriesResistance <= 0):
+        return -photoCurrent + saturationCurrent * np.expm1(np.minimum(voltages / nVt, 700)) + voltages / shuntResistance
+    #Both starts have h >= 0: the open-circuit voltage of the ideal cell (or V above it) and the junction voltage that
+    #carries all of |V|/Rs + Iph
+    openCircuit = nVt * np.log1p(photoCurrent / saturationCurrent)
+    carried = nVt * np.log1p((np.abs(voltages) / seriesResistance + photoCurrent) / saturationCurrent)
+    junction = np.minimum(np.maximum(voltages, openCircuit), carried)
+    for _ in range(100):
+        exponential = np.exp(junction / nVt)
+        error = (-photoCurrent + saturationCurrent * (exponential - 1) + junction / shuntResistance
+                 - (voltages - junction) / seriesResistance)
+        slope = saturationCurrent * exponential / nVt + 1 / shuntResistance + 1 / seriesResistance
+        step = error / slope
+        junction = junction - step
+        if(np.all(np.abs(step) < 1e-13)):
+            break
+    return (voltages - junction) / seriesResistance
@@ -0,0 +1,207 @@
+"""
+Scheduler for lot testing: a queue of DUT jobs (a recipe and a DUT id) shared by a pool of instruments.
+
+Every instrument runs in its own thread and takes the next job of the queue as soon as it is free, so no instrument
+waits for another one. A job that fails is put back into the queue and is retried on another instrument (up to
+maxAttempts); an instrument that fails maxConsecutiveFailures jobs in a row is taken out of the pool. The queue is
+saved in stateFile after every change: after a crash, Run() continues with the jobs that were not done (the jobs that
+were running are run again).
+
+Sample:
+    instruments = {'smu1':KeithleyDeviceManager('USB0::0x05E6::0x2450::04586850::INSTR'),
+                   'smu2':KeithleyDeviceManager('USB0::0x05E6::0x2450::04586851::INSTR')}
+    scheduler = DutScheduler(instruments, stateFile='D:\\HiWi\\lot7\\queue.json', outputDirectory='D:\\HiWi\\lot7')
+    for dutId in ['W1-A01', 'W1-A02', 'W1-A03']:
+        scheduler.AddJob(dutId, 'D:\\HiWi\\recipes\\iv.json')
+    scheduler.Run()
+    print(scheduler.Throughput())
+
+Each job runs recipeRunner.RunRecipe() on the instrument it was given to; with outputDirectory the results of each
+DUT are saved in outputDirectory\\<dutId>.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class DutScheduler(object):
+
+    def __init__(self, instruments:dict, stateFile:str, outputDirectory:str=None, maxAttempts:int=2,
+                 maxConsecutiveFailures:int=3):
+        """
+        Args:
+            instruments (dict): {name: KeithleyDeviceManager}. The names are used in the state file and in the report.
+            stateFile (str): JSON file of the queue. If it exists, its jobs are loaded.
+            outputDirectory (str, optional): The results of each DUT are saved in outputDirectory/<dutId>. Defaults to None (the output directory of the recipe).
+            maxAttempts (int, optional): How many times a job is run before it is marked as failed. Defaults to 2.
+            maxConsecutiveFailures (int, optional): An instrument that fails this many jobs in a row is taken out of the pool. Defaults to 3.
+        """
+        if(len(instruments) == 0):
+            raise Exception('The scheduler needs at least one instrument.')
+        self.instruments = dict(instruments)
+        self.stateFile = stateFile
+        self.outputDirectory = outputDirectory
+        self.maxAttempts = maxAttempts
+        self.maxConsecutiveFailures = maxConsecutiveFailures
+        self.jobs = []
+        self.results = {}
+        self.statistics = {name:{'jobs':0, 'failed':0, 'busySeconds':0.0, 'retired':False} for name in self.instruments}
+        self.__lock = threading.Condition()
+        self.__startTime = None
+        self.__endTime = None
+        self.__LoadState()
+
+    def AddJob(self, dutId:str, recipe):
+        """
+        Adds a job at the end of the queue. recipe is a recipe dict or the path of a recipe file (see recipeRunner.py).
+        A DUT id that is already in the queue is not added again.
+        """
+        with self.__lock:
+            if(any(job['dutId'] == dutId for job in self.jobs)):
+                return
+            self.jobs.append({'dutId':dutId, 'recipe':recipe, 'status':PENDING, 'attempts':0, 'failedOn':[],
+                              'instrument':None, 'error':None, 'startTime':None, 'endTime':None})
+            self.__SaveState()
+            self.__lock.notify_all()
+
+    def Run(self, cancellationToken=None) -> dict:
+        """
+        Runs all the pending jobs on all the instruments and returns {dutId: results of RunRecipe()} of this run.
+        With a cancellationToken, no new job is started after it is cancelled and the running ones are cancelled.
+        """
+        self.__startTime = time.time()
+        threads = [threading.Thread(target=self.__Worker, args=(name, cancellationToken), name=f'DutScheduler-{name}', daemon=True)
+                   for name in self.instruments]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.__endTime = time.time()
+        return self.results
+
+    def Summary(self) -> dict:
+        """
+        Number of jobs per status.
+        """
+        with self.__lock:
+            counts = {PENDING:0, RUNNING:0, DONE:0, FAILED:0}
+            for job in self.jobs:
+                counts[job['status']] += 1
+            return counts
+
+    def Throughput(self):
+        """
+        Returns a pandas.DataFrame with one row per instrument: finished and failed jobs, busy time, utilization
+        (busy time / duration of Run()), DUTs per hour and mean seconds per DUT.
+        """
+        import pandas as pd
+
+        duration = ((self.__endTime or time.time()) - self.__startTime) if self.__startTime is not None else 0.0
+        rows = []
+        for name, statistics in self.statistics.items():
+            jobs, busySeconds = statistics['jobs'], statistics['busySeconds']
+            rows.append({'instrument':name, 'jobs':jobs, 'failed':statistics['failed'], 'retired':statistics['retired'],
+                         'busySeconds':busySeconds,
+                         'utilization':busySeconds / duration if duration > 0 else float('nan'),
+                         'dutsPerHour':jobs * 3600 / duration if duration > 0 else float('nan'),
+                         'secondsPerDut':busySeconds / jobs if jobs > 0 else float('nan')})
+        return pd.DataFrame(rows)
+
+    #----------------Private Functions---------------------------
+    def __Worker(self, name:str, cancellationToken):
+        from recipeRunner import RunRecipe
+
+        deviceManager = self.instruments[name]
+        consecutiveFailures = 0
+        while True:
+            job = self.__NextJob(name, cancellationToken)
+            if(job is None):
+                return
+            recipe = copy.deepcopy(job['recipe'])
+            startTime = time.time()
+            try:
+                if(isinstance(recipe, str)):
+                    from recipeRunner import LoadRecipe
+                    recipe = LoadRecipe(recipe)
+                recipe.setdefault('address', deviceManager.GPI_or_USB_Address or name)
+                if(self.outputDirectory is not None):
+                    recipe.setdefault('output', {})['directory'] = os.path.join(self.outputDirectory, job['dutId'])
+                results = RunRecipe(recipe, deviceManager=deviceManager, cancellationToken=cancellationToken)
+                error = None
+            except Exception as ex:
+                results = None
+                error = f'{type(ex).__name__}: {ex}'
+            busySeconds = time.time() - startTime
+            with self.__lock:
+                statistics = self.statistics[name]
+                statistics['busySeconds'] += busySeconds
+                job['endTime'] = time.time()
+                if(error is None):
+                    consecutiveFailures = 0
+                    statistics['jobs'] += 1
+                    job['status'] = DONE
+                    job['error'] = None
+                    self.results[job['dutId']] = results
+                else:
+                    consecutiveFailures += 1
+                    statistics['failed'] += 1
+                    job['error'] = error
+                    job['failedOn'].append(name)
+                    #Back into the queue for another instrument, unless it was the last attempt
+                    job['status'] = PENDING if job['attempts'] < self.maxAttempts else FAILED
+                    if(consecutiveFailures >= self.maxConsecutiveFailures):
+                        statistics['retired'] = True
+                self.__SaveState()
+                self.__lock.notify_all()
+                if(statistics['retired']):
+                    return
+
+    def __NextJob(self, name:str, cancellationToken):
+        #Waits for a job this instrument can take; None when there is nothing left for it
+        with self.__lock:
+            while True:
+                if(cancellationToken is not None and cancellationToken.isCancelled):
+                    return None
+                activeInstruments = [other for other, statistics in self.statistics.items() if not statistics['retired']]
+                pending = [job for job in self.jobs if job['status'] == PENDING]
+                #A failed job goes to an instrument it did not fail on, if there is still such an instrument
+                for job in pending:
+                    if(name not in job['failedOn'] or all(other in job['failedOn'] for other in activeInstruments)):
+                        job['status'] = RUNNING
+                        job['attempts'] += 1
+                        job['instrument'] = name
+                        job['startTime'] = time.time()
+                        self.__SaveState()
+                        return job
+                if(not any(job['status'] == RUNNING for job in self.jobs)):
+                    return None
+                #A running job may fail and come back to the queue
+                self.__lock.wait(timeout=1.0)
+
+    def __LoadState(self):
+        if(not os.path.exists(self.stateFile)):
+            return
+        with open(self.stateFile, 'r') as f:
+            state = json.load(f)
+        self.jobs = state.get('jobs', [])
+        for job in self.jobs:
+            #The jobs that were running when the last run stopped are run again
+            if(job['status'] == RUNNING):
+                job['status'] = PENDING
+                job['attempts'] = max(0, job['attempts'] - 1)
+
+    def __SaveState(self):
+        directory = os.path.dirname(os.path.abspath(self.stateFile))
+        os.makedirs(directory, exist_ok=True)
+        temporaryPath = self.stateFile + '.tmp'
+        with open(temporaryPath, 'w') as f:
+            json.dump({'jobs':self.jobs, 'statistics':self.statistics, 'savedAt':time.time()}, f, indent=1, default=repr)
+        os.replace(temporaryPath, self.stateFile)
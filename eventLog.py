@@ -0,0 +1,152 @@
+"""
+Deferred error checking with the event log of the device.
+
+A wrong or rejected TSP command does not answer anything; the device only adds an event to its event log.
+Instead of a query after every write, the event log is drained with one query at the end of each measurement
+function (a batch), the events are mapped back to the commands of the batch that caused them and the errors are
+raised as typed exceptions. Warnings are reported with the warnings module.
+
+Sample:
+    try:
+        KDM.SendVoltage_MeasureCurrent(VoltageLevel=0.5, sourceLimit_i=10)      #10 A is not a valid current limit
+    except ExecutionError as ex:
+        print(ex.code, ex.message, ex.command)
+    KDM.Device.write('smu.source.levl = 1')                                     #own commands: check when convenient
+    KDM.CheckEventLog()
+
+Error classes (by the SCPI code ranges the device uses):
+    CommandError        -100 to -199 and TSP syntax errors (-285)
+    ExecutionError      -200 to -299
+    DeviceError         -300 to -399 and the positive codes of the device
+    QueryError          -400 to -499
+"""
+
+import re
+import warnings
+
+#Commands kept for mapping the events back to the commands of a batch
+JOURNAL_LENGTH:int = 1000
+
+#Field and record separators of the drained events (the messages can contain commas, tabs and quotes)
+_FIELD = '\x1f'
+_RECORD = '\x1e'
+
+#One query: all the errors and warnings, oldest first, in one line
+DRAIN_COMMAND = ('local t = eventlog.SEV_ERROR + eventlog.SEV_WARN '
+                 'local out = {} '
+                 'for i = 1, eventlog.getcount(t) do '
+                 'local number, message, severity, node, seconds, nanoseconds = eventlog.next(t) '
+                 'table.insert(out, string.format("%d\\031%d\\031%d\\031%d\\031%s", number, severity, seconds, nanoseconds, message)) '
+                 'end '
+                 'print("events\\030" .. table.concat(out, "\\030"))')
+
+#Severity values of eventlog.next()
+SEVERITY_ERROR:int = 1
+SEVERITY_WARNING:int = 2
+
+
+class InstrumentEvent(object):
+    __slots__ = ('code', 'message', 'severity', 'seconds', 'nanoseconds', 'command')
+
+    def __init__(self, code:int, message:str, severity:int, seconds:int=0, nanoseconds:int=0, command:str=None):
+        self.code = code
+        self.message = message
+        self.severity = severity
+        self.seconds = seconds
+        self.nanoseconds = nanoseconds
+        self.command = command
+
+    @property
+    def isError(self) -> bool:
+        return self.severity == SEVERITY_ERROR
+
+    def __repr__(self) -> str:
+        command = f' <- {self.command!r}' if self.command is not None else ''
+        return f'{self.code}: {self.message}{command}'
+
+
+class InstrumentError(Exception):
+    """
+    An error of the event log of the device. events holds all the events drained with it (errors and warnings).
+    """
+
+    def __init__(self, event:InstrumentEvent, events:list=None, batchSize:int=0):
+        self.code = event.code
+        self.message = event.message
+        self.command = event.command
+        self.events = events if events is not None else [event]
+        errorsCount = sum(1 for item in self.events if item.isError)
+        text = f'The device reported error {event.code}: {event.message}'
+        if(event.command is not None):
+            text += f' (command: {event.command})'
+        elif(batchSize > 0):
+            text += f' (in one of the last {batchSize} commands)'
+        if(errorsCount > 1):
+            text += f'; {errorsCount - 1} more error(s): ' + '; '.join(repr(item) for item in self.events if item.isError and item is not event)
+        super().__init__(text)
+
+class CommandError(InstrumentError):
+    pass
+
+class ExecutionError(InstrumentError):
+    pass
+
+class DeviceError(InstrumentError):
+    pass
+
+class QueryError(InstrumentError):
+    pass
+
+class InstrumentWarning(UserWarning):
+    pass
+
+
+def ErrorClass(code:int) -> type:
+    if(code == -285 or -199 <= code <= -100):
+        return CommandError
+    if(-299 <= code <= -200):
+        return ExecutionError
+    if(-499 <= code <= -400):
+        return QueryError
+    return DeviceError
+
+def ParseEvents(response:str) -> list:
+    """
+    Parses the answer of DRAIN_COMMAND.
+    """
+    records = response.strip().split(_RECORD)
+    if(records[0] != 'events'):
+        raise Exception(f'The answer of the event log is not valid: {response!r}')
+    events = []
+    for record in records[1:]:
+        if(record == ''):
+            continue
+        code, severity, seconds, nanoseconds, message = record.split(_FIELD, 4)
+        events.append(InstrumentEvent(int(code), message, int(severity), int(seconds), int(nanoseconds)))
+    return events
+
+def MatchCommands(events:list, commands:list):
+    """
+    Sets event.command to the command of the batch that most likely caused each event: the last command that
+    contains a name quoted in the message (e.g. "attempt to index field 'levl'"), else, if the batch has only one
+    command, that command. Events that cannot be mapped keep None.
+    """
+    for event in events:
+        names = re.findall(r"['\"<]([^'\"<>]{2,})['\">]", event.message)
+        for command in reversed(commands):
+            if(any(name in command for name in names)):
+                event.command = command
+                break
+        if(event.command is None and len(commands) == 1):
+            event.command = commands[0]
+
+def RaiseForEvents(events:list, batchSize:int=0):
+    """
+    Reports the warnings with warnings.warn() and raises the first error as its typed InstrumentError.
+    """
+    for event in events:
+        if(not event.isError):
+            warnings.warn(InstrumentWarning(repr(event)), stacklevel=3)
+    errors = [event for event in events if event.isError]
+    if(len(errors) > 0):
+        raise ErrorClass(errors[0].code)(errors[0], events, batchSize)
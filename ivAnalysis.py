@@ -0,0 +1,211 @@
+"""
+Vectorized post-processing of the values read from the device buffers.
+All the functions accept lists or NumPy arrays and work on the whole array at once (no Python loops),
+so a curve with a million points is processed in a few milliseconds.
+
+Conventions used by all the functions:
+    • The device returns 9.91e37 for readings that are out of range or outside the buffer (see printbuffer()).
+      These values are replaced by NaN before any calculation (see MaskOverflow()).
+    • A division by zero or the logarithm of zero does not raise and does not print a warning; the result is
+      the value given by the zeroValue argument (NaN by default).
+"""
+
+import numpy as np
+
+#The value the Model 2450 returns for overflowed readings and for indexes outside a buffer
+OVERFLOW_SENTINEL:float = 9.91e37
+
+#SI prefixes used by ScaleUnits()
+SI_PREFIXES = {'p':1e-12, 'n':1e-9, 'u':1e-6, 'µ':1e-6, 'm':1e-3, '':1.0, 'k':1e3, 'M':1e6, 'G':1e9}
+
+
+def MaskOverflow(values, sentinel:float=OVERFLOW_SENTINEL, relativeTolerance:float=1e-3) -> np.ndarray:
+    """
+    Returns a float copy of the values in which the overflow sentinel (9.91e37) is replaced by NaN.
+
+    Args:
+        values (list | np.ndarray): readings as returned by the device.
+        sentinel (float, optional): The overflow value of the device. Defaults to 9.91e37.
+        relativeTolerance (float, optional): Values with abs(value) >= sentinel*(1-relativeTolerance) are masked, so the rounding of the ASCII precision does not matter. Defaults to 1e-3.
+
+    Returns:
+        np.ndarray: float64 array with NaN instead of the sentinel
+    """
+    result = np.array(values, dtype=np.float64)
+    result[np.abs(result) >= sentinel * (1 - relativeTolerance)] = np.nan
+    return result
+
+def SignedLog10(values, zeroValue:float=np.nan) -> np.ndarray:
+    """
+    Logarithm that keeps the sign of negative values: log10(x) for x > 0 and -log10(-x) for x < 0.
+    This is the same convention as suplemenaryFunctions.Calculate_Log().
+
+    Args:
+        values (list | np.ndarray): values to convert.
+        zeroValue (float, optional): The result for the values which are exactly zero. Defaults to NaN.
+
+    Returns:
+        np.ndarray: the converted values
+    """
+    values = MaskOverflow(values)
+    result = np.full(values.shape, zeroValue, dtype=np.float64)
+    #NaN != 0 is True, so the masked values go through log10 and stay NaN
+    np.log10(np.abs(values), out=result, where=values != 0)
+    np.negative(result, out=result, where=values < 0)
+    return result
+
+def ScaleUnits(values, toPrefix:str='m', fromPrefix:str='', factor:float=None) -> np.ndarray:
+    """
+    Changes the unit prefix of the values, e.g. A -> mA with toPrefix='m'.
+
+    Args:
+        values (list | np.ndarray): values to scale.
+        toPrefix (str, optional): SI prefix of the result: 'p','n','u','m','','k','M','G'. Defaults to 'm'.
+        fromPrefix (str, optional): SI prefix of the input values. Defaults to '' (base unit).
+        factor (float, optional): If it is given, the values are multiplied by this factor and the prefixes are ignored. Defaults to None.
+
+    Returns:
+        np.ndarray: the scaled values
+    """
+    if(factor is None):
+        if(toPrefix not in SI_PREFIXES or fromPrefix not in SI_PREFIXES):
+            raise Exception(f'Unknown unit prefix. The valid prefixes are: {list(SI_PREFIXES.keys())}')
+        factor = SI_PREFIXES[fromPrefix] / SI_PREFIXES[toPrefix]
+    return MaskOverflow(values) * factor
+
+def CurrentDensity(currents, area_cm2:float) -> np.ndarray:
+    """
+    Current density J = I / A.
+
+    Args:
+        currents (list | np.ndarray): currents in A.
+        area_cm2 (float): The area of the device under test in cm2; must be more than 0.
+
+    Returns:
+        np.ndarray: current density in A/cm2
+    """
+    if(area_cm2 is None or area_cm2 <= 0):
+        raise Exception(f'The area must be more than 0. The current value is {area_cm2} and is not Valid.')
+    return MaskOverflow(currents) / area_cm2
+
+def Resistance(voltages, currents, zeroValue:float=np.nan) -> np.ndarray:
+    """
+    Resistance R = V / I for each point.
+
+    Args:
+        voltages (list | np.ndarray): voltages in V.
+        currents (list | np.ndarray): currents in A.
+        zeroValue (float, optional): The result for the points where the current is zero. Defaults to NaN.
+
+    Returns:
+        np.ndarray: resistance in Ohm
+    """
+    return _SafeDivide(MaskOverflow(voltages), MaskOverflow(currents), zeroValue)
+
+def Conductance(voltages, currents, zeroValue:float=np.nan) -> np.ndarray:
+    """
+    Conductance G = I / V for each point.
+
+    Args:
+        voltages (list | np.ndarray): voltages in V.
+        currents (list | np.ndarray): currents in A.
+        zeroValue (float, optional): The result for the points where the voltage is zero. Defaults to NaN.
+
+    Returns:
+        np.ndarray: conductance in S
+    """
+    return _SafeDivide(MaskOverflow(currents), MaskOverflow(voltages), zeroValue)
+
+def Power(voltages, currents) -> np.ndarray:
+    """
+    Power P = V * I for each point.
+
+    Args:
+        voltages (list | np.ndarray): voltages in V.
+        currents (list | np.ndarray): currents in A.
+
+    Returns:
+        np.ndarray: power in W
+    """
+    return MaskOverflow(voltages) * MaskOverflow(currents)
+
+def DerivedQuantities(sourceValues, readings, sourceIsVoltage:bool=True, area_cm2:float=None) -> dict:
+    """
+    Calculates all the derived quantities of an I-V curve at once.
+
+    Args:
+        sourceValues (list | np.ndarray): the 'sourcevalues' column returned by ReturnBufferValues().
+        readings (list | np.ndarray): the 'readings' column returned by ReturnBufferValues().
+        sourceIsVoltage (bool, optional): True if the device sourced voltage and measured current, False for the opposite. Defaults to True.
+        area_cm2 (float, optional): If it is given, the current density and its logarithm are added as well. Defaults to None.
+
+    Returns:
+        dict: each key is a column name and each value a NumPy array with the same length as the input
+    """
+    if(sourceIsVoltage):
+        voltages, currents = sourceValues, readings
+    else:
+        voltages, currents = readings, sourceValues
+    result = {'resistance':Resistance(voltages, currents),
+              'conductance':Conductance(voltages, currents),
+              'power':Power(voltages, currents),
+              'readings_log':SignedLog10(readings),
+              'sourcevalues_log':SignedLog10(sourceValues)}
+    if(area_cm2 is not None):
+        result['jvalues'] = CurrentDensity(currents, area_cm2)
+        result['jvalues_log'] = SignedLog10(result['jvalues'])
+    return result
+
+def RefinementLevels(levels, readings, tolerance:float=0.02, logScale:bool=False, minStep:float=None,
+                     logThreshold:float=None, noiseFloor=0.0) -> np.ndarray:
+    """
+    Finds where a sweep is too coarse: returns the midpoints of the intervals between neighbouring levels in which
+    the reading changes by more than tolerance times the span of all the readings (a large |dI/dV| * step).
+    Flat parts of the curve get no new points, and neither do the intervals in which the reading changes by less
+    than noiseFloor (on a flat, noisy part the noise alone would exceed the tolerance after every split).
+
+    Args:
+        levels (list | np.ndarray): the source levels measured so far (any order).
+        readings (list | np.ndarray): the readings at these levels.
+        tolerance (float, optional): The largest allowed change between two neighbouring points, as a fraction of the span of the readings. Defaults to 0.02.
+        logScale (bool, optional): Compares arcsinh(reading / logThreshold), for curves over many decades such as diodes. Defaults to False.
+        minStep (float, optional): Intervals narrower than this are not split again. None uses 1e-4 of the level span. Defaults to None.
+        logThreshold (float, optional): Below this |reading| the log scale turns linear, so it stays continuous through 0 (unlike SignedLog10(), which jumps there). None uses 1e-6 of the largest |reading|. Defaults to None.
+        noiseFloor (float | np.ndarray, optional): Changes of the reading up to this value (in the unit of the readings, also with logScale) are taken as noise and never refined. An array gives the noise of each reading (e.g. a fraction of its range); an interval uses the larger one of its two readings. Defaults to 0.
+
+    Returns:
+        np.ndarray: the new levels, sorted; empty when the tolerance is met everywhere
+    """
+    levels = np.asarray(levels, dtype=np.float64)
+    order = np.argsort(levels, kind='stable')
+    levels = levels[order]
+    values = MaskOverflow(readings)[order]
+    if(levels.size < 2 or np.all(np.isnan(values))):
+        return np.empty(0)
+    changes = np.abs(np.diff(values))
+    noiseFloor = np.broadcast_to(np.asarray(noiseFloor, dtype=np.float64), order.shape)[order]
+    noiseFloor = np.maximum(noiseFloor[:-1], noiseFloor[1:])
+    if(logScale):
+        if(logThreshold is None):
+            logThreshold = 1e-6 * np.nanmax(np.abs(values))
+        if(logThreshold <= 0):
+            return np.empty(0)
+        #log(2|x| / logThreshold) with the sign of x far from 0, linear near 0
+        values = np.arcsinh(values / logThreshold)
+    span = np.nanmax(values) - np.nanmin(values)
+    if(span == 0):
+        return np.empty(0)
+    if(minStep is None):
+        minStep = (levels[-1] - levels[0]) * 1e-4
+    steps = np.diff(levels)
+    with np.errstate(invalid='ignore'):
+        #Intervals next to an overflowed reading (NaN) are not refined
+        refine = (np.abs(np.diff(values)) > tolerance * span) & (changes > noiseFloor) & (steps > 2 * minStep)
+    return (levels[:-1][refine] + levels[1:][refine]) / 2
+
+def _SafeDivide(numerator:np.ndarray, denominator:np.ndarray, zeroValue:float) -> np.ndarray:
+    numerator, denominator = np.broadcast_arrays(numerator, denominator)
+    result = np.full(numerator.shape, zeroValue, dtype=np.float64)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    result[np.isnan(numerator) | np.isnan(denominator)] = np.nan
+    return result
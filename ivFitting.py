@@ -0,0 +1,230 @@
+"""
+Batched fitting of I-V curves: linear (resistance), Shockley diode with series resistance and power law.
+
+All the fits take many curves at once as 2-D arrays (curves x points) and fit them together with NumPy: the
+linear models by one batched least-squares solve, the diode model by a batched Levenberg-Marquardt iteration
+that starts from a linearized guess and only iterates the curves that did not converge yet. There is no loop
+over the curves in Python, so a large lot of curves is fitted much faster than by a loop of
+scipy.optimize.curve_fit, and the linear fits are cheaper still.
+Curves with fewer points are padded with NaN (see StackCurves()); NaN and the overflow value are ignored.
+
+Every fit returns a dict of 1-D arrays (one value per curve): the parameters, their standard errors
+('<name>_err', from the covariance of the least-squares solution), 'rss' and 'points'. pandas.DataFrame(fit)
+gives a table with one row per curve.
+
+Sample:
+    voltages, currents = StackCurves([KDM.ReturnBufferValues('defbuffer1') for ...])
+    diode = FitDiode(voltages, currents, temperature=300)
+    print(diode['ideality'], diode['ideality_err'])
+"""
+
+import numpy as np
+from ivAnalysis import MaskOverflow
+
+BOLTZMANN_CONSTANT:float = 1.380649e-23
+ELEMENTARY_CHARGE:float = 1.602176634e-19
+
+
+def ThermalVoltage(temperature:float=300) -> float:
+    """
+    kT/q in V at the given temperature in K.
+    """
+    return BOLTZMANN_CONSTANT * temperature / ELEMENTARY_CHARGE
+
+def StackCurves(results, xColumn:str='sourcevalues', yColumn:str='readings'):
+    """
+    Stacks the columns of several results of ReturnBufferValues() (MeasurementResult, dict or DataFrame) into two
+    2-D arrays (curves x points). Shorter curves are padded with NaN.
+
+    Returns:
+        tuple: (x, y) as float64 arrays
+    """
+    xs = [MaskOverflow(np.asarray(result[xColumn], dtype=np.float64)) for result in results]
+    ys = [MaskOverflow(np.asarray(result[yColumn], dtype=np.float64)) for result in results]
+    length = max((values.size for values in xs), default=0)
+    x = np.full((len(xs), length), np.nan)
+    y = np.full((len(ys), length), np.nan)
+    for index, (xValues, yValues) in enumerate(zip(xs, ys)):
+        if(xValues.size != yValues.size):
+            raise Exception(f'The curve {index} has {xValues.size} values of <{xColumn}> but {yValues.size} values of <{yColumn}>.')
+        x[index, :xValues.size] = xValues
+        y[index, :yValues.size] = yValues
+    return x, y
+
+def FitLinear(voltages, currents) -> dict:
+    """
+    Fits I = V / R + I_offset to each curve.
+
+    Args:
+        voltages (np.ndarray): curves x points (or one curve as a 1-D array).
+        currents (np.ndarray): the same shape as voltages.
+
+    Returns:
+        dict: 'resistance', 'conductance', 'offset' (A), their '_err', 'r_squared', 'rss', 'points'
+    """
+    voltages, currents, valid = _AsBatch(voltages, currents)
+    basis = np.stack((voltages, np.ones_like(voltages)), axis=-1)
+    parameters, covariance, rss, points = _BatchLeastSquares(basis, currents, valid)
+    conductance, offset = parameters[:, 0], parameters[:, 1]
+    errors = np.sqrt(np.diagonal(covariance, axis1=1, axis2=2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        meanCurrent = np.nansum(np.where(valid, currents, 0), axis=1) / points
+        totalSquares = np.sum(np.where(valid, currents - meanCurrent[:, None], 0) ** 2, axis=1)
+        return {'resistance':1 / conductance, 'resistance_err':errors[:, 0] / conductance ** 2,
+                'conductance':conductance, 'conductance_err':errors[:, 0],
+                'offset':offset, 'offset_err':errors[:, 1],
+                'r_squared':1 - rss / totalSquares, 'rss':rss, 'points':points}
+
+def FitPowerLaw(voltages, currents) -> dict:
+    """
+    Fits I = a * V^b to each curve by a linear fit of log(I) over log(V) (points with V > 0 and I > 0 only),
+    e.g. for space-charge-limited currents (b = 2) or ohmic regions (b = 1).
+
+    Returns:
+        dict: 'prefactor' (a), 'exponent' (b), their '_err', 'rss' (in log space), 'points'
+    """
+    voltages, currents, valid = _AsBatch(voltages, currents)
+    valid &= (voltages > 0) & (currents > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logVoltages = np.where(valid, np.log(np.abs(voltages)), 0)
+        logCurrents = np.where(valid, np.log(np.abs(currents)), 0)
+    basis = np.stack((logVoltages, np.ones_like(logVoltages)), axis=-1)
+    parameters, covariance, rss, points = _BatchLeastSquares(basis, logCurrents, valid)
+    errors = np.sqrt(np.diagonal(covariance, axis1=1, axis2=2))
+    prefactor = np.exp(parameters[:, 1])
+    return {'prefactor':prefactor, 'prefactor_err':prefactor * errors[:, 1],
+            'exponent':parameters[:, 0], 'exponent_err':errors[:, 0],
+            'rss':rss, 'points':points}
+
+def FitDiode(voltages, currents, temperature:float=300, minCurrent:float=None,
+             maxIterations:int=100, tolerance:float=1e-10) -> dict:
+    """
+    Fits the Shockley diode equation with series resistance to the forward part (I > 0) of each curve:
+        I = I0 * (exp((V - I*Rs) / (n*Vt)) - 1)
+    which is solved for V, so the model is explicit and the residuals are voltages:
+        V = n*Vt*ln(I/I0 + 1) + I*Rs
+
+    Args:
+        voltages (np.ndarray): curves x points (or one curve as a 1-D array).
+        currents (np.ndarray): the same shape as voltages.
+        temperature (float, optional): Temperature of the device in K. Defaults to 300.
+        minCurrent (float, optional): Points with a smaller current (e.g. the noise floor of the range) are ignored. Defaults to None.
+        maxIterations (int, optional): Largest number of Levenberg-Marquardt iterations. Defaults to 100.
+        tolerance (float, optional): The iteration stops when the relative change of the residual sum of squares of every curve is smaller. Defaults to 1e-10.
+
+    Returns:
+        dict: 'saturation_current' (I0, A), 'ideality' (n), 'series_resistance' (Rs, Ohm), their '_err', 'rss' (V²), 'points', 'converged'
+    """
+    voltages, currents, valid = _AsBatch(voltages, currents)
+    valid &= currents > (0 if minCurrent is None else minCurrent)
+    thermalVoltage = ThermalVoltage(temperature)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logCurrents = np.where(valid, np.log(currents), 0)
+    currents = np.where(valid, currents, 0)
+    voltages = np.where(valid, voltages, 0)
+
+    #Initial guess: for I >> I0 the model is linear, V = n*Vt*ln(I) - n*Vt*ln(I0) + Rs*I
+    basis = np.stack((logCurrents, np.ones_like(logCurrents), currents), axis=-1)
+    guess, _, _, points = _BatchLeastSquares(basis, voltages, valid)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ideality = guess[:, 0] / thermalVoltage
+        logSaturation = -guess[:, 1] / guess[:, 0]
+    badGuess = ~np.isfinite(ideality) | (ideality <= 0) | ~np.isfinite(logSaturation)
+    ideality = np.where(badGuess, 1.5, ideality)
+    minimumLogCurrent = np.min(np.where(valid, logCurrents, np.inf), axis=1)
+    logSaturation = np.where(badGuess, np.where(np.isfinite(minimumLogCurrent), minimumLogCurrent, 0) - 5, logSaturation)
+    parameters = np.stack((logSaturation, ideality, np.maximum(guess[:, 2], 0)), axis=-1)
+
+    def Residuals(parameters, rows):
+        u = logCurrents[rows] - parameters[:, 0:1]
+        softplus = np.logaddexp(u, 0)
+        model = parameters[:, 1:2] * thermalVoltage * softplus + currents[rows] * parameters[:, 2:3]
+        return np.where(valid[rows], voltages[rows] - model, 0), u, softplus
+
+    def Jacobian(parameters, rows, u, softplus):
+        #Derivatives of the model with respect to (ln I0, n, Rs)
+        sigmoid = 0.5 * (1 + np.tanh(u / 2))
+        jacobian = np.empty(u.shape + (3,))
+        jacobian[..., 0] = -parameters[:, 1:2] * thermalVoltage * sigmoid
+        jacobian[..., 1] = thermalVoltage * softplus
+        jacobian[..., 2] = currents[rows]
+        jacobian[~valid[rows]] = 0
+        return jacobian
+
+    allRows = np.arange(parameters.shape[0])
+    residuals, u, softplus = Residuals(parameters, allRows)
+    rss = np.sum(residuals ** 2, axis=1)
+    damping = np.full(parameters.shape[0], 1e-3)
+    converged = np.zeros(parameters.shape[0], dtype=bool)
+    identity = np.eye(3)
+    #Only the curves that did not converge yet are iterated
+    rows = np.flatnonzero(points > 3)
+    for _ in range(maxIterations):
+        if(rows.size == 0):
+            break
+        jacobian = Jacobian(parameters[rows], rows, u[rows], softplus[rows])
+        jacobianT = jacobian.transpose(0, 2, 1)
+        normalMatrix = jacobianT @ jacobian
+        gradient = (jacobianT @ residuals[rows][..., None])[..., 0]
+        scaled = normalMatrix + damping[rows, None, None] * (normalMatrix * identity) + 1e-30 * identity
+        trial = parameters[rows] + np.linalg.solve(scaled, gradient[..., None])[..., 0]
+        trialResiduals, trialU, trialSoftplus = Residuals(trial, rows)
+        trialRss = np.sum(trialResiduals ** 2, axis=1)
+        better = trialRss < rss[rows]
+        relativeChange = np.abs(rss[rows] - trialRss) / np.maximum(rss[rows], 1e-300)
+        accepted = rows[better]
+        parameters[accepted] = trial[better]
+        residuals[accepted] = trialResiduals[better]
+        u[accepted] = trialU[better]
+        softplus[accepted] = trialSoftplus[better]
+        rss[accepted] = trialRss[better]
+        damping[rows] = np.where(better, damping[rows] / 3, damping[rows] * 3)
+        converged[rows] = (better & (relativeChange < tolerance)) | (~better & (damping[rows] > 1e10))
+        rows = rows[~converged[rows]]
+
+    jacobian = Jacobian(parameters, allRows, u, softplus)
+    covariance = _Covariance(jacobian.transpose(0, 2, 1) @ jacobian, rss, points)
+    errors = np.sqrt(np.diagonal(covariance, axis1=1, axis2=2))
+    saturationCurrent = np.exp(parameters[:, 0])
+    unusable = points <= 3
+    result = {'saturation_current':saturationCurrent, 'saturation_current_err':saturationCurrent * errors[:, 0],
+              'ideality':parameters[:, 1], 'ideality_err':errors[:, 1],
+              'series_resistance':parameters[:, 2], 'series_resistance_err':errors[:, 2],
+              'rss':rss, 'points':points, 'converged':converged & ~unusable}
+    for name in result:
+        if(name not in ('points', 'converged')):
+            result[name] = np.where(unusable, np.nan, result[name])
+    return result
+
+#----------------Private Functions---------------------------
+def _AsBatch(x, y):
+    x = MaskOverflow(x)
+    y = MaskOverflow(y)
+    if(x.shape != y.shape):
+        raise Exception(f'The voltages and the currents must have the same shape. The shapes are {x.shape} and {y.shape}.')
+    x = np.atleast_2d(x)
+    y = np.atleast_2d(y)
+    return x, y, np.isfinite(x) & np.isfinite(y)
+
+def _BatchLeastSquares(basis:np.ndarray, target:np.ndarray, valid:np.ndarray):
+    #Solves all the curves at once: basis is (curves x points x parameters), target (curves x points)
+    basis = np.where(valid[..., None], basis, 0)
+    target = np.where(valid, target, 0)
+    basisT = basis.transpose(0, 2, 1)
+    normalMatrix = basisT @ basis
+    inverse = np.linalg.pinv(normalMatrix)
+    parameters = (inverse @ (basisT @ target[..., None]))[..., 0]
+    residuals = np.where(valid, target - (basis @ parameters[..., None])[..., 0], 0)
+    rss = np.sum(residuals ** 2, axis=1)
+    points = np.count_nonzero(valid, axis=1)
+    covariance = _Covariance(normalMatrix, rss, points, inverse)
+    return parameters, covariance, rss, points
+
+def _Covariance(normalMatrix:np.ndarray, rss:np.ndarray, points:np.ndarray, inverse:np.ndarray=None) -> np.ndarray:
+    #cov = s² (JᵀJ)⁻¹ with s² = rss / (points - parameters); NaN without degrees of freedom
+    if(inverse is None):
+        inverse = np.linalg.pinv(normalMatrix)
+    degreesOfFreedom = points - normalMatrix.shape[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = np.where(degreesOfFreedom > 0, rss / degreesOfFreedom, np.nan)
+    return variance[:, None, None] * inverse
@@ -0,0 +1,138 @@
+"""
+Compact container for the columns read from a device buffer.
+
+ReturnBufferValues() used to return a dictionary of Python lists, which costs about 30 bytes per float and
+is usually converted back to a DataFrame right away. MeasurementResult keeps every numeric column as one
+float64 NumPy array (8 bytes per value), absolute time stamps as datetime64[ns] and every text column (units, sourceunits) as a categorical column:
+one small uint8 code per reading plus the list of the distinct texts.
+
+It still behaves like the old dictionary (result['readings'], result.update({...}), 'readings' in result,
+for name in result), so the existing scripts keep working.
+"""
+
+from collections.abc import MutableMapping
+import numpy as np
+
+
+class MeasurementResult(MutableMapping):
+    __slots__ = ('_columns', '_categories', 'metadata')
+
+    def __init__(self, columns:dict=None, metadata:dict=None):
+        """
+        Args:
+            columns (dict, optional): column name -> values (list or NumPy array). Text columns become categorical. Defaults to None.
+            metadata (dict, optional): Information about the run, e.g. the buffer name, the device address or the configuration. Defaults to None.
+        """
+        self._columns = {}
+        self._categories = {}
+        self.metadata = dict(metadata) if metadata is not None else {}
+        if(columns is not None):
+            for name, values in columns.items():
+                self[name] = values
+
+    #----------------Mapping Interface---------------------------
+    def __getitem__(self, name:str) -> np.ndarray:
+        """
+        Returns the column as a NumPy array. Numeric columns are returned without a copy; categorical columns
+        are expanded into an array of texts (use Codes() and Categories() to avoid this).
+        """
+        values = self._columns[name]
+        if(name in self._categories):
+            return self._categories[name][values]
+        return values
+
+    def __setitem__(self, name:str, values):
+        values = np.asarray(values)
+        if(values.ndim != 1):
+            raise Exception(f'The column <{name}> must be 1-dimensional. The current shape is {values.shape}.')
+        #Also a replaced column must keep the length of the other columns
+        others = [column for column in self._columns if column != name]
+        if(len(others) > 0 and values.size != self._columns[others[0]].size):
+            raise Exception(f'The column <{name}> has {values.size} values, but the result has {self._columns[others[0]].size} readings.')
+        self._categories.pop(name, None)
+        if(values.dtype.kind in 'OUS'):
+            categories, codes = np.unique(np.char.strip(values.astype(str)), return_inverse=True)
+            self._categories[name] = categories
+            self._columns[name] = codes.astype(np.uint8 if categories.size <= 256 else np.uint32)
+        elif(values.dtype == np.float64):
+            self._columns[name] = values
+        elif(values.dtype.kind == 'M'):
+            #Absolute time stamps are kept as they are
+            self._columns[name] = values.astype('datetime64[ns]', copy=False)
+        else:
+            self._columns[name] = values.astype(np.float64)
+
+    def __delitem__(self, name:str):
+        del self._columns[name]
+        self._categories.pop(name, None)
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    @property
+    def NumberOfReadings(self) -> int:
+        for values in self._columns.values():
+            return values.size
+        return 0
+
+    def __repr__(self) -> str:
+        columns = ', '.join(f'{name}{"(categorical)" if name in self._categories else ""}' for name in self._columns)
+        return f'MeasurementResult({self.NumberOfReadings} readings: {columns}; metadata={self.metadata})'
+
+    #----------------Conversions---------------------------------
+    def Codes(self, name:str) -> np.ndarray:
+        """
+        Returns the integer codes of a categorical column (see Categories()).
+        """
+        return self._columns[name]
+
+    def Categories(self, name:str) -> np.ndarray:
+        """
+        Returns the distinct texts of a categorical column; Categories(name)[Codes(name)] gives the column.
+        """
+        return self._categories[name]
+
+    def IsCategorical(self, name:str) -> bool:
+        return name in self._categories
+
+    def to_numpy(self, name:str=None) -> np.ndarray:
+        """
+        Returns a numeric column without a copy. Without a name, all the float columns are stacked into a
+        2-D array (readings x columns); that needs a copy.
+        """
+        if(name is not None):
+            return self[name]
+        numeric = [values for key, values in self._columns.items() if key not in self._categories and values.dtype == np.float64]
+        return np.column_stack(numeric) if numeric else np.empty((0, 0))
+
+    def to_pandas(self):
+        """
+        Returns a DataFrame that uses the arrays of this object without copying them. Categorical columns
+        become pandas.Categorical columns built from the same codes.
+        """
+        import pandas as pd
+
+        data = {}
+        for name, values in self._columns.items():
+            if(name in self._categories):
+                data[name] = pd.Categorical.from_codes(values, categories=self._categories[name])
+            else:
+                data[name] = values
+        dataFrame = pd.DataFrame(data, copy=False)
+        dataFrame.attrs.update(self.metadata)
+        return dataFrame
+
+    def to_dict(self) -> dict:
+        """
+        Returns the old format of ReturnBufferValues(): a dictionary of Python lists.
+        """
+        return {name:self[name].tolist() for name in self._columns}
+
+    def nbytes(self) -> int:
+        """
+        Memory used by the columns in bytes.
+        """
+        return sum(values.nbytes for values in self._columns.values()) + sum(categories.nbytes for categories in self._categories.values())
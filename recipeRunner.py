@@ -0,0 +1,270 @@
+"""
+Runs a recipe: a JSON or YAML file with a sequence of measurements, sweeps and saves, without any prompt.
+
+The whole recipe is validated before the device is touched: every step must call a public function of
+KeithleyDeviceManager, every parameter must exist and have the type of its annotation (numbers stay numbers, no
+strings from input()), and the required parameters must be given. Then the device is connected and initialized once,
+the routines the steps need are uploaded, and the steps run back to back. Results are saved by a background thread
+while the next step measures.
+
+Recipe (JSON; the same keys in YAML):
+    {
+        "address": "USB0::0x05E6::0x2450::04586850::INSTR",
+        "initialize": {"Source_VoltageRange": 20, "Source_CurrentRange": 0.95, "Measure_VoltageRange": 10,
+                       "Measure_CurrentRange": 0.95, "Current_Limit": 0.95, "Voltage_limit": 10},
+        "output": {"directory": "D:\\\\HiWi\\\\run1", "fileType": "csv", "author": "Alireza yahyazadeh", "logFile": false},
+        "steps": [
+            {"name": "iv", "call": "Sweep_LinearcaseByPoints_Voltage",
+             "parameters": {"ArbitraryConfigurationName": "Sweep1", "startValue": -1, "stopValue": 1, "pointsToMeasure": 101}},
+            {"name": "spot", "call": "SendVoltage_MeasureCurrent", "parameters": {"VoltageLevel": 0.5, "repeatCount": 200}},
+            {"name": "list", "call": "SendVoltageList_MeasureCurrents",
+             "parameters": {"VoltageLevelList": {"linspace": [0, 1, 11]}}, "save": false}
+        ]
+    }
+
+Step keys: call (required), parameters, name (key of the result; defaults to step<index>), save (true, false or a
+file name; defaults to true). A list parameter can also be {"linspace": [start, stop, points]} or
+{"logspace": [startExponent, stopExponent, points]}. The result of a step is the return value of the function, or
+the active buffer if the function returns nothing.
+
+Sample:
+    results = RunRecipe('D:\\HiWi\\recipes\\iv.json')
+    python recipeRunner.py D:\\HiWi\\recipes\\iv.json
+"""
+
+import concurrent.futures
+import inspect
+import json
+import os
+import sys
+import typing
+import numpy as np
+
+STEP_KEYS = ('call', 'parameters', 'name', 'save')
+RECIPE_KEYS = ('address', 'initialize', 'output', 'steps')
+OUTPUT_KEYS = ('directory', 'fileType', 'author', 'logFile')
+#Functions a step cannot call: the runner connects and initializes by itself
+EXCLUDED_FUNCTIONS = ('Initialize', 'TestDeviceConnection', 'PrintAllResources', 'Atomic', 'Poll')
+
+
+def LoadRecipe(recipePath:str) -> dict:
+    """
+    Reads a recipe from a .json, .yaml or .yml file.
+    """
+    with open(recipePath, 'r') as f:
+        text = f.read()
+    if(recipePath.lower().endswith(('.yaml', '.yml'))):
+        try:
+            import yaml
+        except ImportError:
+            raise Exception('YAML recipes need the PyYAML package (pip install pyyaml); JSON recipes work without it.')
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+def ValidateRecipe(recipe:dict) -> list:
+    """
+    Checks the whole recipe without a device and returns the list of errors (empty if the recipe is valid).
+    The list parameters of the steps ({"linspace": ...}) are expanded in place.
+    """
+    from Model2450 import KeithleyDeviceManager
+
+    errors = []
+    if(not isinstance(recipe, dict)):
+        return ['The recipe must be a mapping with the keys ' + ', '.join(RECIPE_KEYS) + '.']
+    errors += [f'Unknown recipe key <{key}>.' for key in recipe if key not in RECIPE_KEYS]
+    if(not isinstance(recipe.get('address'), str)):
+        errors.append('The recipe needs the address of the device (a string).')
+    errors += _ValidateCall('initialize', KeithleyDeviceManager.Initialize, recipe.get('initialize', {}))
+    output = recipe.get('output', {})
+    if(not isinstance(output, dict)):
+        errors.append('output must be a mapping.')
+    else:
+        errors += [f'Unknown output key <{key}>.' for key in output if key not in OUTPUT_KEYS]
+        if(output.get('fileType', 'csv') not in ('csv', 'xlsx')):
+            errors.append(f'output.fileType can be csv or xlsx. The current value is {output["fileType"]}.')
+    steps = recipe.get('steps')
+    if(not isinstance(steps, list) or len(steps) == 0):
+        errors.append('The recipe needs a non-empty list of steps.')
+        return errors
+    names = set()
+    for index, step in enumerate(steps, start=1):
+        where = f'step {index}'
+        if(not isinstance(step, dict)):
+            errors.append(f'{where} must be a mapping.')
+            continue
+        errors += [f'{where}: unknown key <{key}>.' for key in step if key not in STEP_KEYS]
+        name = step.setdefault('name', f'step{index}')
+        if(name in names):
+            errors.append(f'{where}: the name <{name}> is already used by another step.')
+        names.add(name)
+        if(not isinstance(step.get('save', True), (bool, str))):
+            errors.append(f'{where}: save must be true, false or a file name.')
+        functionName = step.get('call')
+        function = getattr(KeithleyDeviceManager, functionName, None) if isinstance(functionName, str) else None
+        if(function is None or not callable(function) or functionName.startswith('_') or functionName in EXCLUDED_FUNCTIONS):
+            errors.append(f'{where}: <{functionName}> is not a measurement function of KeithleyDeviceManager.')
+            continue
+        errors += _ValidateCall(f'{where} ({functionName})', function, step.setdefault('parameters', {}))
+    return errors
+
+def RunRecipe(recipe, deviceManager=None, cancellationToken=None, stopOnError:bool=True) -> dict:
+    """
+    Validates and runs a recipe (a dict or the path of a recipe file) end to end.
+
+    Args:
+        recipe (dict | str): The recipe or the path of a .json/.yaml file.
+        deviceManager (KeithleyDeviceManager, optional): An already connected device; it is still initialized with the recipe. Defaults to None.
+        cancellationToken (CancellationToken, optional): Checked between the steps and passed to the sweeps. Defaults to None.
+        stopOnError (bool, optional): Stops at the first failing step; otherwise the error is stored as the result of the step. Defaults to True.
+
+    Returns:
+        dict: {step name: result}
+    """
+    from Model2450 import KeithleyDeviceManager
+    from suplemenaryFunctions import fileManagement
+
+    if(isinstance(recipe, str)):
+        recipe = LoadRecipe(recipe)
+    errors = ValidateRecipe(recipe)
+    if(len(errors) > 0):
+        raise Exception('The recipe is not valid:\n' + '\n'.join(errors))
+    output = recipe.get('output', {})
+    directory = output.get('directory', os.getcwd())
+    if(any(step.get('save', True) for step in recipe['steps'])):
+        os.makedirs(directory, exist_ok=True)
+
+    #Connect and initialize once, then upload what the steps need
+    if(deviceManager is None):
+        deviceManager = KeithleyDeviceManager(GPI_or_USB_Address=recipe['address'])
+    deviceManager.Initialize(**recipe.get('initialize', {}))
+    if(any(step['parameters'].get('repeatCount') is not None for step in recipe['steps'])):
+        deviceManager.UploadStatisticsRoutine()
+
+    results = {}
+    fileManager = fileManagement()
+    saves = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as saver:
+        for step in recipe['steps']:
+            if(cancellationToken is not None and cancellationToken.isCancelled):
+                break
+            function = getattr(deviceManager, step['call'])
+            parameters = dict(step['parameters'])
+            if(cancellationToken is not None and 'cancellationToken' in inspect.signature(function).parameters):
+                parameters['cancellationToken'] = cancellationToken
+            try:
+                result = function(**parameters)
+                if(not _IsTable(result)):
+                    result = deviceManager.ReturnBufferValues(bufferName=deviceManager.ActiveBuffer_Name)
+            except Exception as ex:
+                if(stopOnError):
+                    raise Exception(f'The step <{step["name"]}> ({step["call"]}) failed: {ex}')
+                results[step['name']] = ex
+                continue
+            results[step['name']] = result
+            save = step.get('save', True)
+            if(save):
+                fileName = save if isinstance(save, str) else step['name']
+                #The file is written while the next step measures
+                for suffix, table in _Tables(result):
+                    saves.append(saver.submit(fileManager.SaveToDrive, directoryPath=directory, filename=fileName + suffix,
+                                              fileType=output.get('fileType', 'csv'), inputList=table,
+                                              WantAlsoALogFile=output.get('logFile', False), authorName=output.get('author', ''),
+                                              extraDescription=f'{step["call"]} {json.dumps(step["parameters"], default=repr)}'))
+        for future in saves:
+            future.result()
+    return results
+
+def Main(arguments:list=None):
+    """
+    The command line entry point (used by main.py and by running this file): runs the recipe given as the only
+    argument and prints a short line per step.
+
+    Args:
+        arguments (list, optional): The command line arguments without the program name. Defaults to None (sys.argv[1:]).
+    """
+    if(arguments is None):
+        arguments = sys.argv[1:]
+    if(len(arguments) != 1):
+        print(f'Usage: python {os.path.basename(sys.argv[0])} <recipe.json | recipe.yaml>')
+        sys.exit(2)
+    for stepName, stepResult in RunRecipe(arguments[0]).items():
+        print(f'{stepName}: {stepResult!r}'[:200])
+
+
+#----------------Private Functions---------------------------
+def _ValidateCall(where:str, function, parameters) -> list:
+    if(not isinstance(parameters, dict)):
+        return [f'{where}: the parameters must be a mapping.']
+    errors = []
+    signature = inspect.signature(function)
+    try:
+        hints = typing.get_type_hints(function)
+    except Exception:
+        hints = getattr(function, '__annotations__', {})
+    for name, value in list(parameters.items()):
+        if(name not in signature.parameters or name == 'self'):
+            errors.append(f'{where}: unknown parameter <{name}>.')
+            continue
+        if(name == 'cancellationToken'):
+            errors.append(f'{where}: the cancellationToken is passed to RunRecipe(), not in the recipe.')
+            continue
+        value = parameters[name] = _ExpandRange(value)
+        message = _CheckType(value, hints.get(name), signature.parameters[name].default)
+        if(message is not None):
+            errors.append(f'{where}: parameter <{name}> {message}')
+    for name, parameter in signature.parameters.items():
+        if(name != 'self' and parameter.default is inspect.Parameter.empty
+           and parameter.kind not in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD) and name not in parameters):
+            errors.append(f'{where}: the required parameter <{name}> is missing.')
+    return errors
+
+def _ExpandRange(value):
+    if(isinstance(value, dict) and len(value) == 1):
+        (kind, arguments), = value.items()
+        if(kind in ('linspace', 'logspace') and isinstance(arguments, list) and len(arguments) == 3):
+            return getattr(np, kind)(float(arguments[0]), float(arguments[1]), int(arguments[2])).tolist()
+    return value
+
+def _CheckType(value, annotation, default) -> str:
+    #Returns the error message or None
+    if(value is None):
+        return None if default is None else 'cannot be null.'
+    if(annotation is None or annotation is inspect.Parameter.empty):
+        return None
+    isNumber = isinstance(value, (int, float)) and not isinstance(value, bool)
+    if(annotation is float):
+        return None if isNumber else f'must be a number, not {value!r}.'
+    if(annotation is int):
+        return None if isinstance(value, int) and not isinstance(value, bool) else f'must be an integer, not {value!r}.'
+    if(annotation is bool):
+        return None if isinstance(value, bool) else f'must be true or false, not {value!r}.'
+    if(annotation is str):
+        return None if isinstance(value, str) else f'must be a string, not {value!r}.'
+    if(typing.get_origin(annotation) is list):
+        if(not isinstance(value, list)):
+            return f'must be a list, not {value!r}.'
+        itemType = (typing.get_args(annotation) or (None,))[0]
+        for item in value:
+            message = _CheckType(item, itemType, None)
+            if(message is not None):
+                return 'items ' + message
+    return None
+
+def _IsTable(result) -> bool:
+    #A result worth keeping as it is; None, True/False and the segment lists are replaced by the buffer
+    return hasattr(result, 'to_pandas') or isinstance(result, (dict, np.ndarray))
+
+def _Tables(result):
+    #(file name suffix, table for fileManagement.SaveToDrive) pairs
+    if(isinstance(result, np.ndarray)):
+        result = np.atleast_2d(result)
+        return [('', {f'reading{column + 1}':result[:, column] for column in range(result.shape[1])})]
+    if(isinstance(result, dict) and len(result) > 0 and all(hasattr(value, 'to_pandas') for value in result.values())):
+        return [(f'_{tag}', table) for tag, table in result.items()]
+    if(isinstance(result, dict)):
+        return [('', {key:[value] for key, value in result.items()})]
+    return [('', result)]
+
+
+if __name__ == '__main__':
+    Main()
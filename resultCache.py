@@ -0,0 +1,162 @@
+"""
+Content-addressed cache on disk for the results read from the device and for the analysis made on them.
+
+Every entry is stored in its own file, named after the SHA-256 hash of its key. Reading an entry marks it as
+recently used; when the total size of the cache is above maxSizeBytes, the least recently used entries are
+deleted. Re-analysing a run that did not change therefore costs one file read instead of a new readout and
+a new parse.
+
+Sample:
+    cache = ResultCache('D:\\HiWi\\cache', maxSizeBytes=2 * 1024**3)
+    result = KDM.ReturnBufferValues(bufferName='defbuffer1', cache=cache)      #read from the device only once
+    derived = cache.Memoize(ivAnalysis.DerivedQuantities, result['sourcevalues'], result['readings'], area_cm2=0.1)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+
+
+class ResultCache(object):
+
+    def __init__(self, cacheDirectory:str, maxSizeBytes:int=1024**3):
+        """
+        Args:
+            cacheDirectory (str): Directory of the cache files. It is created if it does not exist.
+            maxSizeBytes (int, optional): The cache is kept below this size by deleting the least recently used entries. Defaults to 1 GiB.
+        """
+        self.cacheDirectory = cacheDirectory
+        self.maxSizeBytes = maxSizeBytes
+        os.makedirs(self.cacheDirectory, exist_ok=True)
+
+    @staticmethod
+    def MakeKey(*parts) -> str:
+        """
+        Builds a key out of any number of parts. NumPy arrays and MeasurementResults are hashed by their
+        content; other values by their JSON text (or repr() if they are not JSON-serializable).
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(_Fingerprint(part).encode())
+            digest.update(b'|')
+        return digest.hexdigest()
+
+    def Get(self, key:str, default=None):
+        """
+        Returns the cached value or default if the key is not in the cache.
+        """
+        path = self.__Path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return default
+        except (OSError, pickle.UnpicklingError, EOFError):
+            #A broken entry is dropped and computed again
+            self.__Remove(path)
+            return default
+        #The modification time is used as the last-use time, access times are often disabled
+        os.utime(path)
+        return value
+
+    def Put(self, key:str, value):
+        """
+        Stores a value. Any picklable value can be stored.
+        """
+        path = self.__Path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporaryPath = path + '.tmp'
+        with open(temporaryPath, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaryPath, path)
+        self.__Evict()
+
+    def Contains(self, key:str) -> bool:
+        return os.path.exists(self.__Path(key))
+
+    def GetOrCompute(self, key:str, function, *args, **kwargs):
+        """
+        Returns the cached value of the key; if it is missing, calls function(*args, **kwargs) and caches the result.
+        """
+        missing = object()
+        value = self.Get(key, default=missing)
+        if(value is missing):
+            value = function(*args, **kwargs)
+            self.Put(key, value)
+        return value
+
+    def Memoize(self, function, *args, **kwargs):
+        """
+        Calls function(*args, **kwargs) only if it was not already called with the same function and the same
+        arguments (compared by content). Use it for the analysis of the readouts, e.g.:
+            cache.Memoize(ivAnalysis.DerivedQuantities, result['sourcevalues'], result['readings'], area_cm2=0.1)
+        """
+        key = self.MakeKey('memoize', f'{function.__module__}.{function.__qualname__}', *args, *sorted(kwargs.items()))
+        return self.GetOrCompute(key, function, *args, **kwargs)
+
+    def SizeInBytes(self) -> int:
+        return sum(size for _, size, _ in self.__Entries())
+
+    def Clear(self):
+        """
+        Deletes all the entries.
+        """
+        for path, _, _ in self.__Entries():
+            self.__Remove(path)
+
+    #----------------Private Functions---------------------------
+    def __Path(self, key:str) -> str:
+        #Two levels, so a big cache does not put all its files in one directory
+        return os.path.join(self.cacheDirectory, key[:2], key + '.pkl')
+
+    def __Entries(self):
+        entries = []
+        if(not os.path.isdir(self.cacheDirectory)):
+            return entries
+        for subdirectory in os.scandir(self.cacheDirectory):
+            if(not subdirectory.is_dir()):
+                continue
+            for entry in os.scandir(subdirectory.path):
+                if(entry.name.endswith('.pkl')):
+                    status = entry.stat()
+                    entries.append((entry.path, status.st_size, status.st_mtime_ns))
+        return entries
+
+    def __Evict(self):
+        entries = self.__Entries()
+        totalSize = sum(size for _, size, _ in entries)
+        if(totalSize <= self.maxSizeBytes):
+            return
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            self.__Remove(path)
+            totalSize -= size
+            if(totalSize <= self.maxSizeBytes):
+                break
+
+    @staticmethod
+    def __Remove(path:str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _Fingerprint(value) -> str:
+    if(isinstance(value, np.ndarray)):
+        return f'ndarray:{value.dtype.str}:{value.shape}:' + hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+    if(hasattr(value, 'Codes') and hasattr(value, 'to_pandas')):
+        #MeasurementResult: the columns are hashed in their stored (compact) form
+        parts = []
+        for name in value:
+            stored = value.Codes(name)
+            parts.append(name + '=' + _Fingerprint(stored))
+            if(value.IsCategorical(name)):
+                parts.append(name + ':categories=' + _Fingerprint(value.Categories(name)))
+        return 'MeasurementResult:' + ','.join(parts)
+    if(isinstance(value, (list, tuple))):
+        return type(value).__name__ + '[' + ','.join(_Fingerprint(item) for item in value) + ']'
+    if(isinstance(value, dict)):
+        return 'dict{' + ','.join(f'{_Fingerprint(key)}:{_Fingerprint(item)}' for key, item in sorted(value.items(), key=lambda item: repr(item[0]))) + '}'
+    return json.dumps(value, sort_keys=True, default=repr)
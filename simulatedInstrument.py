@@ -0,0 +1,431 @@
+"""
+A simulated Model 2450 for runs without an instrument: SimulatedDevice takes the place of the VISA session and
+answers the TSP commands of KeithleyDeviceManager with the readings of a DUT model (see dutModels.py).
+
+The simulation keeps the settings, the reading buffers and a clock of the device. Each smu.measure.read(), chunk of
+levels (for ... ipairs) or sweep is computed in one vectorized call of the DUT model, with the source limit
+(compliance), fixed measure ranges (9.91e37 overflow), smu.measure.count, the repeat-average filter and the time of
+each reading (throughputPlanner.EstimateSecondsPerReading()). So readout, parsing, fitting and plotting can be
+benchmarked with realistic data at production volume.
+
+Sample:
+    dut = NoisyModel(DiodeModel(saturationCurrent=1e-12, idealityFactor=1.8, seriesResistance=2.0), noise=1e-9, relativeNoise=1e-4, seed=1)
+    KDM = KeithleyDeviceManager(device=SimulatedDevice(dut))
+    KDM.Initialize(Source_VoltageRange=2, Source_CurrentRange=0.1, Measure_VoltageRange=2, Measure_CurrentRange=0.1,
+                   Current_Limit=0.1, Voltage_limit=2)
+    KDM.Sweep_LinearcaseByPoints_Voltage(ArbitraryConfigurationName='iv', startValue=0, stopValue=1, pointsToMeasure=100000)
+    result = KDM.ReturnBufferValues(bufferName='defbuffer1')
+
+    #With the timing of the device (the simulated time of each command is waited)
+    KDM = KeithleyDeviceManager(device=SimulatedDevice(dut, timing='simulated'))
+
+Not simulated: the blocks of custom trigger models (triggerModel.TriggerModel, the pulse trains) are accepted but
+take no readings, autoranging does not overflow, and the event log is always empty.
+"""
+
+import re
+import threading
+import time
+import numpy as np
+from dutModels import DutModel, ResistorModel
+from eventLog import DRAIN_COMMAND
+from throughputPlanner import EstimateSecondsPerReading, AUTODELAY_ESTIMATE
+
+OVERFLOW_VALUE = 9.91e37
+#A fixed range measures up to 105 % of its value
+RANGE_OVERLOAD = 1.05
+DEFAULT_BUFFER_CAPACITY = 100000
+
+#Settings that the device stores for each measure function or for each source function
+_MEASURE_SETTINGS = ('smu.measure.range', 'smu.measure.autorange', 'smu.measure.nplc', 'smu.measure.autozero.enable',
+                     'smu.measure.count', 'smu.measure.filter.enable', 'smu.measure.filter.count', 'smu.measure.unit')
+_SOURCE_SETTINGS = ('smu.source.range', 'smu.source.level', 'smu.source.delay', 'smu.source.autodelay', 'smu.source.readback')
+#Values after reset()
+_DEFAULTS = {'smu.measure.func':'smu.FUNC_DC_CURRENT', 'smu.source.func':'smu.FUNC_DC_VOLTAGE', 'smu.source.output':False,
+             'smu.source.ilimit.level':105e-6, 'smu.source.vlimit.level':21.0, 'smu.measure.autorange':True,
+             'smu.measure.nplc':1.0, 'smu.measure.autozero.enable':True, 'smu.measure.count':1,
+             'smu.measure.filter.enable':False, 'smu.measure.filter.count':10, 'smu.measure.unit':None,
+             'smu.source.level':0.0, 'smu.source.delay':0.0, 'smu.source.autodelay':True, 'smu.source.readback':True,
+             'format.asciiprecision':0}
+_UNITS = {'smu.FUNC_DC_CURRENT':'Amp DC', 'smu.FUNC_DC_VOLTAGE':'Volt DC', 'smu.FUNC_RESISTANCE':'Ohm'}
+
+#One statement: a call (with at most one level of nested parentheses) or an assignment
+_STATEMENT = re.compile(r'(?P<call>[A-Za-z_][\w.\[\]]*)\s*\((?P<arguments>(?:"[^"]*"|\([^()]*\)|[^()"])*)\)?'
+                        r'|(?P<name>[A-Za-z_][\w.\[\]]*)\s*=\s*(?P<value>[\w.]+\([^)]*\)|"[^"]*"|[^\s]+)')
+_LEVELS_LOOP = re.compile(r'for _, level in ipairs\(\{(?P<levels>[^}]*)\}\) do (?P<body>.*?) end')
+_COUNT_LOOP = re.compile(r'for i = 1, (?P<count>\d+) do (?P<body>.*?) end')
+_READ = re.compile(r'smu\.measure\.read\((?P<buffer>\w*)\)')
+_DELAY = re.compile(r'delay\((?P<seconds>[^)]*)\)')
+_FINGERPRINT = re.compile(r'^if (?P<buffer>\w+)\.n > 0 then')
+
+
+class _SimulatedBuffer(object):
+
+    def __init__(self, capacity:int):
+        self.capacity = capacity
+        self.Clear()
+
+    def Clear(self):
+        self.__chunks = []
+        self.__count = 0
+        self.__arrays = None
+
+    def Append(self, readings:np.ndarray, sourceValues:np.ndarray, times:np.ndarray, unit:str, sourceUnit:str):
+        self.__chunks.append((readings, sourceValues, times, unit, sourceUnit))
+        self.__count += len(readings)
+        self.__arrays = None
+
+    @property
+    def n(self) -> int:
+        return min(self.__count, self.capacity)
+
+    def Arrays(self) -> dict:
+        #The newest capacity readings (the buffer is a ring), concatenated once per change
+        if(self.__arrays is None):
+            lengths = [len(chunk[0]) for chunk in self.__chunks]
+            arrays = {key:np.concatenate([np.empty(0)] + [chunk[column] for chunk in self.__chunks])
+                      for column, key in enumerate(('readings', 'sourcevalues', 'times'))}
+            arrays['units'] = np.repeat(np.array([chunk[3] for chunk in self.__chunks], dtype=str), lengths)
+            arrays['sourceunits'] = np.repeat(np.array([chunk[4] for chunk in self.__chunks], dtype=str), lengths)
+            self.__arrays = {key:values[-self.capacity:] for key, values in arrays.items()}
+        return self.__arrays
+
+
+class SimulatedDevice(object):
+
+    def __init__(self, model:DutModel=None, lineFrequency:float=50, serialNumber:str='SIM0001', timing:str='fast',
+                 speed:float=1.0):
+        """
+        Args:
+            model (DutModel, optional): The device under test. Defaults to None (a 1 kOhm resistor).
+            lineFrequency (float, optional): Line frequency for the time of a reading (NPLC). Defaults to 50.
+            serialNumber (str, optional): Serial number in the *IDN? answer (the result cache uses it). Defaults to 'SIM0001'.
+            timing (str, optional): 'fast' answers at once; 'simulated' waits for the simulated time of each command (divided by speed). Defaults to 'fast'.
+            speed (float, optional): Only for 'simulated'; 2 runs twice as fast as the device. Defaults to 1.0.
+        """
+        if(timing not in ('fast', 'simulated')):
+            raise Exception(f'The timing can be fast or simulated. The current value is {timing} and is not Valid.')
+        self.model = model if model is not None else ResistorModel()
+        self.lineFrequency = lineFrequency
+        self.serialNumber = serialNumber
+        self.timing = timing
+        self.speed = speed
+        self.timeout = None
+        self.clock = 0.0 #Simulated seconds since the session was opened
+        self.startTime = time.time()
+        self.__lock = threading.RLock()
+        self.__Reset()
+
+    def write(self, command:str):
+        with self.__lock:
+            startClock = self.clock
+            self.__Execute(command.strip(), [])
+            self.__Wait(startClock)
+
+    def query(self, command:str) -> str:
+        with self.__lock:
+            startClock = self.clock
+            command = command.strip()
+            if(command == '*IDN?'):
+                output = [f'KEITHLEY INSTRUMENTS,MODEL 2450,{self.serialNumber},simulated']
+            elif(command == DRAIN_COMMAND):
+                output = ['events']
+            elif(_FINGERPRINT.match(command)):
+                output = [self.__Fingerprint(self.__Buffer(_FINGERPRINT.match(command).group('buffer')))]
+            else:
+                output = []
+                self.__Execute(command, output)
+            self.__Wait(startClock)
+            if(len(output) == 0):
+                raise Exception(f'VI_ERROR_TMO: the simulated device has no answer for {command!r}.')
+            return '\n'.join(output) + '\n'
+
+    def read(self) -> str:
+        raise Exception('VI_ERROR_TMO: the simulated device answers only query().')
+
+    def close(self):
+        pass
+
+    def Buffer(self, bufferName:str='defbuffer1') -> dict:
+        """
+        The simulated buffer as arrays (readings, sourcevalues, times, units, sourceunits), for checks without printbuffer().
+        """
+        with self.__lock:
+            return self.__Buffer(bufferName).Arrays()
+
+    #----------------Private Functions---------------------------
+    def __Reset(self):
+        self.settings = dict(_DEFAULTS)
+        self.buffers = {'defbuffer1':_SimulatedBuffer(DEFAULT_BUFFER_CAPACITY), 'defbuffer2':_SimulatedBuffer(DEFAULT_BUFFER_CAPACITY)}
+        self.configurationLists = {}
+        self.__pendingSweep = None
+        self.__appliedLevel = 0.0
+        self.__lastLevelChange = 0.0
+
+    def __Wait(self, startClock:float):
+        if(self.timing == 'simulated' and self.clock > startClock):
+            time.sleep((self.clock - startClock) / self.speed)
+
+    def __Execute(self, text:str, output:list):
+        if(text.startswith('function ')):
+            #TSP functions (the statistics routine) are run by name, see __Call()
+            return
+        match = _LEVELS_LOOP.search(text) or _COUNT_LOOP.search(text)
+        if(match is not None):
+            self.__Execute(text[:match.start()], output)
+            self.__RunLoop(match)
+            self.__Execute(text[match.end():], output)
+            return
+        for statement in _STATEMENT.finditer(text):
+            if(statement.group('call') is not None):
+                self.__Call(statement.group('call'), _Arguments(statement.group('arguments')), output)
+            else:
+                self.__Assign(statement.group('name'), statement.group('value'))
+
+    def __RunLoop(self, match):
+        read = _READ.search(match.group('body'))
+        if(read is None):
+            return
+        delay = _DELAY.search(match.group('body'))
+        extraDelay = float(delay.group('seconds')) if delay is not None else 0.0
+        if('levels' in match.groupdict()):
+            levels = np.array([float(level) for level in match.group('levels').split(',') if level.strip() != ''])
+            self.__Measure(levels, read.group('buffer'), self.__SourceDelay() + extraDelay)
+            if(len(levels) > 0):
+                self.settings[self.__Key('smu.source.level')] = levels[-1]
+        else:
+            count = int(match.group('count'))
+            self.__Measure(np.full(count, self.__Get('smu.source.level')), read.group('buffer'), self.__SourceDelay() + extraDelay)
+
+    def __Assign(self, name:str, value:str):
+        if(value.startswith('buffer.make(')):
+            self.buffers[name] = _SimulatedBuffer(int(float(_Arguments(value[len('buffer.make('):-1])[0])))
+            return
+        value = _Value(value)
+        if(name == 'smu.measure.range'):
+            self.settings[self.__Key('smu.measure.autorange')] = False
+        self.settings[self.__Key(name)] = value
+
+    def __Call(self, name:str, arguments:list, output:list):
+        if(name == 'reset'):
+            self.__Reset()
+        elif(name == 'smu.reset'):
+            buffers, lists = self.buffers, self.configurationLists
+            self.__Reset()
+            self.buffers, self.configurationLists = buffers, lists
+        elif(name == 'delay'):
+            self.clock += float(arguments[0]) if arguments else 0.0
+        elif(name == 'print'):
+            output.append('\t'.join(str(self.__Evaluate(argument)) for argument in arguments))
+        elif(name == 'printbuffer'):
+            output.append(self.__PrintBuffer(arguments))
+        elif(name == 'KdmStatistics'):
+            output.append(self.__Statistics(int(float(arguments[0])), arguments[1]))
+        elif(name == 'smu.measure.read'):
+            self.__Measure(np.array([self.__Get('smu.source.level')]), arguments[0] if arguments else '', self.__SourceDelay())
+        elif(name.endswith('.clear') and name[:-len('.clear')] in self.buffers):
+            self.buffers[name[:-len('.clear')]].Clear()
+        elif(name == 'smu.source.configlist.create'):
+            self.configurationLists[_Text(arguments[0])] = []
+        elif(name == 'smu.source.configlist.store'):
+            self.configurationLists.setdefault(_Text(arguments[0]), []).append(self.__Get('smu.source.level'))
+        elif(name in ('smu.source.sweeplinear', 'smu.source.sweeplinearstep', 'smu.source.sweeplog', 'smu.source.sweeplist')):
+            self.__pendingSweep = self.__Sweep(name.split('.')[-1], arguments)
+        elif(name == 'trigger.model.load'):
+            #A custom trigger model replaces the sweep; its blocks are not simulated
+            self.__pendingSweep = None
+        elif(name == 'trigger.model.initiate'):
+            if(self.__pendingSweep is not None):
+                levels, delay, bufferName = self.__pendingSweep
+                self.settings['smu.source.output'] = True
+                self.__Measure(levels, bufferName, delay)
+                self.settings['smu.source.output'] = False
+        #Display, beeper, limits, trigger blocks, waitcomplete() and the other calls change nothing that is simulated
+
+    def __Sweep(self, kind:str, arguments:list) -> tuple:
+        #(levels, delay per level, buffer name) of a sweep, run by trigger.model.initiate()
+        if(kind == 'sweeplist'):
+            levels = np.asarray(self.configurationLists.get(_Text(arguments[0]), []), dtype=float)
+            index = int(float(arguments[1])) if len(arguments) > 1 else 1
+            delay = float(arguments[2]) if len(arguments) > 2 else 0.0
+            count = int(float(arguments[3])) if len(arguments) > 3 else 1
+            bufferName = arguments[5] if len(arguments) > 5 else 'defbuffer1'
+            return np.tile(levels[index - 1:], count), delay, bufferName
+        start, stop, third = float(arguments[1]), float(arguments[2]), float(arguments[3])
+        delay = float(arguments[4]) if len(arguments) > 4 else 0.0
+        count = int(float(arguments[5])) if len(arguments) > 5 else 1
+        dual = _Value(arguments[8]) if len(arguments) > 8 else False
+        bufferName = arguments[9] if len(arguments) > 9 else 'defbuffer1'
+        if(kind == 'sweeplinear'):
+            levels = np.linspace(start, stop, int(third))
+        elif(kind == 'sweeplinearstep'):
+            levels = start + third * np.arange(int(np.floor((stop - start) / third + 1e-9)) + 1)
+        else:
+            levels = np.logspace(np.log10(start), np.log10(stop), int(third))
+        if(dual is True or dual == 1):
+            levels = np.concatenate([levels, levels[::-1]])
+        return np.tile(levels, count), delay, bufferName
+
+    def __Measure(self, levels:np.ndarray, bufferName:str, levelDelay:float) -> np.ndarray:
+        #All the readings of the levels, in one call of the DUT model
+        buffer = self.__Buffer(bufferName or 'defbuffer1')
+        if(len(levels) == 0):
+            return np.empty(0)
+        sourceFunction, measureFunction = self.settings['smu.source.func'], self.settings['smu.measure.func']
+        sourceIsVoltage = sourceFunction == 'smu.FUNC_DC_VOLTAGE'
+        count = int(self.__Get('smu.measure.count'))
+        filterCount = int(self.__Get('smu.measure.filter.count')) if self.__Get('smu.measure.filter.enable') else 1
+        isFixedRange = not self.__Get('smu.measure.autorange')
+        autoZero = 'on' if self.__Get('smu.measure.autozero.enable') else 'off'
+        readingSeconds = EstimateSecondsPerReading(float(self.__Get('smu.measure.nplc')), autoZero, bool(self.__Get('smu.source.readback')),
+                                                   sourceDelay=0.0, fixedRanges=isFixedRange, lineFrequency=self.lineFrequency)
+        #With the output off, the DUT sees 0 V (or 0 A)
+        appliedLevels = levels if self.settings['smu.source.output'] else np.zeros(len(levels))
+        samplesPerLevel = count * filterCount
+
+        #The source delay is waited only when the level changes; every sample then takes readingSeconds
+        previousLevels = np.concatenate([[self.__appliedLevel], appliedLevels[:-1]])
+        isChanged = appliedLevels != previousLevels
+        levelSeconds = isChanged * levelDelay + samplesPerLevel * readingSeconds
+        levelStarts = self.clock + np.concatenate([[0.0], np.cumsum(levelSeconds)[:-1]])
+        changeTimes = np.maximum.accumulate(np.where(isChanged, levelStarts, self.__lastLevelChange))
+        sampleOffsets = np.arange(1, samplesPerLevel + 1) * readingSeconds
+        times = (levelStarts + isChanged * levelDelay)[:, None] + sampleOffsets[None, :]
+        settleTimes = times - changeTimes[:, None]
+        sources = np.repeat(appliedLevels, samplesPerLevel)
+        responses = self.model.Respond(sources, sourceIsVoltage, times.ravel(), settleTimes.ravel())
+
+        #Compliance: the source limit clamps the response
+        limit = self.__Get('smu.source.ilimit.level' if sourceIsVoltage else 'smu.source.vlimit.level')
+        responses = np.clip(responses, -limit, limit)
+        voltages, currents = (sources, responses) if sourceIsVoltage else (responses, sources)
+        if(measureFunction == 'smu.FUNC_RESISTANCE' or self.__Get('smu.measure.unit') == 'smu.UNIT_OHM'):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                readings = voltages / currents
+            unit = 'Ohm'
+        elif(measureFunction == 'smu.FUNC_DC_VOLTAGE'):
+            readings, unit = voltages, 'Volt DC'
+        else:
+            readings, unit = currents, 'Amp DC'
+        #Repeat-average filter: one reading per filterCount samples
+        readings = readings.reshape(-1, filterCount).mean(axis=1)
+        times = times.ravel()[filterCount - 1::filterCount]
+        readings = np.where(np.isfinite(readings), readings, OVERFLOW_VALUE)
+        if(isFixedRange and unit != 'Ohm'):
+            readings = np.where(np.abs(readings) > RANGE_OVERLOAD * float(self.__Get('smu.measure.range')), OVERFLOW_VALUE, readings)
+        buffer.Append(readings, np.repeat(levels, count), times, unit, _UNITS[sourceFunction])
+
+        self.clock = levelStarts[-1] + levelSeconds[-1]
+        self.__lastLevelChange = changeTimes[-1]
+        self.__appliedLevel = appliedLevels[-1]
+        return readings
+
+    def __SourceDelay(self) -> float:
+        return AUTODELAY_ESTIMATE if self.__Get('smu.source.autodelay') else float(self.__Get('smu.source.delay'))
+
+    def __Statistics(self, count:int, bufferName:str) -> str:
+        #Same answer as the TSP routine KdmStatistics (Model2450.STATISTICS_ROUTINE)
+        readings = self.__Measure(np.full(count, self.__Get('smu.source.level')), bufferName, self.__SourceDelay())
+        valid = readings[np.abs(readings) < 9.9e37]
+        n = len(valid)
+        mean = valid.mean() if n > 0 else 0.0
+        std = valid.std(ddof=1) if n > 1 else 0.0
+        low, high = (valid.min(), valid.max()) if n > 0 else (OVERFLOW_VALUE, -OVERFLOW_VALUE)
+        return f'{n},{len(readings) - n},{mean:.12e},{std:.12e},{low:.12e},{high:.12e}'
+
+    def __PrintBuffer(self, arguments:list) -> str:
+        #printbuffer(start, end, buf.attribute, ...) prints the attributes row by row: r1, u1, r2, u2, ...
+        first, last = int(self.__Evaluate(arguments[0])), int(self.__Evaluate(arguments[1]))
+        precision = int(self.settings['format.asciiprecision']) or 7
+        columns = []
+        for argument in arguments[2:]:
+            bufferName, attribute = argument.split('.', 1)
+            arrays = self.__Buffer(bufferName).Arrays()
+            if(attribute in ('units', 'sourceunits')):
+                columns.append(arrays[attribute][first - 1:last])
+                continue
+            times = arrays['times']
+            if(attribute == 'relativetimestamps'):
+                values = times - times[0] if len(times) > 0 else times
+            elif(attribute in ('seconds', 'fractionalseconds')):
+                absolute = self.startTime + times
+                values = np.floor(absolute) if attribute == 'seconds' else absolute - np.floor(absolute)
+            else:
+                values = arrays[attribute]
+            columns.append(list(map(f'{{:.{precision - 1}e}}'.format, values[first - 1:last].tolist())))
+        if(len(columns) == 0 or last < first):
+            return ''
+        if(len(columns) == 1):
+            return ', '.join(columns[0])
+        return ', '.join(np.column_stack(columns).ravel())
+
+    def __Fingerprint(self, buffer:_SimulatedBuffer) -> str:
+        if(buffer.n == 0):
+            return '0'
+        arrays = buffer.Arrays()
+        absolute = self.startTime + arrays['times'][[0, -1]]
+        return (f'{buffer.n},{int(absolute[0])},{absolute[0] - int(absolute[0]):.9f},{int(absolute[1])},'
+                f'{absolute[1] - int(absolute[1]):.9f},{arrays["readings"][-1]:.12e}')
+
+    def __Evaluate(self, expression:str):
+        expression = expression.strip()
+        if(expression == 'trigger.model.state()'):
+            return 'trigger.STATE_IDLE\ttrigger.STATE_IDLE\t0'
+        bufferName, _, attribute = expression.partition('.')
+        if(attribute in ('n', 'capacity', 'startindex', 'endindex')):
+            buffer = self.__Buffer(bufferName)
+            return {'n':buffer.n, 'capacity':buffer.capacity, 'startindex':1 if buffer.n > 0 else 0, 'endindex':buffer.n}[attribute]
+        if(self.__Key(expression) in self.settings):
+            return self.settings[self.__Key(expression)]
+        return _Value(expression)
+
+    def __Buffer(self, bufferName:str) -> _SimulatedBuffer:
+        if(bufferName not in self.buffers):
+            raise Exception(f'The simulated device has no buffer <{bufferName}>.')
+        return self.buffers[bufferName]
+
+    def __Key(self, name:str) -> str:
+        #Settings stored for each function get the function in their key
+        if(name in _MEASURE_SETTINGS):
+            return f'{name}@{self.settings["smu.measure.func"]}'
+        if(name in _SOURCE_SETTINGS):
+            return f'{name}@{self.settings["smu.source.func"]}'
+        return name
+
+    def __Get(self, name:str):
+        return self.settings.get(self.__Key(name), _DEFAULTS.get(name))
+
+
+def _Arguments(text:str) -> list:
+    #Splits the arguments of a call at the commas outside quotes and parentheses
+    arguments, depth, quoted, current = [], 0, False, ''
+    for character in text:
+        if(character == '"'):
+            quoted = not quoted
+        elif(not quoted and character == '('):
+            depth += 1
+        elif(not quoted and character == ')'):
+            depth -= 1
+        elif(not quoted and depth == 0 and character == ','):
+            arguments.append(current.strip())
+            current = ''
+            continue
+        current += character
+    if(current.strip() != ''):
+        arguments.append(current.strip())
+    return arguments
+
+def _Text(argument:str) -> str:
+    return argument.strip().strip('"')
+
+def _Value(text:str):
+    #A TSP value: smu.ON/OFF and true/false as bool, numbers as float, anything else (smu.FUNC_..., names) as text
+    text = text.strip()
+    if(text in ('smu.ON', 'true', 'True')):
+        return True
+    if(text in ('smu.OFF', 'false', 'False')):
+        return False
+    try:
+        return float(text)
+    except ValueError:
+        return _Text(text)
@@ -1,7 +1,11 @@
 import time
+import threading
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
+import ivAnalysis
+from bufferParser import ParseNumericResponse
+from deviceLock import LockedDevice
 
 
 
@@ -22,24 +26,118 @@ def GenerateTimeDateString(separator:str='_', fillthegap:bool=True):
     return time.strftime(f'%d{separator}%m{separator}%Y %H{separator}%M{separator}%S', time.localtime())
 
 def calculat_Ma(listOfCurrents):
-    
-    j = [i / 1000 for i in listOfCurrents]
-    return j
+    """
+    Divides each value by 1000. Kept for the existing scripts; see ivAnalysis.ScaleUnits() for arrays.
+    """
+    return ivAnalysis.ScaleUnits(listOfCurrents, factor=1e-3).tolist()
 def calculat_J(listOfCurrents,cm2):
-    
-    j = [i / cm2  for i in listOfCurrents]
-    return j
+    """
+    Current density of each value. Kept for the existing scripts; see ivAnalysis.CurrentDensity() for arrays.
+    """
+    return ivAnalysis.CurrentDensity(listOfCurrents, area_cm2=cm2).tolist()
 
 def Calculate_Log(listToConvert):
-    result = None
-    NewList = []
-    for value in listToConvert:
-        if (value< 0):
-            result = -1*np.log10(-1*value)
-        else:
-            result = np.log10(value)
-        NewList.append(result)
-    return NewList
+    """
+    log10 of each value, negative values give -log10(-value). Kept for the existing scripts; see
+    ivAnalysis.SignedLog10() for arrays. Zeros and the 9.91e37 overflow value give NaN.
+    """
+    return ivAnalysis.SignedLog10(listToConvert).tolist()
+
+def Decimate_MinMax(X_AxisData, Y_AxisData, numberOfBuckets:int=1000):
+    """
+    Reduces a series to the minimum and the maximum of each bucket of consecutive points. The envelope of
+    the curve and every peak are preserved. The first and the last point are always kept.
+
+    Args:
+        X_AxisData (list | np.ndarray): x values.
+        Y_AxisData (list | np.ndarray): y values, the extremes are searched in these values.
+        numberOfBuckets (int, optional): The number of buckets; the result has at most 2*numberOfBuckets+2 points. Defaults to 1000.
+
+    Returns:
+        tuple: (x, y) NumPy arrays of the kept points, in the original order
+    """
+    x = np.asarray(X_AxisData, dtype=np.float64)
+    y = np.asarray(Y_AxisData, dtype=np.float64)
+    count = y.size
+    if(numberOfBuckets < 1 or 2 * numberOfBuckets >= count):
+        return x, y
+    bucketSize = int(np.ceil(count / numberOfBuckets))
+    numberOfBuckets = int(np.ceil(count / bucketSize))
+    buckets = np.concatenate((y, np.full(numberOfBuckets * bucketSize - count, np.nan))).reshape(numberOfBuckets, bucketSize)
+    finite = np.isfinite(buckets)
+    lowIndex = np.where(finite, buckets, np.inf).argmin(axis=1)
+    highIndex = np.where(finite, buckets, -np.inf).argmax(axis=1)
+    offsets = np.arange(numberOfBuckets) * bucketSize
+    indexes = np.stack((np.minimum(lowIndex, highIndex), np.maximum(lowIndex, highIndex)), axis=1) + offsets[:, None]
+    indexes = np.unique(np.concatenate(([0], indexes.ravel(), [count - 1])))
+    indexes = indexes[indexes < count]
+    return x[indexes], y[indexes]
+
+def Decimate_LTTB(X_AxisData, Y_AxisData, threshold:int=2000):
+    """
+    Largest-Triangle-Three-Buckets: keeps in each bucket the point that makes the largest triangle with the
+    point kept in the previous bucket and the average of the next bucket. The shape of the curve is kept
+    better than with Decimate_MinMax() for the same number of points. Points which are not finite (e.g. the
+    masked 9.91e37 overflow values) are dropped first.
+
+    Args:
+        X_AxisData (list | np.ndarray): x values.
+        Y_AxisData (list | np.ndarray): y values.
+        threshold (int, optional): The number of points of the result. Defaults to 2000.
+
+    Returns:
+        tuple: (x, y) NumPy arrays of the kept points, in the original order
+    """
+    x = np.asarray(X_AxisData, dtype=np.float64)
+    y = np.asarray(Y_AxisData, dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+    if(not finite.all()):
+        x, y = x[finite], y[finite]
+    count = x.size
+    if(threshold < 3 or threshold >= count):
+        return x, y
+    #threshold-2 buckets between the first and the last point
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        nextEnd = edges[bucket + 2] if bucket + 2 < edges.size else count
+        averageX = x[end:nextEnd].mean()
+        averageY = y[end:nextEnd].mean()
+        areas = np.abs((x[previous] - averageX) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (averageY - y[previous]))
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+    return x[selected], y[selected]
+
+def Decimate(X_AxisData, Y_AxisData, maxPoints:int=2000, method:str='lttb'):
+    """
+    Reduces a series to about maxPoints points before plotting. Series which are already small enough are
+    returned as NumPy arrays without any change (NaN values included). Longer series are reduced by the chosen
+    method; 'lttb' drops the points which are not finite.
+
+    Args:
+        X_AxisData (list | np.ndarray): x values.
+        Y_AxisData (list | np.ndarray): y values.
+        maxPoints (int, optional): The maximum number of points of the result. Defaults to 2000.
+        method (str, optional): 'lttb' (see Decimate_LTTB()) or 'minmax' (see Decimate_MinMax()). Defaults to 'lttb'.
+
+    Returns:
+        tuple: (x, y) NumPy arrays
+    """
+    method = method.lower()
+    if(method not in ('lttb', 'minmax')):
+        raise Exception(f"The decimation method can be 'lttb' or 'minmax'. The current value is {method} and is not Valid.")
+    x = np.asarray(X_AxisData, dtype=np.float64)
+    y = np.asarray(Y_AxisData, dtype=np.float64)
+    if(y.size <= maxPoints):
+        return x, y
+    if(method == 'lttb'):
+        return Decimate_LTTB(x, y, threshold=maxPoints)
+    return Decimate_MinMax(x, y, numberOfBuckets=max((maxPoints - 2) // 2, 1))
 
 class fileManagement():
     #defaultFullPath:str = "C:/Hiwi/result_";
@@ -53,7 +151,10 @@ class fileManagement():
         #Check if the directory does not exist, create it
         fullPath = directoryPath + "\\" + filename + "_" + GenerateTimeDateString()
         savePath = fullPath + '.' + fileType
-        dataFrame1 = pd.DataFrame(inputList)
+        if(hasattr(inputList, 'to_pandas')):
+            dataFrame1 = inputList.to_pandas()
+        else:
+            dataFrame1 = pd.DataFrame(inputList)
         fileType = fileType.lower()
         if (fileType == "xlsx"):
             dataFrame1.to_excel(savePath, header=True, index=False, engine='xlsxwriter')
@@ -89,11 +190,22 @@ class Plots(object):
     
     def Plot(self, X_AxisData, X_AxisCaption,Y_AxisData, Y_AxixCaption, X_AxisData1, X_AxisCaption1, Y_AxisData1, Y_AxixCaption1, title = 'Source Voltage - Measure current',
              _plotType = 'line', _isPlotShown = True,
-             _isSaveToDirectory = False, _fileType = 'png', _directory = defaultFullPath, _fileName= defaultFileName):
-    
+             _isSaveToDirectory = False, _fileType = 'png', _directory = defaultFullPath, _fileName= defaultFileName,
+             maxPlottedPoints:int = 2000, decimationMethod:str = 'lttb'):
+        """
+        Plots two curves side by side. Series longer than maxPlottedPoints are decimated first (see Decimate()),
+        so the figure stays responsive with millions of points. Set maxPlottedPoints to None to plot all the points.
+        _fileType can also be a list, e.g. ['png', 'svg'], to save the figure in several formats.
+
+        Returns:
+            list: the paths of the saved files (empty if _isSaveToDirectory is False)
+        """
+        if(maxPlottedPoints is not None):
+            X_AxisData, Y_AxisData = Decimate(X_AxisData, Y_AxisData, maxPoints=maxPlottedPoints, method=decimationMethod)
+            X_AxisData1, Y_AxisData1 = Decimate(X_AxisData1, Y_AxisData1, maxPoints=maxPlottedPoints, method=decimationMethod)
         #fig = plt.subplot()
         #ax1 = plt.Axes(fig=fig)
-        plt.figure(figsize=(12,6))
+        fig = plt.figure(figsize=(12,6))
         plt.subplot(1, 2, 1)
         plt.plot(X_AxisData,Y_AxisData,marker='o',linestyle='-',color='b')
         plt.xlabel(X_AxisCaption)
@@ -110,15 +222,22 @@ class Plots(object):
         plt.grid(True)
 
         plt.tight_layout()
-        plt.show()
+        return self.__SaveAndShow(fig, _isPlotShown, _isSaveToDirectory, _fileType, _directory, _fileName)
            
-    """        
     def TwinAxisPlot(self, commonAxisData, commonAxisCaption,
                     leftAxisData, leftAxixCaption, rightAxisData, rightAxisCaption, title = 'Source Voltage - Measure current',
                     _plotType = 'dot' , _isPlotShown = True,
-                    _isSaveToDirectory = False, _fileType = 'png', _directory= defaultFullPath, _fileName= defaultFileName
-                    ):
-        
+                    _isSaveToDirectory = False, _fileType = 'png', _directory= defaultFullPath, _fileName= defaultFileName,
+                    maxPlottedPoints:int = 2000, decimationMethod:str = 'lttb'):
+        """
+        Plots two curves which share the x axis, with one y axis on each side.
+        Decimation and saving work as in Plot().
+        """
+        if(maxPlottedPoints is not None):
+            leftAxisX, leftAxisData = Decimate(commonAxisData, leftAxisData, maxPoints=maxPlottedPoints, method=decimationMethod)
+            rightAxisX, rightAxisData = Decimate(commonAxisData, rightAxisData, maxPoints=maxPlottedPoints, method=decimationMethod)
+        else:
+            leftAxisX = rightAxisX = commonAxisData
         fig, ax1 = plt.subplots()
 
         color_r = 'tab:red'
@@ -132,24 +251,33 @@ class Plots(object):
         color_b = 'tab:blue'
         ax2.set_ylabel(rightAxisCaption, color=color_b)  # we already handled the x-label with ax1
         if (_plotType.lower() == 'dot'):
-            ax1.scatter(commonAxisData, leftAxisData, color=color_r)
-            ax2.scatter(commonAxisData, rightAxisData, color=color_b)
+            ax1.scatter(leftAxisX, leftAxisData, color=color_r)
+            ax2.scatter(rightAxisX, rightAxisData, color=color_b)
         elif(_plotType.lower() == 'line'):
-            ax1.plot(commonAxisData, leftAxisData, color=color_r)
-            ax2.plot(commonAxisData, rightAxisData, color=color_b)
+            ax1.plot(leftAxisX, leftAxisData, color=color_r)
+            ax2.plot(rightAxisX, rightAxisData, color=color_b)
 
         plt.grid(True, axis='y')
         plt.grid(True, axis='x')
         plt.title(title)
         fig.tight_layout()  # otherwise the right y-label is slightly clipped
 
+        return self.__SaveAndShow(fig, _isPlotShown, _isSaveToDirectory, _fileType, _directory, _fileName)
+
+    def __SaveAndShow(self, fig, _isPlotShown, _isSaveToDirectory, _fileType, _directory, _fileName):
+        savedPaths = []
         if (_isSaveToDirectory):
-            pathtosave = _directory + _fileName + '.' + _fileType
-            plt.savefig(pathtosave)
+            fileTypes = [_fileType] if isinstance(_fileType, str) else list(_fileType)
+            for fileType in fileTypes:
+                pathtosave = _directory + _fileName + '.' + fileType
+                fig.savefig(pathtosave)
+                savedPaths.append(pathtosave)
         if (_isPlotShown):
             plt.show()
-            
-    """
+        else:
+            #Figures which are not shown are closed, otherwise batch runs keep all of them in memory
+            plt.close(fig)
+        return savedPaths
              
     def Plot_with_multiInput(self,):
         pass
@@ -157,3 +285,352 @@ class Plots(object):
 
 
     # ... (other methods)
+
+class _RunningMinMax(object):
+    """
+    Decimate_MinMax() of a growing series, extended with the new points only. The points are grouped in
+    buckets of bucketSize consecutive points and each bucket keeps the index of its minimum and its maximum.
+    When there are more than numberOfBuckets buckets, neighbouring buckets are merged and bucketSize doubles,
+    so Extend() costs O(new points + numberOfBuckets) however long the series already is.
+    """
+
+    def __init__(self, numberOfBuckets:int):
+        self.numberOfBuckets = max(numberOfBuckets, 1)
+        self.bucketSize = 1
+        self.count = 0
+        self.lows = np.empty(0, dtype=np.int64)
+        self.highs = np.empty(0, dtype=np.int64)
+        #The last bucket, which has fewer than bucketSize points
+        self.tailCount = 0
+        self.tailLow = None
+        self.tailHigh = None
+
+    def Extend(self, y:np.ndarray):
+        """
+        Adds the points y[count:]. The points before count must not have changed.
+        """
+        end = y.size
+        position = self.count
+        if(end <= position):
+            return
+        if(self.tailCount > 0):
+            take = min(self.bucketSize - self.tailCount, end - position)
+            low, high = _BucketExtremes(y, position, 1, take)
+            self.tailLow = _Lower(y, np.array([self.tailLow]), low)[0]
+            self.tailHigh = _Higher(y, np.array([self.tailHigh]), high)[0]
+            self.tailCount += take
+            position += take
+            if(self.tailCount == self.bucketSize):
+                self.lows = np.append(self.lows, self.tailLow)
+                self.highs = np.append(self.highs, self.tailHigh)
+                self.tailCount = 0
+        numberOfFullBuckets = (end - position) // self.bucketSize
+        if(numberOfFullBuckets > 0):
+            low, high = _BucketExtremes(y, position, numberOfFullBuckets, self.bucketSize)
+            self.lows = np.concatenate((self.lows, low))
+            self.highs = np.concatenate((self.highs, high))
+            position += numberOfFullBuckets * self.bucketSize
+        if(position < end):
+            low, high = _BucketExtremes(y, position, 1, end - position)
+            self.tailLow, self.tailHigh, self.tailCount = low[0], high[0], end - position
+        self.count = end
+        while(self.lows.size > self.numberOfBuckets):
+            self.__Merge(y)
+
+    def Indexes(self) -> np.ndarray:
+        """
+        The sorted indexes of the points to draw: the first and the last point and the extremes of every bucket.
+        """
+        if(self.count == 0):
+            return np.empty(0, dtype=np.int64)
+        parts = [[0], self.lows, self.highs, [self.count - 1]]
+        if(self.tailCount > 0):
+            parts.append([self.tailLow, self.tailHigh])
+        return np.unique(np.concatenate(parts).astype(np.int64))
+
+    def __Merge(self, y:np.ndarray):
+        pairs = self.lows.size // 2
+        if(self.lows.size % 2 == 1):
+            #The unpaired last bucket is half a bucket of the new size, so it becomes the start of the partial bucket
+            low, high = self.lows[-1:], self.highs[-1:]
+            if(self.tailCount > 0):
+                low = _Lower(y, low, np.array([self.tailLow]))
+                high = _Higher(y, high, np.array([self.tailHigh]))
+            self.tailLow, self.tailHigh = low[0], high[0]
+            self.tailCount += self.bucketSize
+        self.lows = _Lower(y, self.lows[0:2 * pairs:2], self.lows[1:2 * pairs:2])
+        self.highs = _Higher(y, self.highs[0:2 * pairs:2], self.highs[1:2 * pairs:2])
+        self.bucketSize *= 2
+
+def _BucketExtremes(y:np.ndarray, start:int, numberOfBuckets:int, bucketSize:int):
+    #Indexes of the minimum and the maximum of each bucket; points which are not finite are ignored as in Decimate_MinMax()
+    buckets = y[start:start + numberOfBuckets * bucketSize].reshape(numberOfBuckets, bucketSize)
+    finite = np.isfinite(buckets)
+    offsets = start + np.arange(numberOfBuckets) * bucketSize
+    return (np.where(finite, buckets, np.inf).argmin(axis=1) + offsets,
+            np.where(finite, buckets, -np.inf).argmax(axis=1) + offsets)
+
+def _Lower(y:np.ndarray, first:np.ndarray, second:np.ndarray) -> np.ndarray:
+    #Of each pair of indexes the one with the lower finite value
+    yFirst, ySecond = y[first], y[second]
+    return np.where((ySecond < yFirst) | (~np.isfinite(yFirst) & np.isfinite(ySecond)), second, first)
+
+def _Higher(y:np.ndarray, first:np.ndarray, second:np.ndarray) -> np.ndarray:
+    yFirst, ySecond = y[first], y[second]
+    return np.where((ySecond > yFirst) | (~np.isfinite(yFirst) & np.isfinite(ySecond)), second, first)
+
+class LivePlot(object):
+    """
+    Shows the data of a running sweep or logger while it is being acquired.
+
+    The acquisition side only appends the new points to a NumPy buffer (Append() is thread-safe and never
+    draws). The drawing side runs on the GUI thread with a timer at targetFrameRate: it reuses one figure,
+    updates the line data in place and redraws only the line using blitting. The whole axes is redrawn only
+    when the data leaves the current limits. Each frame adds only the new points to a running min/max
+    decimation and draws at most maxDrawnPoints points, so the cost of a frame does not grow with the number
+    of acquired points (run this module for a timing check).
+
+    Sample:
+        livePlot = LivePlot(X_AxisCaption='Source Voltage', Y_AxixCaption='Current')
+        livePlot.AttachToDevice(KDM, bufferName='defbuffer1')   #or call livePlot.Append(x, y) from your logger
+        KDM.Sweep_LinearcaseByPoints_Voltage(...)               #in another thread
+        livePlot.Show()
+    Note: While the instrument executes waitcomplete() it does not answer queries, so AttachToDevice() shows
+    the points of a canned sweep in bursts. Loggers that take readings one by one are shown continuously.
+    """
+
+    def __init__(self, X_AxisCaption:str='Source Voltage', Y_AxixCaption:str='current', title:str='Source Voltage - Measure current',
+                 targetFrameRate:float=10, maxDrawnPoints:int=2000, initialCapacity:int=4096):
+        """
+        Args:
+            X_AxisCaption (str, optional): Caption of the x axis. Defaults to 'Source Voltage'.
+            Y_AxixCaption (str, optional): Caption of the y axis. Defaults to 'current'.
+            title (str, optional): Title of the plot. Defaults to 'Source Voltage - Measure current'.
+            targetFrameRate (float, optional): Maximum number of redraws per second. Defaults to 10.
+            maxDrawnPoints (int, optional): Maximum number of points drawn in each frame. Defaults to 2000.
+            initialCapacity (int, optional): Initial size of the buffer; it doubles whenever it is full. Defaults to 4096.
+        """
+        self.X_AxisCaption = X_AxisCaption
+        self.Y_AxixCaption = Y_AxixCaption
+        self.title = title
+        self.targetFrameRate = targetFrameRate
+        self.maxDrawnPoints = maxDrawnPoints
+        self.figure = None
+        self.axes = None
+        self.line = None
+        self.__lock = threading.Lock()
+        self.__x = np.empty(initialCapacity, dtype=np.float64)
+        self.__y = np.empty(initialCapacity, dtype=np.float64)
+        self.__count = 0
+        self.__drawnCount = 0
+        self.__reduction = _RunningMinMax(self.__NumberOfBuckets())
+        self.__limits = None
+        self.__background = None
+        self.__timer = None
+        self.__pollingThread = None
+        self.__stopPolling = threading.Event()
+
+    def Append(self, X_AxisData, Y_AxisData):
+        """
+        Adds one point or an array of points. Can be called from any thread.
+        """
+        x = np.atleast_1d(np.asarray(X_AxisData, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(Y_AxisData, dtype=np.float64))
+        if(x.shape != y.shape):
+            raise Exception(f'X_AxisData and Y_AxisData must have the same length ({x.size} != {y.size}).')
+        with self.__lock:
+            end = self.__count + x.size
+            if(end > self.__x.size):
+                #Readers keep their views on the old arrays, so the buffers are replaced and never resized in place
+                capacity = max(end, 2 * self.__x.size)
+                self.__x = np.concatenate((self.__x[:self.__count], np.empty(capacity - self.__count)))
+                self.__y = np.concatenate((self.__y[:self.__count], np.empty(capacity - self.__count)))
+            self.__x[self.__count:end] = x
+            self.__y[self.__count:end] = y
+            self.__count = end
+
+    def Clear(self):
+        """
+        Removes all the points. The figure is kept.
+        """
+        with self.__lock:
+            self.__count = 0
+            self.__drawnCount = 0
+            self.__reduction = _RunningMinMax(self.__NumberOfBuckets())
+            self.__limits = None
+
+    def Data(self):
+        """
+        Returns (x, y) views of all the points appended so far.
+        """
+        with self.__lock:
+            return self.__x[:self.__count], self.__y[:self.__count]
+
+    def Show(self, block:bool=True):
+        """
+        Creates the figure (only the first time) and starts the redraw timer.
+
+        Args:
+            block (bool, optional): Same as plt.show(block). Defaults to True.
+        """
+        if(self.figure is None):
+            self.figure, self.axes = plt.subplots(figsize=(8,6))
+            self.line, = self.axes.plot([], [], linestyle='-', color='b', animated=True)
+            self.axes.set_xlabel(self.X_AxisCaption)
+            self.axes.set_ylabel(self.Y_AxixCaption, color='r')
+            self.axes.set_title(self.title)
+            self.axes.grid(True)
+            self.figure.canvas.mpl_connect('draw_event', self.__OnDraw)
+            self.__timer = self.figure.canvas.new_timer(interval=int(1000 / self.targetFrameRate))
+            self.__timer.add_callback(self.Update)
+            self.__timer.start()
+        plt.show(block=block)
+
+    def Update(self):
+        """
+        Draws one frame. It is called by the timer; it only has to be called directly if the figure is
+        embedded in another event loop.
+        """
+        if(self.figure is None):
+            return
+        with self.__lock:
+            count = self.__count
+            x, y = self.__x[:count], self.__y[:count]
+            newX, newY = x[self.__drawnCount:], y[self.__drawnCount:]
+            self.__drawnCount = count
+            #Clear() replaces the reduction, so a frame that runs during Clear() only updates the old one
+            reduction = self.__reduction
+        if(newX.size == 0):
+            return
+        self.line.set_data(*self._ReduceForDrawing(x, y, reduction))
+        if(self.__ExtendLimits(newX, newY)):
+            #The whole axes has to be drawn again; the draw event stores the new background
+            self.figure.canvas.draw_idle()
+            return
+        if(self.__background is None):
+            return
+        canvas = self.figure.canvas
+        canvas.restore_region(self.__background)
+        self.axes.draw_artist(self.line)
+        canvas.blit(self.axes.bbox)
+        canvas.flush_events()
+
+    def AttachToDevice(self, deviceManager, bufferName:str=None, pollInterval:float=0.2):
+        """
+        Starts a background thread that reads the new entries of a device buffer and appends them
+        (sourcevalues on x, readings on y).
+
+        Args:
+            deviceManager (KeithleyDeviceManager): An initialized device manager.
+            bufferName (str, optional): The buffer to follow. Defaults to the active buffer of the device manager.
+            pollInterval (float, optional): Seconds between two reads of the buffer. Defaults to 0.2.
+        """
+        if(bufferName is None):
+            bufferName = deviceManager.ActiveBuffer_Name
+        self.StopPolling()
+        self.__stopPolling.clear()
+        self.__pollingThread = threading.Thread(target=self.__PollDevice, args=(deviceManager, bufferName, pollInterval), daemon=True)
+        self.__pollingThread.start()
+        return self.__pollingThread
+
+    def StopPolling(self):
+        """
+        Stops the thread started by AttachToDevice().
+        """
+        if(self.__pollingThread is not None):
+            self.__stopPolling.set()
+            self.__pollingThread.join()
+            self.__pollingThread = None
+
+    def Close(self):
+        self.StopPolling()
+        if(self.__timer is not None):
+            self.__timer.stop()
+        if(self.figure is not None):
+            plt.close(self.figure)
+        self.figure = None
+
+    def _ReduceForDrawing(self, x:np.ndarray, y:np.ndarray, reduction):
+        #min/max keeps the peaks; only the points after the last frame are added, see _RunningMinMax
+        reduction.Extend(y)
+        indexes = reduction.Indexes()
+        return x[indexes], y[indexes]
+
+    def __NumberOfBuckets(self) -> int:
+        #Two points per bucket plus the partial last bucket and the first and the last point
+        return max((self.maxDrawnPoints - 6) // 2, 1)
+
+    def __ExtendLimits(self, newX:np.ndarray, newY:np.ndarray) -> bool:
+        finite = np.isfinite(newX) & np.isfinite(newY)
+        if(not finite.any()):
+            return False
+        newX, newY = newX[finite], newY[finite]
+        limits = [newX.min(), newX.max(), newY.min(), newY.max()]
+        if(self.__limits is not None):
+            old = self.__limits
+            limits = [min(old[0], limits[0]), max(old[1], limits[1]), min(old[2], limits[2]), max(old[3], limits[3])]
+            if(limits == old):
+                return False
+        self.__limits = limits
+        #Leave some margin, so a slowly growing curve does not redraw the axes on every frame
+        xMargin = 0.1 * (limits[1] - limits[0]) or 1e-12
+        yMargin = 0.1 * (limits[3] - limits[2]) or 1e-12
+        self.axes.set_xlim(limits[0] - xMargin, limits[1] + xMargin)
+        self.axes.set_ylim(limits[2] - yMargin, limits[3] + yMargin)
+        return True
+
+    def __OnDraw(self, event):
+        self.__background = self.figure.canvas.copy_from_bbox(self.axes.bbox)
+        self.axes.draw_artist(self.line)
+
+    def __PollDevice(self, deviceManager, bufferName:str, pollInterval:float):
+        device = deviceManager.Device
+        if(isinstance(device, LockedDevice)):
+            #Low priority: a running measurement goes first, None if the device was not free within pollInterval
+            Query = lambda command: device.Poll(command, timeout=pollInterval)
+        else:
+            Query = device.query
+        lastIndex = 0
+        while(not self.__stopPolling.is_set()):
+            try:
+                response = Query(f'print({bufferName}.n)')
+                if(response is None):
+                    self.__stopPolling.wait(pollInterval)
+                    continue
+                count = int(float(response))
+                if(count < lastIndex):
+                    #The buffer was cleared by a new measurement
+                    self.Clear()
+                    lastIndex = 0
+                if(count > lastIndex):
+                    response = Query(f'printbuffer({lastIndex + 1}, {count}, {bufferName}.sourcevalues, {bufferName}.readings)')
+                    if(response is None):
+                        self.__stopPolling.wait(pollInterval)
+                        continue
+                    values = ParseNumericResponse(response, numberOfColumns=2)
+                    self.Append(values[:, 0], values[:, 1])
+                    lastIndex = count
+            except Exception as ex:
+                print("Error occured while reading the buffer for the live plot. The technical information is: ", ex)
+            self.__stopPolling.wait(pollInterval)
+
+
+if __name__ == '__main__':
+    #Timing check of the LivePlot frames: the running min/max against a decimation of the whole history per frame
+    batch = 10_000
+    checkpoints = (10**5, 10**6, 10**7)
+    random = np.random.default_rng(0)
+    y = random.standard_normal(checkpoints[-1]).cumsum()
+    x = np.arange(y.size, dtype=np.float64)
+    reduction = _RunningMinMax(997)
+    for end in range(batch, y.size + 1, batch):
+        startTime = time.perf_counter()
+        reduction.Extend(y[:end])
+        indexes = reduction.Indexes()
+        drawnX, drawnY = x[indexes], y[indexes]
+        frameTime = time.perf_counter() - startTime
+        if(end in checkpoints):
+            startTime = time.perf_counter()
+            Decimate(x[:end], y[:end], maxPoints=2000, method='minmax')
+            wholeTime = time.perf_counter() - startTime
+            print(f'{end:>9} points: frame {frameTime * 1e3:7.3f} ms   whole history {wholeTime * 1e3:8.3f} ms   ({drawnX.size} points drawn)')
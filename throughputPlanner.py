@@ -0,0 +1,243 @@
+"""
+Planner for the speed/precision settings of the Model 2450: NPLC, autozero mode, source readback, fixed ranges
+and source delay.
+
+The 2450 reference manual gives the rules but not one number for the reading rate, so PlanThroughput() uses a
+simple time model per reading:
+
+    integration time = NPLC / line frequency      (x AUTOZERO_TIME_FACTOR with autozero on)
+    + source delay + READING_OVERHEAD (+ READBACK_OVERHEAD) (+ AUTORANGE_OVERHEAD without fixed ranges)
+
+The constants below are estimates from the manual and from measurements on our own units; the result is a
+planning value, not a guarantee.
+
+Sample:
+    plan = PlanThroughput(targetReadingsPerSecond=200, resolutionDigits=5.5, expectedMaxVoltage=2, expectedMaxCurrent=5e-3)
+    print(plan)
+    KDM.ApplyMeasurementPlan(plan)      #used by all the Send* and Sweep_* functions from now on
+
+PlanRangeSegments() splits a wide-dynamic-range sweep into segments with the best fixed ranges
+(see KeithleyDeviceManager.Sweep_RangeSegmented_SourceVoltage_MeasureCurrent()).
+"""
+
+import numpy as np
+
+#Time added to each reading by the trigger model and the buffer, in seconds
+READING_OVERHEAD:float = 0.2e-3
+#Measuring the source value (readback) instead of using the programmed value
+READBACK_OVERHEAD:float = 0.1e-3
+#Range checks of the autorange for each reading (a range change itself takes several ms more)
+AUTORANGE_OVERHEAD:float = 1.0e-3
+#Estimated delay of smu.DELAY_AUTO for the low ranges
+AUTODELAY_ESTIMATE:float = 1.0e-3
+#With continuous autozero, the reference and zero measurements roughly double the integration time
+AUTOZERO_TIME_FACTOR:float = 2.0
+
+#NPLC values the planner chooses from (the 2450 accepts 0.01 to 10)
+NPLC_STEPS = [10, 5, 2, 1, 0.5, 0.2, 0.1, 0.05, 0.02, 0.01]
+#Smallest NPLC that gives the number of digits (resolution) of the 2450
+NPLC_FOR_DIGITS = {6.5:1, 5.5:0.1, 4.5:0.01, 3.5:0.01}
+
+#Fixed ranges of the Model 2450
+CURRENT_RANGES = [10e-9, 100e-9, 1e-6, 10e-6, 100e-6, 1e-3, 10e-3, 100e-3, 1]
+VOLTAGE_RANGES = [20e-3, 200e-3, 2, 20, 200]
+RESISTANCE_RANGES = [20, 200, 2e3, 20e3, 200e3, 2e6, 20e6, 200e6]
+
+#Autozero modes, from the most to the least accurate, with the readback setting tried for each
+_QUALITY_ORDER = [('on', True), ('once', True), ('off', True), ('off', False)]
+
+
+class MeasurementPlan(object):
+    """
+    The settings chosen by PlanThroughput(). Pass it to KeithleyDeviceManager.ApplyMeasurementPlan().
+
+    Fields:
+        nplc (float): integration time in power line cycles.
+        autoZero (str): 'on' (continuous), 'once' (one reference measurement, then off) or 'off'.
+        readBack (bool): measure the source value instead of recording the programmed value.
+        sourceDelay (float): delay after setting the source, in seconds; None uses the autodelay of the device.
+        Measure_CurrentRange, Measure_VoltageRange, Measure_ResistanceRange, Source_CurrentRange, Source_VoltageRange (float):
+        fixed ranges; None keeps the range given to Initialize().
+        lineFrequency (float): 50 or 60 Hz.
+        expectedReadingsPerSecond (float): estimate of the reading rate with these settings.
+    """
+
+    def __init__(self, nplc:float=1, autoZero:str='on', readBack:bool=True, sourceDelay:float=None,
+                 Measure_CurrentRange:float=None, Measure_VoltageRange:float=None, Measure_ResistanceRange:float=None,
+                 Source_CurrentRange:float=None, Source_VoltageRange:float=None, lineFrequency:float=50):
+        if(autoZero not in ('on', 'once', 'off')):
+            raise Exception(f"The autoZero can be 'on', 'once' or 'off'. The current value is {autoZero} and is not Valid.")
+        if(nplc < 0.01 or nplc > 10):
+            raise Exception(f'The NPLC must be between 0.01 and 10. The current value is {nplc} and is not Valid.')
+        self.nplc = nplc
+        self.autoZero = autoZero
+        self.readBack = readBack
+        self.sourceDelay = sourceDelay
+        self.Measure_CurrentRange = Measure_CurrentRange
+        self.Measure_VoltageRange = Measure_VoltageRange
+        self.Measure_ResistanceRange = Measure_ResistanceRange
+        self.Source_CurrentRange = Source_CurrentRange
+        self.Source_VoltageRange = Source_VoltageRange
+        self.lineFrequency = lineFrequency
+
+    @property
+    def fixedRanges(self) -> bool:
+        return self.Measure_CurrentRange is not None or self.Measure_VoltageRange is not None or self.Measure_ResistanceRange is not None
+
+    @property
+    def secondsPerReading(self) -> float:
+        return EstimateSecondsPerReading(self.nplc, self.autoZero, self.readBack, self.sourceDelay, self.fixedRanges, self.lineFrequency)
+
+    @property
+    def expectedReadingsPerSecond(self) -> float:
+        return 1 / self.secondsPerReading
+
+    def __repr__(self) -> str:
+        ranges = {name:getattr(self, name) for name in ('Source_VoltageRange', 'Source_CurrentRange', 'Measure_VoltageRange',
+                                                        'Measure_CurrentRange', 'Measure_ResistanceRange') if getattr(self, name) is not None}
+        delay = 'auto' if self.sourceDelay is None else f'{self.sourceDelay:g} s'
+        return (f'MeasurementPlan(nplc={self.nplc:g}, autoZero={self.autoZero}, readBack={self.readBack}, sourceDelay={delay}, '
+                f'ranges={ranges or "autorange"}; ~{self.expectedReadingsPerSecond:.0f} readings/s)')
+
+
+def EstimateSecondsPerReading(nplc:float, autoZero:str='on', readBack:bool=True, sourceDelay:float=None,
+                              fixedRanges:bool=True, lineFrequency:float=50) -> float:
+    """
+    Estimated time of one source-measure point in seconds (see the time model at the top of this file).
+    """
+    integration = nplc / lineFrequency
+    if(autoZero == 'on'):
+        integration *= AUTOZERO_TIME_FACTOR
+    seconds = integration + READING_OVERHEAD
+    seconds += AUTODELAY_ESTIMATE if sourceDelay is None else sourceDelay
+    if(readBack):
+        seconds += READBACK_OVERHEAD
+    if(not fixedRanges):
+        seconds += AUTORANGE_OVERHEAD
+    return seconds
+
+def SmallestRange(value:float, ranges:list) -> float:
+    """
+    Returns the smallest fixed range that holds abs(value).
+    """
+    for rangeValue in ranges:
+        if(abs(value) <= rangeValue * 1.05):      #the 2450 can source and measure 105 % of each range
+            return rangeValue
+    raise Exception(f'The value {value} is more than the largest range {ranges[-1]}.')
+
+def PlanThroughput(targetReadingsPerSecond:float=None,
+                   resolutionDigits:float=None,
+                   expectedMaxCurrent:float=None,
+                   expectedMaxVoltage:float=None,
+                   expectedMaxResistance:float=None,
+                   settlingTime:float=None,
+                   lineFrequency:float=50) -> MeasurementPlan:
+    """
+    Chooses the most accurate settings that still reach the target reading rate.
+
+    Args:
+        targetReadingsPerSecond (float, optional): The required reading rate. None plans for precision only (NPLC 1 or more). Defaults to None.
+        resolutionDigits (float, optional): Required resolution (3.5, 4.5, 5.5 or 6.5 digits); sets the smallest allowed NPLC. Defaults to None.
+        expectedMaxCurrent (float, optional): Largest current of the test in A; the smallest fixed current ranges that hold it are used. Defaults to None.
+        expectedMaxVoltage (float, optional): Largest voltage of the test in V; the smallest fixed voltage ranges that hold it are used. Defaults to None.
+        expectedMaxResistance (float, optional): Largest resistance of the test in Ohm; the smallest fixed resistance range that holds it is used. Defaults to None.
+        settlingTime (float, optional): Settling time of the device under test in s, used as the source delay. None uses the autodelay of the device. Defaults to None.
+        lineFrequency (float, optional): 50 or 60 Hz. Defaults to 50.
+
+    Returns:
+        MeasurementPlan: the chosen settings and their expected reading rate.
+    """
+    if(resolutionDigits is not None and resolutionDigits not in NPLC_FOR_DIGITS):
+        raise Exception(f'The resolutionDigits can be one of {list(NPLC_FOR_DIGITS.keys())}. The current value is {resolutionDigits} and is not Valid.')
+    minimumNplc = NPLC_FOR_DIGITS[resolutionDigits] if resolutionDigits is not None else NPLC_STEPS[-1]
+    ranges = {}
+    if(expectedMaxCurrent is not None):
+        ranges['Measure_CurrentRange'] = ranges['Source_CurrentRange'] = SmallestRange(expectedMaxCurrent, CURRENT_RANGES)
+    if(expectedMaxVoltage is not None):
+        ranges['Measure_VoltageRange'] = ranges['Source_VoltageRange'] = SmallestRange(expectedMaxVoltage, VOLTAGE_RANGES)
+    if(expectedMaxResistance is not None):
+        ranges['Measure_ResistanceRange'] = SmallestRange(expectedMaxResistance, RESISTANCE_RANGES)
+
+    if(targetReadingsPerSecond is None):
+        return MeasurementPlan(nplc=max(1, minimumNplc), sourceDelay=settlingTime, lineFrequency=lineFrequency, **ranges)
+
+    #Higher NPLC first: a longer integration reduces the noise more than continuous autozero does
+    for nplc in NPLC_STEPS:
+        if(nplc < minimumNplc):
+            break
+        for autoZero, readBack in _QUALITY_ORDER:
+            plan = MeasurementPlan(nplc=nplc, autoZero=autoZero, readBack=readBack, sourceDelay=settlingTime,
+                                   lineFrequency=lineFrequency, **ranges)
+            if(plan.expectedReadingsPerSecond >= targetReadingsPerSecond):
+                return plan
+    fastest = MeasurementPlan(nplc=minimumNplc, autoZero='off', readBack=False, sourceDelay=settlingTime, lineFrequency=lineFrequency, **ranges)
+    raise Exception(f'{targetReadingsPerSecond} readings/s cannot be reached with these conditions; the fastest plan gives about '
+                    f'{fastest.expectedReadingsPerSecond:.0f} readings/s ({fastest}). Lower the resolution or the settling time.')
+
+def PlanRangeSegments(levels, expectedResponse=None, sourceRanges:list=VOLTAGE_RANGES, measureRanges:list=CURRENT_RANGES,
+                      measureRange:float=None, headroom:float=1.2, minPointsPerSegment:int=5) -> list:
+    """
+    Splits a sweep into consecutive segments that each run with the best fixed source and measure range.
+    This gives nearly the accuracy of autorange without its range checks and range changes at each point.
+
+    Args:
+        levels (list | np.ndarray): The source levels in the order they are sourced.
+        expectedResponse (callable | list | np.ndarray, optional): The expected reading at each level, as an array or as a
+        function of the levels array (e.g. lambda v: 1e-12 * (np.exp(v / 0.026) - 1) for a diode). None keeps measureRange for all the points. Defaults to None.
+        sourceRanges (list, optional): Fixed ranges of the source function. Defaults to VOLTAGE_RANGES.
+        measureRanges (list, optional): Fixed ranges of the measure function. Defaults to CURRENT_RANGES.
+        measureRange (float, optional): The measure range used when expectedResponse is None. Defaults to None.
+        headroom (float, optional): The expected reading is multiplied by this factor before its range is chosen, so a DUT
+        slightly above the expectation does not overflow. Defaults to 1.2.
+        minPointsPerSegment (int, optional): Shorter segments are merged into a neighbour (with the larger of both ranges),
+        so the sweep does not switch ranges for a few points. Defaults to 5.
+
+    Returns:
+        list: one dict per segment: {'start': first index, 'stop': index after the last, 'levels': np.ndarray,
+        'sourceRange': float, 'measureRange': float}
+    """
+    levels = np.asarray(levels, dtype=np.float64)
+    if(levels.ndim != 1 or levels.size == 0):
+        raise Exception('The levels must be a non-empty 1-dimensional list.')
+    sourceRangeIndexes = np.searchsorted(np.asarray(sourceRanges) * 1.05, np.abs(levels))
+    if(sourceRangeIndexes.max() >= len(sourceRanges)):
+        raise Exception(f'The level {levels[np.argmax(sourceRangeIndexes)]} is more than the largest range {sourceRanges[-1]}.')
+    if(expectedResponse is not None):
+        expected = np.asarray(expectedResponse(levels) if callable(expectedResponse) else expectedResponse, dtype=np.float64)
+        if(expected.shape != levels.shape):
+            raise Exception(f'The expected response has {expected.size} values, but there are {levels.size} levels.')
+        #The largest range is used for the points above it, the device limits them anyway
+        measureRangeIndexes = np.minimum(np.searchsorted(np.asarray(measureRanges) * 1.05, np.abs(expected) * headroom), len(measureRanges) - 1)
+    else:
+        measureRangeIndexes = None
+
+    #Runs of the same (source range, measure range) pair
+    keys = sourceRangeIndexes if measureRangeIndexes is None else sourceRangeIndexes * len(measureRanges) + measureRangeIndexes
+    boundaries = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate(([0], boundaries))
+    stops = np.concatenate((boundaries, [levels.size]))
+    segments = [[start, stop, sourceRangeIndexes[start], measureRangeIndexes[start] if measureRangeIndexes is not None else None]
+                for start, stop in zip(starts.tolist(), stops.tolist())]
+
+    #Merges the short segments into the neighbour whose ranges change the least
+    while(len(segments) > 1):
+        lengths = [stop - start for start, stop, _, _ in segments]
+        shortest = min(range(len(segments)), key=lambda index: lengths[index])
+        if(lengths[shortest] >= minPointsPerSegment):
+            break
+        candidates = [index for index in (shortest - 1, shortest + 1) if 0 <= index < len(segments)]
+        def Cost(index):
+            return (abs(segments[index][2] - segments[shortest][2]) +
+                    (abs(segments[index][3] - segments[shortest][3]) if measureRangeIndexes is not None else 0))
+        neighbour = min(candidates, key=Cost)
+        first, second = sorted((shortest, neighbour))
+        merged = [segments[first][0], segments[second][1], max(segments[first][2], segments[second][2]),
+                  max(segments[first][3], segments[second][3]) if measureRangeIndexes is not None else None]
+        segments[first:second + 1] = [merged]
+
+    result = []
+    for start, stop, sourceIndex, measureIndex in segments:
+        result.append({'start':start, 'stop':stop, 'levels':levels[start:stop],
+                       'sourceRange':sourceRanges[sourceIndex],
+                       'measureRange':measureRanges[measureIndex] if measureIndex is not None else measureRange})
+    return result
@@ -0,0 +1,203 @@
+"""
+Record and replay of the commands sent to the device, for performance tests without an instrument.
+
+RecordingDevice wraps a real session and writes every write(), query() and read(), with the answer, the start time and
+the duration, to a trace file. ReplayDevice plays such a trace back in place of the device: as fast as possible (to
+benchmark the parsing, analysis and saving on the PC) or with the recorded durations (to reproduce a slow run).
+
+Sample:
+    #Record a production run
+    KDM = KeithleyDeviceManager('USB0::0x05E6::0x2450::04586850::INSTR')
+    KDM.Device = RecordingDevice(KDM.resourceManager.open_resource(KDM.GPI_or_USB_Address, send_end=False), 'D:\\HiWi\\iv.trace')
+    KDM.Initialize(...)
+    KDM.Sweep_LinearcaseByPoints_Voltage(...)
+    KDM.Device.close()                                  #closes the trace file and the session
+
+    #Replay it offline, with the timing of the device
+    KDM.Device = ReplayDevice('D:\\HiWi\\iv.trace', timing='recorded')
+    KDM.Initialize(...)
+    KDM.Sweep_LinearcaseByPoints_Voltage(...)
+
+Trace file: gzip-compressed JSON lines. Every distinct command or answer is stored once and then referred to by its
+number, so the repeated commands of long runs cost a few bytes each:
+    {"format": "kdm-trace", "version": 1, "startTime": <epoch seconds>}
+    {"s": <number>, "v": <text>}                                                #a new string
+    [<kind w|q|r>, <command number or null>, <answer number or null>, <start offset s>, <duration s>, <error or null>]
+"""
+
+import gzip
+import json
+import threading
+import time
+
+TRACE_FORMAT = 'kdm-trace'
+TRACE_VERSION = 1
+
+
+class RecordingDevice(object):
+
+    def __init__(self, device, traceFile:str):
+        """
+        Args:
+            device: The VISA session to record (or any object with write(), read() and query()).
+            traceFile (str): The trace file; an existing file is overwritten.
+        """
+        self.device = device
+        self.traceFile = traceFile
+        self.__file = gzip.open(traceFile, 'wt', encoding='utf-8')
+        self.__strings = {}
+        self.__lock = threading.Lock()
+        self.__startTime = time.perf_counter()
+        self.__file.write(json.dumps({'format':TRACE_FORMAT, 'version':TRACE_VERSION, 'startTime':time.time()}) + '\n')
+        self.callsCount = 0
+
+    def write(self, command:str):
+        return self.__Call('w', command, lambda: self.device.write(command))
+
+    def query(self, command:str) -> str:
+        return self.__Call('q', command, lambda: self.device.query(command))
+
+    def read(self) -> str:
+        return self.__Call('r', None, self.device.read)
+
+    def Flush(self):
+        with self.__lock:
+            self.__file.flush()
+
+    def close(self):
+        """
+        Closes the trace file and the session.
+        """
+        with self.__lock:
+            if(not self.__file.closed):
+                self.__file.close()
+        close = getattr(self.device, 'close', None)
+        if(close is not None):
+            close()
+
+    def __getattr__(self, name:str):
+        #timeout, read_termination, ... of the session
+        return getattr(self.device, name)
+
+    def __setattr__(self, name:str, value):
+        if(name in ('device', 'traceFile', 'callsCount') or name.startswith('_RecordingDevice__')):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.device, name, value)
+
+    def __Call(self, kind:str, command:str, function):
+        startTime = time.perf_counter()
+        answer, error = None, None
+        try:
+            answer = function()
+            return answer
+        except Exception as ex:
+            error = f'{type(ex).__name__}: {ex}'
+            raise
+        finally:
+            duration = time.perf_counter() - startTime
+            with self.__lock:
+                record = [kind, self.__StringNumber(command), self.__StringNumber(answer) if kind != 'w' else None,
+                          round(startTime - self.__startTime, 6), round(duration, 6), error]
+                self.__file.write(json.dumps(record, separators=(',', ':')) + '\n')
+                self.callsCount += 1
+
+    def __StringNumber(self, text) -> int:
+        if(text is None):
+            return None
+        number = self.__strings.get(text)
+        if(number is None):
+            number = self.__strings[text] = len(self.__strings)
+            self.__file.write(json.dumps({'s':number, 'v':text}, separators=(',', ':')) + '\n')
+        return number
+
+
+class ReplayDevice(object):
+
+    def __init__(self, traceFile:str, timing:str='fast', speed:float=1.0, strict:bool=True):
+        """
+        Args:
+            traceFile (str): A trace written by RecordingDevice.
+            timing (str, optional): 'fast' answers at once; 'recorded' waits for the recorded duration of each call (divided by speed). Defaults to 'fast'.
+            speed (float, optional): Only for 'recorded'; 2 replays twice as fast. Defaults to 1.0.
+            strict (bool, optional): Every call must be the next call of the trace, else an Exception tells where the run differs.
+            With False, writes that are not in the trace are ignored and a query is answered by the next recorded query of the same
+            command. Defaults to True.
+        """
+        if(timing not in ('fast', 'recorded')):
+            raise Exception(f'The timing can be fast or recorded. The current value is {timing} and is not Valid.')
+        self.timing = timing
+        self.speed = speed
+        self.strict = strict
+        self.records = _LoadTrace(traceFile)
+        self.position = 0
+        self.__lock = threading.Lock()
+        self.timeout = None
+
+    def write(self, command:str):
+        self.__Replay('w', command)
+
+    def query(self, command:str) -> str:
+        return self.__Replay('q', command)
+
+    def read(self) -> str:
+        return self.__Replay('r', None)
+
+    def close(self):
+        pass
+
+    @property
+    def isFinished(self) -> bool:
+        return self.position >= len(self.records)
+
+    def RecordedDeviceSeconds(self) -> float:
+        """
+        Time the device spent answering in the recorded run (the sum of the durations).
+        """
+        return sum(record[4] for record in self.records)
+
+    def __Replay(self, kind:str, command:str):
+        with self.__lock:
+            index = self.__Find(kind, command)
+            if(index is None):
+                return None
+            recordKind, recordCommand, answer, _, duration, error = self.records[index]
+            self.position = index + 1
+        if(self.timing == 'recorded' and duration > 0):
+            time.sleep(duration / self.speed)
+        if(error is not None):
+            raise Exception(f'Replayed error of the recorded run: {error}')
+        return answer
+
+    def __Find(self, kind:str, command:str) -> int:
+        if(self.position < len(self.records)):
+            recordKind, recordCommand = self.records[self.position][0:2]
+            if(recordKind == kind and recordCommand == command):
+                return self.position
+        if(self.strict):
+            expected = self.records[self.position][0:2] if self.position < len(self.records) else 'the end of the trace'
+            raise Exception(f'The run differs from the trace at call {self.position + 1}: expected {expected}, got {(kind, command)}.')
+        if(kind == 'w'):
+            return None
+        for index in range(self.position, len(self.records)):
+            if(self.records[index][0] == kind and self.records[index][1] == command):
+                return index
+        raise Exception(f'The query {command!r} is not in the rest of the trace.')
+
+
+def _LoadTrace(traceFile:str) -> list:
+    #Returns the calls as [kind, command, answer, start offset, duration, error] with the strings resolved
+    strings = {}
+    records = []
+    with gzip.open(traceFile, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if(header.get('format') != TRACE_FORMAT or header.get('version') != TRACE_VERSION):
+            raise Exception(f'{traceFile} is not a trace of version {TRACE_VERSION}.')
+        for line in f:
+            item = json.loads(line)
+            if(isinstance(item, dict)):
+                strings[item['s']] = item['v']
+                continue
+            kind, command, answer, startOffset, duration, error = item
+            records.append([kind, strings.get(command), strings.get(answer), startOffset, duration, error])
+    return records
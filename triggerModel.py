@@ -0,0 +1,241 @@
+"""
+Builder for the trigger model of the Model 2450.
+
+The trigger model runs a sequence of blocks (source, delay, measure, branch, ...) on the device itself, with
+the timing of the device. TriggerModel collects the blocks in Python, checks the block graph before anything is
+sent (targets, counters, values) and compiles it into one chunk of trigger.model.setblock() commands, so the
+whole sequence is uploaded with a single write.
+
+Sample (10 pulses of 1 ms every 10 ms, measured at the end of each pulse):
+    model = TriggerModel()
+    model.BufferClear('defbuffer1')
+    model.ConfigRecall('PulseList', 1)
+    model.SourceOutput(True)
+    with model.Loop(10):
+        model.Delay(10e-3)
+        model.ConfigNext('PulseList')
+        model.Delay(1e-3)
+        model.Measure('defbuffer1')
+        model.ConfigNext('PulseList')
+    model.SourceOutput(False)
+    KDM.RunTriggerModel(model)
+
+Branch targets are block numbers or labels (model.Label('name') names the next block).
+"""
+
+import contextlib
+
+#The block numbers of the 2450 trigger model
+MAX_BLOCKS:int = 255
+
+#Limit types of BranchLimitConstant()
+LIMIT_TYPES = ('above', 'below', 'inside', 'outside')
+
+
+class TriggerModel(object):
+
+    def __init__(self):
+        self.blocks = []
+        self.labels = {}
+        self.__openLoops = 0
+
+    #----------------Blocks--------------------------------------
+    def Label(self, name:str) -> 'TriggerModel':
+        """
+        Names the next block, so branches can refer to it by name.
+        """
+        if(name in self.labels):
+            raise Exception(f'The label <{name}> is already used.')
+        self.labels[name] = len(self.blocks) + 1
+        return self
+
+    def BufferClear(self, bufferName:str='defbuffer1') -> int:
+        return self.__Add('BLOCK_BUFFER_CLEAR', bufferName)
+
+    def ConfigRecall(self, listName:str, index:int=1, measureListName:str=None, measureIndex:int=None) -> int:
+        """
+        Loads the entry index of a source configuration list (and optionally of a measure configuration list).
+        """
+        arguments = [f'"{listName}"', index]
+        if(measureListName is not None):
+            arguments += [f'"{measureListName}"', measureIndex if measureIndex is not None else index]
+        return self.__Add('BLOCK_CONFIG_RECALL', *arguments)
+
+    def ConfigNext(self, listName:str, measureListName:str=None) -> int:
+        arguments = [f'"{listName}"'] + ([f'"{measureListName}"'] if measureListName is not None else [])
+        return self.__Add('BLOCK_CONFIG_NEXT', *arguments)
+
+    def ConfigPrev(self, listName:str, measureListName:str=None) -> int:
+        arguments = [f'"{listName}"'] + ([f'"{measureListName}"'] if measureListName is not None else [])
+        return self.__Add('BLOCK_CONFIG_PREV', *arguments)
+
+    def SourceOutput(self, on:bool) -> int:
+        return self.__Add('BLOCK_SOURCE_OUTPUT', 'smu.ON' if on else 'smu.OFF')
+
+    def Delay(self, seconds:float) -> int:
+        """
+        Waits for a fixed time; the timing comes from the device.
+        """
+        if(seconds < 0):
+            raise Exception(f'The delay cannot be negative. The current value is {seconds} and is not Valid.')
+        return self.__Add('BLOCK_DELAY_CONSTANT', seconds)
+
+    def Measure(self, bufferName:str='defbuffer1', count:int=1) -> int:
+        if(count < 1):
+            raise Exception(f'The count of a measure block must be at least 1. The current value is {count} and is not Valid.')
+        return self.__Add('BLOCK_MEASURE', bufferName, *([count] if count != 1 else []))
+
+    def Wait(self, event:str, clear:bool=False) -> int:
+        """
+        Waits for an event, e.g. 'trigger.EVENT_DIGIO1' or 'trigger.EVENT_DISPLAY'.
+        """
+        return self.__Add('BLOCK_WAIT', event, *(['trigger.CLEAR_ENTER'] if clear else []))
+
+    def Notify(self, eventNumber:int) -> int:
+        """
+        Generates the trigger event trigger.EVENT_NOTIFY<eventNumber> (1 to 8), e.g. to trigger a digital output line.
+        """
+        if(eventNumber not in range(1, 9)):
+            raise Exception(f'The notify event number can be 1 to 8. The current value is {eventNumber} and is not Valid.')
+        return self.__Add('BLOCK_NOTIFY', f'trigger.EVENT_NOTIFY{eventNumber}')
+
+    def DigitalIO(self, bitPattern:int, bitMask:int=0b111111) -> int:
+        """
+        Sets the digital I/O lines in bitMask to bitPattern (6 lines).
+        """
+        if(not 0 <= bitPattern <= 0b111111 or not 0 <= bitMask <= 0b111111):
+            raise Exception(f'The digital I/O pattern and mask must be 0 to 63. The current values are {bitPattern} and {bitMask}.')
+        return self.__Add('BLOCK_DIGITAL_IO', bitPattern, bitMask)
+
+    def NoOperation(self) -> int:
+        return self.__Add('BLOCK_NOP')
+
+    def BranchAlways(self, target) -> int:
+        return self.__Add('BLOCK_BRANCH_ALWAYS', _Target(target))
+
+    def BranchOnce(self, target) -> int:
+        return self.__Add('BLOCK_BRANCH_ONCE', _Target(target))
+
+    def BranchCounter(self, count:int, target) -> int:
+        """
+        Branches to target count times, then continues with the next block.
+        """
+        if(count < 1):
+            raise Exception(f'The count of a branch counter must be at least 1. The current value is {count} and is not Valid.')
+        return self.__Add('BLOCK_BRANCH_COUNTER', count, _Target(target))
+
+    def BranchLimitConstant(self, limitType:str, limitA:float, limitB:float, target, measureBlock=None) -> int:
+        """
+        Branches to target when the last reading (of measureBlock, or of the last measure block) is 'above', 'below',
+        'inside' or 'outside' the limits.
+        """
+        if(limitType not in LIMIT_TYPES):
+            raise Exception(f'The limit type can be one of {LIMIT_TYPES}. The current value is {limitType} and is not Valid.')
+        arguments = [f'trigger.LIMIT_{limitType.upper()}', limitA, limitB, _Target(target)]
+        if(measureBlock is not None):
+            arguments.append(_Target(measureBlock))
+        return self.__Add('BLOCK_BRANCH_LIMIT_CONSTANT', *arguments)
+
+    def ResetBranchCount(self, counterBlock) -> int:
+        return self.__Add('BLOCK_RESET_BRANCH_COUNT', _Target(counterBlock))
+
+    @contextlib.contextmanager
+    def Loop(self, count:int):
+        """
+        Repeats the blocks added inside the with statement count times. The counter is reset when the loop starts,
+        so loops can be nested.
+        """
+        if(count < 1):
+            raise Exception(f'The count of a loop must be at least 1. The current value is {count} and is not Valid.')
+        resetBlock = self.__Add('BLOCK_RESET_BRANCH_COUNT', None)
+        self.__openLoops += 1
+        try:
+            yield resetBlock + 1
+        finally:
+            #Also when the with statement raises, so the builder does not report a loop that is still open
+            self.__openLoops -= 1
+        if(len(self.blocks) == resetBlock):
+            raise Exception('A loop must contain at least one block.')
+        counterBlock = self.BranchCounter(count, resetBlock + 1)
+        self.blocks[resetBlock - 1] = ('BLOCK_RESET_BRANCH_COUNT', (_Target(counterBlock),))
+
+    #----------------Compilation---------------------------------
+    def Validate(self):
+        """
+        Checks the block graph and raises an Exception with the number of the first wrong block:
+        missing or wrong branch targets, counter resets that do not point to a counter, open loops, too many blocks
+        and endless loops (a backward BranchAlways without a wait, a counter or a limit branch on its way).
+        """
+        if(len(self.blocks) == 0):
+            raise Exception('The trigger model has no blocks.')
+        if(self.__openLoops != 0):
+            raise Exception('A loop of the trigger model is still open.')
+        if(len(self.blocks) > MAX_BLOCKS):
+            raise Exception(f'The trigger model has {len(self.blocks)} blocks; the device accepts {MAX_BLOCKS}.')
+        for blockNumber, (blockType, arguments) in enumerate(self.blocks, start=1):
+            for argument in arguments:
+                if(isinstance(argument, _Target)):
+                    target = self.__Resolve(argument, blockNumber)
+                    if(blockType == 'BLOCK_RESET_BRANCH_COUNT' and self.blocks[target - 1][0] != 'BLOCK_BRANCH_COUNTER'):
+                        raise Exception(f'Block {blockNumber} resets the counter of block {target}, which is not a branch counter.')
+            if(blockType == 'BLOCK_BRANCH_ALWAYS'):
+                target = self.__Resolve(arguments[0], blockNumber)
+                if(target <= blockNumber):
+                    exits = ('BLOCK_WAIT', 'BLOCK_BRANCH_COUNTER', 'BLOCK_BRANCH_LIMIT_CONSTANT', 'BLOCK_BRANCH_ONCE')
+                    if(not any(self.blocks[index - 1][0] in exits for index in range(target, blockNumber))):
+                        raise Exception(f'Block {blockNumber} branches back to block {target} and nothing between them can leave the loop; the trigger model would never end.')
+
+    def Compile(self) -> str:
+        """
+        Validates the model and returns one TSP chunk that replaces the trigger model of the device with these blocks.
+        """
+        self.Validate()
+        commands = ['trigger.model.load("Empty")']
+        for blockNumber, (blockType, arguments) in enumerate(self.blocks, start=1):
+            values = [str(self.__Resolve(argument, blockNumber)) if isinstance(argument, _Target) else _Format(argument) for argument in arguments]
+            commands.append(f'trigger.model.setblock({", ".join([str(blockNumber), "trigger." + blockType] + values)})')
+        return ' '.join(commands)
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def __repr__(self) -> str:
+        lines = []
+        names = {number:name for name, number in self.labels.items()}
+        for blockNumber, (blockType, arguments) in enumerate(self.blocks, start=1):
+            label = f' <{names[blockNumber]}>' if blockNumber in names else ''
+            lines.append(f'{blockNumber:>3}{label} {blockType} ' + ', '.join(str(argument) for argument in arguments))
+        return 'TriggerModel(\n' + '\n'.join(lines) + '\n)'
+
+    #----------------Private Functions---------------------------
+    def __Add(self, blockType:str, *arguments) -> int:
+        self.blocks.append((blockType, arguments))
+        return len(self.blocks)
+
+    def __Resolve(self, target:'_Target', blockNumber:int) -> int:
+        value = target.value
+        if(isinstance(value, str)):
+            if(value not in self.labels):
+                raise Exception(f'Block {blockNumber} branches to the label <{value}>, which does not exist.')
+            value = self.labels[value]
+        if(not isinstance(value, int) or not 1 <= value <= len(self.blocks)):
+            raise Exception(f'Block {blockNumber} refers to block {value}; the model has blocks 1 to {len(self.blocks)}.')
+        return value
+
+
+class _Target(object):
+    #A block number or a label, resolved when the model is compiled
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f'->{self.value}'
+
+def _Format(value) -> str:
+    if(isinstance(value, bool)):
+        return 'smu.ON' if value else 'smu.OFF'
+    if(isinstance(value, float)):
+        return f'{value:.9g}'
+    return str(value)